@@ -0,0 +1,172 @@
+"""
+Поиск ближайших клиник.
+
+Для ``--count`` клиник со случайными координатами (скопления вокруг
+городов и разброс по всему миру, часть неактивна или закрыта) и
+``--queries`` случайных точек сравниваются:
+
+* ``brute`` — расстояние до каждой клиники и сортировка;
+* ``index`` — ``ClinicLocator`` (k-d дерево в памяти);
+* ``index/open`` — то же с фильтром "открыта сейчас";
+* ``db`` — холодный путь ``nearest_from_db`` по SQLite в памяти
+  (прямоугольник по индексу ``ix_clinics_latitude_longitude``) на первых
+  ``--db-queries`` точках; с ``--db-queries 0`` не измеряется.
+
+Ответы всех способов должны совпадать с перебором. Если запрос к
+индексу в среднем дольше ``--budget-ms``, команда завершается с кодом 1.
+
+Запуск из корня репозитория::
+
+    python -m benchmarks.geo
+    python -m benchmarks.geo --count 5000 --k 5 --queries 2000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, time as dt_time
+from typing import Any, Callable
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.models import Clinic
+from src.services.geo_service import ClinicLocator, haversine_km, is_open, nearest_from_db
+
+CITIES = ((55.75, 37.62), (59.94, 30.31), (56.84, 60.60), (55.03, 82.92), (43.12, 131.89), (64.73, 177.51))
+OPEN_AT = dt_time(21, 30)
+
+
+def make_clinics(count: int) -> list[dict[str, Any]]:
+    rnd = random.Random(0)
+    clinics = []
+    for i in range(count):
+        if i % 10 == 0:
+            latitude, longitude = rnd.uniform(-85, 85), rnd.uniform(-180, 180)
+        else:
+            city_lat, city_lon = rnd.choice(CITIES)
+            latitude, longitude = city_lat + rnd.gauss(0, 0.3), city_lon + rnd.gauss(0, 0.5)
+            longitude = (longitude + 180) % 360 - 180
+        opens = rnd.randrange(6, 22)
+        clinics.append({
+            "id": i + 1,
+            "name": f"Клиника {i + 1}",
+            "address": "ул. Ленина, 1",
+            "phone_number": "+70000000000",
+            "email": "clinic@example.com",
+            "is_24_7": i % 4 == 0,
+            "map_url": None,
+            "latitude": latitude,
+            "longitude": longitude,
+            "start_time": dt_time(opens),
+            "end_time": dt_time((opens + rnd.randrange(8, 14)) % 24),  # часть — ночной график
+            "description": None,
+            "is_active": i % 7 != 0,
+            "created_at": datetime(2026, 1, 1),
+            "updated_at": None,
+        })
+    return clinics
+
+
+def make_points(count: int) -> list[tuple[float, float]]:
+    """Точки поиска: половина — рядом с городами, половина — где угодно."""
+    rnd = random.Random(1)
+    points = []
+    for i in range(count):
+        if i % 2:
+            latitude, longitude = rnd.uniform(-80, 80), rnd.uniform(-180, 180)
+        else:
+            city_lat, city_lon = rnd.choice(CITIES)
+            latitude, longitude = city_lat + rnd.gauss(0, 1), city_lon + rnd.gauss(0, 1)
+        points.append((latitude, (longitude + 180) % 360 - 180))
+    return points
+
+
+def brute_force(clinics: list[dict[str, Any]], latitude: float, longitude: float, k: int, open_at=None) -> list[int]:
+    candidates = [
+        (haversine_km(latitude, longitude, c["latitude"], c["longitude"]), c["id"])
+        for c in clinics
+        if c["is_active"] and (open_at is None or is_open(c, open_at))
+    ]
+    return [clinic_id for _, clinic_id in sorted(candidates)[:k]]
+
+
+def timed(function: Callable[[], Any]) -> tuple[float, Any]:
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+async def query_db(clinics: list[dict[str, Any]], points: list[tuple[float, float]], k: int) -> tuple[float, list]:
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Clinic.__table__.create)
+        await conn.execute(insert(Clinic.__table__), clinics)
+    results = []
+    start = time.perf_counter()
+    async with AsyncSession(engine) as db:
+        for latitude, longitude in points:
+            results.append([c["id"] for c in await nearest_from_db(db, latitude, longitude, k)])
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+    return elapsed, results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=5000, help="Клиник")
+    parser.add_argument("--k", type=int, default=5, help="Сколько ближайших искать")
+    parser.add_argument("--queries", type=int, default=1000, help="Точек поиска")
+    parser.add_argument("--db-queries", type=int, default=100, help="Точек поиска для холодного пути")
+    parser.add_argument("--budget-ms", type=float, default=1.0, help="Бюджет запроса к индексу")
+    args = parser.parse_args()
+
+    clinics = make_clinics(args.count)
+    points = make_points(args.queries)
+
+    locator = ClinicLocator()
+    build, _ = timed(lambda: locator.rebuild(c for c in clinics if c["is_active"]))
+    print(f"индекс: {len(locator)} клиник, сборка {build * 1000:.1f} ms\n")
+
+    def ids(found: list[dict[str, Any]]) -> list[int]:
+        return [c["id"] for c in found]
+
+    methods = {
+        "brute": lambda lat, lon: brute_force(clinics, lat, lon, args.k),
+        "index": lambda lat, lon: ids(locator.nearest(lat, lon, args.k)),
+        "brute/open": lambda lat, lon: brute_force(clinics, lat, lon, args.k, OPEN_AT),
+        "index/open": lambda lat, lon: ids(locator.nearest(lat, lon, args.k, open_at=OPEN_AT)),
+    }
+    elapsed, results = {}, {}
+    for name, method in methods.items():
+        elapsed[name], results[name] = timed(lambda: [method(lat, lon) for lat, lon in points])
+    db_points = points[:args.db_queries]
+    if db_points:
+        elapsed["db"], results["db"] = asyncio.run(query_db(clinics, db_points, args.k))
+
+    print(f"{'method':<12} {'ms/query':>9}  совпадает с перебором")
+    failures = []
+    for name, total in elapsed.items():
+        queries = len(results[name])
+        expected = results["brute/open" if name.endswith("/open") else "brute"][:queries]
+        matches = results[name] == expected
+        print(f"{name:<12} {total / queries * 1000:>9.3f}  {'да' if matches else 'НЕТ'}")
+        if not matches:
+            failures.append(f"{name}: ответы расходятся с перебором")
+    for name in ("index", "index/open"):
+        per_query = elapsed[name] / len(points) * 1000
+        if per_query > args.budget_ms:
+            failures.append(f"{name}: {per_query:.3f} ms > бюджета {args.budget_ms} ms")
+
+    if failures:
+        print("\nОШИБКИ:")
+        for line in failures:
+            print("  " + line)
+        return 1
+    print("\nв пределах бюджета")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
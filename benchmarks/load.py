@@ -0,0 +1,451 @@
+"""
+Нагрузочный замер HTTP API.
+
+Три команды:
+
+* ``seed`` — заполняет базу данных окружения (по умолчанию ``testing``)
+  реалистичным набором: клиники, тысячи услуг и специалистов со связями,
+  акции, новости с блоками. ``--reset`` пересоздает таблицы;
+* ``run`` — по очереди нагружает сценарии (главная, ``/api/health``,
+  каталог) с ``--concurrency`` одновременными клиентами и сохраняет JSON
+  с пропускной способностью и p50/p95/p99. ``--mode asgi`` вызывает
+  ``src.main.create_app()`` в том же процессе (``httpx.ASGITransport``, с lifespan),
+  ``--mode uvicorn`` запускает ``python -m src.main <env>`` отдельным
+  процессом, ``--url`` нагружает уже запущенный сервер;
+* ``compare`` — сравнивает два файла результатов (например, двух коммитов)
+  и завершается с кодом 1, если p95 или пропускная способность какого-либо
+  сценария ухудшились больше ``--threshold`` или появились ошибки.
+
+Запуск из корня репозитория (нужен PostgreSQL из конфигурации окружения)::
+
+    python -m benchmarks.load seed --reset
+    python -m benchmarks.load run --mode asgi --output before.json
+    python -m benchmarks.load run --mode uvicorn --output after.json
+    python -m benchmarks.load compare before.json after.json
+
+Окружение ``development`` не подходит: в нем включено логирование SQL.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, time as dtime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+UVICORN_URL = "http://127.0.0.1:8000"  # порт задан в src.main
+
+DATASET = {"clinics": 10, "services": 3000, "specialists": 2000, "promotions": 300, "news": 500}
+
+_FIRST_NAMES = ("Анна", "Иван", "Мария", "Петр", "Ольга", "Сергей", "Елена", "Дмитрий")
+_LAST_NAMES = ("Иванов", "Петров", "Смирнов", "Кузнецов", "Попов", "Соколов", "Лебедев", "Козлов")
+_SPECIALIZATIONS = ("терапевт", "хирург", "дерматолог", "офтальмолог", "кардиолог", "стоматолог")
+_SERVICE_WORDS = ("Прием", "УЗИ", "Вакцинация", "Анализ крови", "Стерилизация", "Чистка зубов", "Рентген")
+
+
+def load_app(env: str) -> Any:
+    """Приложение ``src.main.create_app`` с конфигурацией окружения."""
+    from src.core.config import get_config
+    from src.main import create_app
+
+    return create_app(get_config(env))
+
+
+# ----------------------------------------------------------------------
+# Данные
+# ----------------------------------------------------------------------
+
+def _chunks(rows: list[dict], size: int = 1000) -> list[list[dict]]:
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+
+async def seed(env: str, counts: dict[str, int], reset: bool) -> None:
+    """Заполняет базу набором ``counts``; с ``reset`` таблицы пересоздаются."""
+    from sqlalchemy import insert
+
+    from src.core.config import init_config
+    from src.core.database import AsyncSessionLocal, init_database
+    from src.models import (
+        Base, Clinic, ClinicStaff, News, NewsBlock, Promotion, Service, Specialist, service_specialist,
+    )
+    from src.models.service import ServiceCategory
+    from src.models.user import UserRole
+
+    settings = init_config(env)
+    if settings.ENV == "production":
+        raise SystemExit("Заполнение базы в окружении production запрещено")
+    engine = init_database(settings).primary
+
+    if reset:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+    rnd = random.Random(0)
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        async def insert_rows(model: Any, rows: list[dict]) -> list[int]:
+            ids = []
+            for chunk in _chunks(rows):
+                result = await db.execute(insert(model).returning(model.id), chunk)
+                ids.extend(result.scalars().all())
+            return ids
+
+        clinic_ids = await insert_rows(Clinic, [
+            {
+                "name": f"Спектр, филиал {i}",
+                "address": f"ул. Ленина, {i + 1}",
+                "phone_number": f"+7912000{i:04d}",
+                "email": f"clinic{i}@spectr.example",
+                "is_24_7": i % 4 == 0,
+                "start_time": dtime(9, 0),
+                "end_time": dtime(21, 0),
+                "description": "Ветеринарная клиника полного цикла",
+            }
+            for i in range(counts["clinics"])
+        ])
+        author_ids = await insert_rows(ClinicStaff, [
+            {
+                "email": f"manager{i}@spectr.example",
+                "hashed_password": "!",  # вход не нужен
+                "first_name": rnd.choice(_FIRST_NAMES),
+                "last_name": rnd.choice(_LAST_NAMES),
+                "role": UserRole.CLINIC_MANAGER,
+                "clinic_id": clinic_id,
+            }
+            for i, clinic_id in enumerate(clinic_ids)
+        ])
+        categories = list(ServiceCategory)
+        service_rows = []
+        for i in range(counts["services"]):
+            price = Decimal(rnd.randrange(500, 20000, 50))
+            service_rows.append({
+                "name": f"{rnd.choice(_SERVICE_WORDS)} {i}",
+                "short_description": "Описание услуги для карточки",
+                "description": "Подробное описание услуги. " * 5,
+                "price": price,
+                "min_price": price,
+                "max_price": price * 2,
+                "duration_minutes": rnd.choice((15, 30, 45, 60, 90)),
+                "category": rnd.choice(categories),
+                "is_popular": i % 20 == 0,
+                "tags": rnd.sample(("кошки", "собаки", "грызуны", "птицы", "экзоты"), 2),
+                "order_index": i,
+                "clinic_id": rnd.choice(clinic_ids),
+            })
+        service_ids = await insert_rows(Service, service_rows)
+        specialist_ids = await insert_rows(Specialist, [
+            {
+                "first_name": rnd.choice(_FIRST_NAMES),
+                "last_name": f"{rnd.choice(_LAST_NAMES)}{i}",
+                "specialization": rnd.choice(_SPECIALIZATIONS),
+                "experience": rnd.randrange(1, 30),
+                "description": "Опытный ветеринарный врач",
+                "clinic_id": rnd.choice(clinic_ids),
+            }
+            for i in range(counts["specialists"])
+        ])
+        links = {
+            (service_id, specialist_id)
+            for service_id in service_ids
+            for specialist_id in rnd.sample(specialist_ids, min(3, len(specialist_ids)))
+        }
+        for chunk in _chunks([{"service_id": s, "specialist_id": p} for s, p in links], 5000):
+            await db.execute(insert(service_specialist), chunk)
+        await insert_rows(Promotion, [
+            {
+                "title": f"Скидка {i}",
+                "short_description": "Только в этом месяце",
+                "discount_type": "percentage",
+                "discount_value": Decimal(rnd.randrange(5, 50)),
+                "start_date": now - timedelta(days=rnd.randrange(30)),
+                "end_date": now + timedelta(days=rnd.randrange(1, 60)),
+                "is_active": True,
+                "is_featured": i % 10 == 0,
+                "clinic_id": None if i % 5 == 0 else rnd.choice(clinic_ids),
+                "service_ids": rnd.sample(service_ids, min(3, len(service_ids))),
+            }
+            for i in range(counts["promotions"])
+        ])
+        news_ids = await insert_rows(News, [
+            {
+                "title": f"Новость клиники {i}",
+                "excerpt": "Краткое описание новости",
+                "publication_date": now - timedelta(hours=i),
+                "is_published": True,
+                "author_id": rnd.choice(author_ids),
+            }
+            for i in range(counts["news"])
+        ])
+        for chunk in _chunks([
+            {"news_id": news_id, "title": f"Раздел {order}", "text_content": "Текст абзаца.\n\n" * 3, "order": order}
+            for news_id in news_ids
+            for order in range(3)
+        ]):
+            await db.execute(insert(NewsBlock), chunk)
+        await db.commit()
+    await engine.dispose()
+    print(f"Заполнено: {counts}")
+
+
+# ----------------------------------------------------------------------
+# Нагрузка
+# ----------------------------------------------------------------------
+
+async def discover(client: httpx.AsyncClient) -> dict[str, Any]:
+    """Идентификаторы из данных для сценариев с параметрами."""
+    response = await client.get("/api/v1/services/", params={"limit": 100})
+    response.raise_for_status()
+    items = response.json()["items"]
+    if not items:
+        raise SystemExit("В базе нет услуг: сначала выполните seed")
+    return {"service_ids": [item["id"] for item in items], "clinic_id": items[0]["clinic_id"]}
+
+
+def scenarios(ids: dict[str, Any]) -> dict[str, Any]:
+    """Сценарий → путь или функция, возвращающая путь (для случайных id)."""
+    service_ids = ids["service_ids"]
+    return {
+        "home": "/",
+        "health": "/api/health",
+        "services": "/api/v1/services/?limit=50",
+        "services_clinic": f"/api/v1/services/?clinic_id={ids['clinic_id']}&limit=50",
+        "service_detail": lambda rnd: f"/api/v1/services/{rnd.choice(service_ids)}",
+        "specialists": "/api/v1/specialists/?limit=50",
+        "promotions": "/api/v1/promotions/",
+        "news": "/api/v1/news/",
+        "search": "/api/v1/search/?q=вакцинация",
+    }
+
+
+def _percentile(quantiles: list[float], p: int) -> float:
+    return round(quantiles[p - 1] * 1000, 3)
+
+
+async def load_scenario(
+    client: httpx.AsyncClient, path: Any, *, requests: int, concurrency: int, warmup: int
+) -> dict[str, Any]:
+    """
+    Нагружает один сценарий: ``concurrency`` клиентов по замкнутому циклу.
+
+    Первые ``warmup`` запросов не учитываются (прогрев кэшей и пулов).
+    """
+    rnd = random.Random(0)
+    latencies: list[float] = []
+    errors = 0
+    remaining = warmup + requests
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            measured = remaining < requests
+            url = path(rnd) if callable(path) else path
+            start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            elapsed = time.perf_counter() - start
+            if measured:
+                latencies.append(elapsed)
+                errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    # Время прогрева вычитается пропорционально (клиенты заняты все время)
+    wall *= requests / (requests + warmup)
+
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "path": path if isinstance(path, str) else "<random id>",
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": _percentile(quantiles, 50),
+        "p95_ms": _percentile(quantiles, 95),
+        "p99_ms": _percentile(quantiles, 99),
+    }
+
+
+@asynccontextmanager
+async def asgi_client(env: str) -> AsyncIterator[httpx.AsyncClient]:
+    """Клиент приложения в том же процессе; lifespan выполняется как на сервере."""
+    app = load_app(env)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            yield client
+
+
+@asynccontextmanager
+async def uvicorn_client(env: str, url: Optional[str], concurrency: int) -> AsyncIterator[httpx.AsyncClient]:
+    """Клиент сервера uvicorn: уже запущенного по ``url`` или нового процесса ``src.main``."""
+    process = None
+    if url is None:
+        url = UVICORN_URL
+        process = subprocess.Popen([sys.executable, "-m", "src.main", env], cwd=ROOT)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+            await _wait_ready(client, process)
+            yield client
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+async def _wait_ready(client: httpx.AsyncClient, process: Optional[subprocess.Popen], timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise SystemExit(f"Сервер завершился с кодом {process.returncode}")
+        try:
+            if (await client.get("/api/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise SystemExit("Сервер не ответил на /api/health")
+
+
+def _git_revision() -> dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "src"))}
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    if args.mode == "asgi":
+        client_context = asgi_client(args.env)
+    else:
+        client_context = uvicorn_client(args.env, args.url, args.concurrency)
+
+    results: dict[str, Any] = {}
+    async with client_context as client:
+        selected = scenarios(await discover(client))
+        if args.scenario:
+            selected = {name: selected[name] for name in args.scenario}
+        for name, path in selected.items():
+            results[name] = await load_scenario(
+                client, path, requests=args.requests, concurrency=args.concurrency, warmup=args.warmup)
+            print(_format_row(name, results[name]), flush=True)
+
+    return {
+        "meta": {
+            **_git_revision(),
+            "mode": args.mode if args.url is None else f"url:{args.url}",
+            "env": args.env,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "python": platform.python_version(),
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        },
+        "scenarios": results,
+    }
+
+
+# ----------------------------------------------------------------------
+# Сравнение
+# ----------------------------------------------------------------------
+
+def _format_row(name: str, result: dict[str, Any]) -> str:
+    return (
+        f"{name:<16} {result['rps']:>9.1f} rps  p50 {result['p50_ms']:>8.2f}  p95 {result['p95_ms']:>8.2f}"
+        f"  p99 {result['p99_ms']:>8.2f} ms  ошибок {result['errors']}"
+    )
+
+
+def compare(before: dict[str, Any], after: dict[str, Any], threshold: float) -> list[str]:
+    """Регрессии ``after`` относительно ``before`` по общим сценариям."""
+    regressions = []
+    print(f"{'scenario':<16} {'rps':>18} {'p95, ms':>22}")
+    for name in [name for name in before["scenarios"] if name in after["scenarios"]]:
+        old, new = before["scenarios"][name], after["scenarios"][name]
+        rps_change = new["rps"] / old["rps"] - 1 if old["rps"] else 0.0
+        p95_change = new["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0
+        print(
+            f"{name:<16} {old['rps']:>8.1f} → {new['rps']:<8.1f} ({rps_change:+.0%})"
+            f" {old['p95_ms']:>8.2f} → {new['p95_ms']:<8.2f} ({p95_change:+.0%})"
+        )
+        if rps_change < -threshold:
+            regressions.append(f"{name}: пропускная способность {rps_change:+.1%}")
+        if p95_change > threshold:
+            regressions.append(f"{name}: p95 {p95_change:+.1%}")
+        if new["errors"] > old["errors"]:
+            regressions.append(f"{name}: ошибок {old['errors']} → {new['errors']}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="Заполнить базу тестовыми данными")
+    seed_parser.add_argument("--env", default="testing", help="Окружение конфигурации")
+    seed_parser.add_argument("--reset", action="store_true", help="Пересоздать таблицы")
+    for name, default in DATASET.items():
+        seed_parser.add_argument(f"--{name}", type=int, default=default)
+
+    run_parser = commands.add_parser("run", help="Нагрузить сценарии и сохранить результаты")
+    run_parser.add_argument("--env", default="testing", help="Окружение конфигурации")
+    run_parser.add_argument("--mode", choices=("asgi", "uvicorn"), default="asgi")
+    run_parser.add_argument("--url", help="Нагружать уже запущенный сервер")
+    run_parser.add_argument("--requests", type=int, default=500, help="Запросов на сценарий")
+    run_parser.add_argument("--concurrency", type=int, default=20, help="Одновременных клиентов")
+    run_parser.add_argument("--warmup", type=int, default=50, help="Запросов прогрева на сценарий")
+    run_parser.add_argument("--scenario", action="append", help="Только указанные сценарии")
+    run_parser.add_argument("--output", type=Path, help="Файл результатов JSON")
+
+    compare_parser = commands.add_parser("compare", help="Сравнить два файла результатов")
+    compare_parser.add_argument("before", type=Path)
+    compare_parser.add_argument("after", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Допустимое ухудшение (доля)")
+
+    args = parser.parse_args()
+    os.chdir(ROOT)  # пути статики и медиа в конфигурации относительные
+
+    if args.command == "seed":
+        asyncio.run(seed(args.env, {name: getattr(args, name) for name in DATASET}, args.reset))
+        return 0
+
+    if args.command == "run":
+        if args.url is not None:
+            args.mode = "uvicorn"
+        result = asyncio.run(run(args))
+        output = args.output or RESULTS_DIR / f"{result['meta']['commit'][:12]}-{args.mode}.json"
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, ensure_ascii=False, indent=2))
+        print(f"\nрезультаты: {output}")
+        return 0
+
+    before, after = (json.loads(path.read_text()) for path in (args.before, args.after))
+    regressions = compare(before, after, args.threshold)
+    if regressions:
+        print("\nРЕГРЕССИИ:")
+        for line in regressions:
+            print("  " + line)
+        return 1
+    print("\nрегрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Скорость JSON-ответов списков.
+
+Страница ``Page[PromotionWithClinic]`` из ``--count`` элементов отдается
+через HTTP (``httpx.ASGITransport``, без сети) тремя способами:
+
+* ``default`` — endpoint возвращает словарь с объектами ORM, ответ
+  строит FastAPI по ``response_model`` (валидация, ``jsonable_encoder``,
+  ``json.dumps``);
+* ``fast/orm`` — те же объекты ORM через ``src.core.responses.page_response``;
+* ``fast/row`` — строки ``Row`` (SELECT колонок) через ``page_response``.
+
+Печатается время ответа и число элементов в секунду; разобранный JSON
+всех способов должен совпадать.
+
+Запуск из корня репозитория::
+
+    python -m benchmarks.responses
+    python -m benchmarks.responses --count 1000 --repeat 50
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.engine.result import result_tuple
+
+from src.core.responses import FastJSONResponse, page_response
+from src.models import Promotion
+from src.schemas.pagination import Page
+from src.schemas.promotion import PromotionWithClinic
+
+NEXT_CURSOR = "WyIyMDI2LTAxLTAxVDAwOjAwOjAwIiwxMDAwXQ"
+
+
+def _values(rnd: random.Random, i: int) -> dict[str, Any]:
+    start = datetime(2026, 1, 1) + timedelta(hours=rnd.randrange(5000))
+    network_wide = i % 5 == 0
+    return {
+        "id": i + 1,
+        "title": f"Скидка на услугу {i}",
+        "short_description": "Только в этом месяце",
+        "description": "<p>Подробные условия акции.</p>" * 3,
+        "discount_type": rnd.choice(("percentage", "fixed")),
+        "discount_value": Decimal(rnd.randrange(5, 50)),
+        "original_price": Decimal("1500.00"),
+        "final_price": Decimal("1200.00"),
+        "start_date": start,
+        "end_date": start + timedelta(days=30),
+        "image_url": f"/media/promotions/{i}.jpg",
+        "gallery": [f"/media/promotions/{i}-{n}.jpg" for n in range(rnd.randrange(4))],
+        "is_active": True,
+        "is_featured": i % 10 == 0,
+        "conditions": None,
+        "promo_code": f"SALE{i}" if i % 3 == 0 else None,
+        "clinic_id": None if network_wide else rnd.randrange(1, 20),
+        "service_ids": rnd.sample(range(1, 200), 3),
+        "created_at": start - timedelta(days=1),
+        "updated_at": start - timedelta(days=1),
+        "clinic_name": None if network_wide else "Спектр, филиал",
+        "clinic_address": None if network_wide else "ул. Ленина, 1",
+    }
+
+
+def make_items(count: int) -> tuple[list[Promotion], list[Any]]:
+    """Одни и те же данные в виде объектов ORM и строк ``Row``."""
+    rnd = random.Random(0)
+    values = [_values(rnd, i) for i in range(count)]
+    orm = []
+    for data in values:
+        data = dict(data)
+        clinic = {"clinic_name": data.pop("clinic_name"), "clinic_address": data.pop("clinic_address")}
+        obj = Promotion(**data)
+        # Поля клиники в ORM-объекте — как у прежнего endpoint'а с join
+        obj.__dict__.update(clinic)
+        orm.append(obj)
+    make_row = result_tuple(list(values[0]))
+    rows = [make_row(tuple(data.values())) for data in values]
+    return orm, rows
+
+
+def build_app(orm: list[Promotion], rows: list[Any]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/default", response_model=Page[PromotionWithClinic])
+    async def default():
+        return {"items": orm, "next_cursor": NEXT_CURSOR}
+
+    @app.get("/fast/orm", response_model=Page[PromotionWithClinic], response_class=FastJSONResponse)
+    async def fast_orm():
+        return page_response(PromotionWithClinic, orm, NEXT_CURSOR)
+
+    @app.get("/fast/row", response_model=Page[PromotionWithClinic], response_class=FastJSONResponse)
+    async def fast_row():
+        return page_response(PromotionWithClinic, rows, NEXT_CURSOR)
+
+    return app
+
+
+async def measure(app: FastAPI, paths: list[str], repeat: int) -> tuple[dict[str, float], dict[str, Any]]:
+    """
+    Лучшее время ответа по путям и разобранные ответы.
+
+    Пути запрашиваются попеременно, чтобы фоновая нагрузка одинаково
+    влияла на все способы.
+    """
+    best = dict.fromkeys(paths, float("inf"))
+    bodies: dict[str, Any] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(repeat):
+            for path in paths:
+                start = time.perf_counter()
+                response = await client.get(path)
+                best[path] = min(best[path], time.perf_counter() - start)
+                response.raise_for_status()
+                bodies[path] = response.content
+    return best, {path: json.loads(body) for path, body in bodies.items()}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=1000, help="Элементов на странице")
+    parser.add_argument("--repeat", type=int, default=30, help="Повторов, берется лучший")
+    args = parser.parse_args()
+
+    orm, rows = make_items(args.count)
+    paths = ["/default", "/fast/orm", "/fast/row"]
+    best, parsed = asyncio.run(measure(build_app(orm, rows), paths, args.repeat))
+
+    baseline = best["/default"]
+    print(f"{'path':<12} {'ms':>8} {'items/s':>12} {'speedup':>8}")
+    for path in paths:
+        elapsed = best[path]
+        print(f"{path:<12} {elapsed * 1000:>8.2f} {args.count / elapsed:>12,.0f} {baseline / elapsed:>7.2f}x")
+
+    mismatched = [path for path in paths[1:] if parsed[path] != parsed["/default"]]
+    print(f"\nответы совпадают: {'нет (' + ', '.join(mismatched) + ')' if mismatched else 'да'}")
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+"""
+Пропускная способность валидации схем.
+
+Каждая схема проверяется пачкой из ``--count`` разных объектов одним
+вызовом ``TypeAdapter(list[Schema])`` — так работают массовые операции
+(импорт каталога, списки из БД). Печатается число объектов в секунду.
+
+С ``--baseline REV`` те же схемы загружаются из ревизии git и сравниваются
+с текущими: скорость и результат валидации на наборе граничных случаев.
+Успешная валидация должна давать одинаковый ``model_dump()``, неуспешная —
+те же ошибки (место, тип, текст), в том числе межполевые рядом с ошибками
+других полей. Поля, которых нет в базовой ревизии, не сравниваются.
+
+Запуск из корня репозитория::
+
+    python -m benchmarks.schemas
+    python -m benchmarks.schemas --baseline HEAD~1 --count 10000
+"""
+import argparse
+import importlib
+import random
+import subprocess
+import sys
+import time
+import types
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Iterator
+
+from pydantic import TypeAdapter, ValidationError
+
+SCHEMAS = {
+    "ClientCreate": "src/schemas/user.py",
+    "NewsCreate": "src/schemas/news.py",
+    "PromotionBase": "src/schemas/promotion.py",
+    "ClinicBase": "src/schemas/clinic.py",
+    "ServiceBase": "src/schemas/service.py",
+}
+
+_DOMAINS = ("gmail.com", "mail.ru", "yandex.ru", "inbox.ru", "vetclinic.ru", "bk.ru")
+_PHONES = ("+7 (912) {0:03d}-45-67", "8 912 {0:03d} 45 67", "89123{0:03d}567", "+7-912-{0:03d}-4567")
+
+
+# ----------------------------------------------------------------------
+# Данные
+# ----------------------------------------------------------------------
+
+def _client(rnd: random.Random, i: int) -> dict[str, Any]:
+    return {
+        "email": f"client.{i}@{rnd.choice(_DOMAINS)}",
+        "first_name": "Иван",
+        "last_name": f"Петров{i}",
+        "phone_number": rnd.choice(_PHONES).format(i % 1000),
+        "password": f"secret{i}",
+        "date_of_birth": (date(1960, 1, 1) + timedelta(days=rnd.randrange(20000))).isoformat(),
+        "blood_type": rnd.choice(("a+", "O-", "AB+", None)),
+        "allergies": ["пыльца", "шерсть"][: rnd.randrange(3)],
+    }
+
+
+def _news(rnd: random.Random, i: int) -> dict[str, Any]:
+    return {
+        "title": f"Новость {i}",
+        "excerpt": "Кратко о главном",
+        "cover_image": f"/media/news/{i}.jpg",
+        "is_published": True,
+        "publication_date": (datetime(2026, 1, 1) + timedelta(hours=i)).isoformat(),
+        "blocks": [
+            {
+                "title": f"Блок {n}",
+                "text_content": "Текст блока новости. " * rnd.randrange(5, 40),
+                "image_url": f"https://cdn.example.ru/news/{i}/{n}.jpg",
+                "image_position": rnd.choice(("left", "right", "top", "bottom")),
+                "order": n,
+                "meta": {"caption": f"Подпись {n}", "width": 800, "tags": ["a", "b"]},
+            }
+            for n in range(rnd.randrange(2, 8))
+        ],
+    }
+
+
+def _promotion(rnd: random.Random, i: int) -> dict[str, Any]:
+    start = datetime(2026, 1, 1) + timedelta(days=rnd.randrange(300))
+    return {
+        "title": f"Акция {i}",
+        "discount_type": rnd.choice(("percentage", "fixed")),
+        "discount_value": rnd.randrange(1, 100),
+        "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=rnd.randrange(1, 60))).isoformat(),
+        "image_url": f"/media/promo/{i}.jpg",
+        "gallery": [f"https://cdn.example.ru/promo/{i}/{n}.jpg" for n in range(rnd.randrange(10))],
+        "clinic_id": rnd.randrange(1, 10),
+        "service_ids": [rnd.randrange(1, 500) for _ in range(rnd.randrange(5))],
+    }
+
+
+def _clinic(rnd: random.Random, i: int) -> dict[str, Any]:
+    is_24_7 = rnd.random() < 0.2
+    data = {
+        "name": f"Клиника {i}",
+        "address": f"ул. Ленина, {i}",
+        "phone_number": "+7 (495) 123-45-67",
+        "email": f"clinic{i}@vetclinic.ru",
+        "is_24_7": is_24_7,
+        "map_url": "https://yandex.ru/maps/-/CCU",
+    }
+    if not is_24_7:
+        data.update(start_time=f"{rnd.randrange(7, 11):02d}:00", end_time=f"{rnd.randrange(18, 23):02d}:00")
+    return data
+
+
+def _service(rnd: random.Random, i: int) -> dict[str, Any]:
+    price = rnd.randrange(500, 20000)
+    duration = rnd.randrange(15, 120)
+    return {
+        "name": f"Услуга {i}",
+        "price": price,
+        "min_price": price * 0.8,
+        "max_price": price * 1.5,
+        "duration_minutes": duration,
+        "min_duration": duration - 10 if duration > 10 else None,
+        "max_duration": duration + 30,
+        "category": rnd.choice(("consultation", "surgery", "other")),
+        "tags": ["кошки", "собаки"],
+        "gallery": [f"/media/services/{i}/{n}.jpg" for n in range(rnd.randrange(6))],
+    }
+
+
+GENERATORS: dict[str, Callable[[random.Random, int], dict[str, Any]]] = {
+    "ClientCreate": _client,
+    "NewsCreate": _news,
+    "PromotionBase": _promotion,
+    "ClinicBase": _clinic,
+    "ServiceBase": _service,
+}
+
+
+def _variants(base: dict[str, Any], *changes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [base] + [{**base, **change} for change in changes]
+
+
+def edge_cases() -> dict[str, list[dict[str, Any]]]:
+    """Граничные случаи для сравнения результатов валидации."""
+    rnd = random.Random(1)
+    client, news, promotion = _client(rnd, 1), _news(rnd, 1), _promotion(rnd, 1)
+    clinic = {**_clinic(rnd, 1), "is_24_7": False, "start_time": "09:00", "end_time": "21:00"}
+    service = _service(rnd, 1)
+    block = news["blocks"][0]
+    return {
+        "ClientCreate": _variants(
+            client,
+            {"phone_number": "12345"}, {"phone_number": "+1"}, {"phone_number": "8 (912) 345-67-8"},
+            {"phone_number": "٨٩١٢٣٤٥٦٧٨٩"}, {"phone_number": "²²²²²²²²²²"}, {"phone_number": "тел. 8912345678"},
+            {"password": "secretpw"}, {"password": "secret٣"}, {"password": "abc1"},
+            {"blood_type": "c+"}, {"blood_type": "ab-"}, {"date_of_birth": "2999-01-01"},
+            {"date_of_birth": "1800-01-01"}, {"email": "not-an-email"}, {"email": "user@localhost"},
+            {"email": "Ivan@Example.COM"}, {"email": "иван@почта.рф"}, {"phone_number": "x" * 21},
+        ),
+        "NewsCreate": _variants(
+            news,
+            {"blocks": []},
+            {"blocks": [{**block, "text_content": None, "image_url": None}]},
+            {"blocks": [{**block, "text_content": None}]},
+            {"blocks": [{**block, "image_url": None, "image_position": None}]},
+            {"blocks": [{**block, "image_url": "ftp://x"}]},
+            {"blocks": [{**block, "meta": {"a": float("nan"), 1: None, "b": [1, 2.5, True]}}]},
+            {"blocks": [{**block, "meta": {"a": {1, 2}}}]},
+            {"blocks": [{**block, "meta": {(1, 2): "x"}}]},
+            {"cover_image": "ftp://cover"}, {"cover_image": ""},
+            {"blocks": [{**block, "title": "x" * 201, "image_url": None}]},
+        ),
+        "PromotionBase": _variants(
+            promotion,
+            {"end_date": promotion["start_date"]},
+            {"discount_type": "percentage", "discount_value": 150},
+            {"discount_type": "percentage", "discount_value": 0},
+            {"discount_type": "fixed", "discount_value": 0},
+            {"discount_type": "gift", "discount_value": 0},
+            {"discount_value": -1},
+            {"discount_type": "percentage", "discount_value": 150, "end_date": promotion["start_date"]},
+            # Межполевые ошибки не теряются из-за ошибки другого поля
+            {"title": "x" * 300, "start_date": "2025-02-01T00:00:00", "end_date": "2025-01-01T00:00:00",
+             "discount_type": "percentage", "discount_value": 150},
+            {"start_date": "not-a-date", "discount_type": "fixed", "discount_value": 0},
+            {"image_url": "ftp://x"}, {"image_url": ""},
+            {"gallery": ["/media/a.jpg", "", "ftp://b"]}, {"gallery": []}, {"gallery": None},
+        ),
+        "ClinicBase": _variants(
+            clinic,
+            {"end_time": "08:00"}, {"end_time": "09:00"},
+            {"is_24_7": True}, {"is_24_7": True, "start_time": None, "end_time": None},
+            {"start_time": None}, {"end_time": None}, {"start_time": None, "end_time": "08:00"},
+            {"is_24_7": True, "start_time": None}, {"map_url": "geo:55,37"}, {"map_url": "yandexnavi://x"},
+            {k: v for k, v in clinic.items() if k not in ("start_time", "end_time")},
+            {k: v for k, v in clinic.items() if k != "start_time"},
+            {k: v for k, v in {**clinic, "end_time": "05:00"}.items() if k != "start_time"},
+            {"name": "x" * 101, "end_time": "08:00"}, {"phone_number": "x" * 21, "is_24_7": True},
+            {"start_time": "25:00", "end_time": "08:00"},
+        ),
+        "ServiceBase": _variants(
+            service,
+            {"min_price": service["price"] + 1}, {"max_price": service["price"] - 1},
+            {"min_price": service["price"] + 1, "max_price": service["price"] - 1},
+            {"min_duration": 500}, {"max_duration": 1},
+            {"duration_minutes": None, "min_duration": 500, "max_duration": 1},
+            {"min_price": None, "max_price": None}, {"min_price": -1},
+            {"min_price": service["price"] + 1, "max_duration": 1},
+            {"name": "x" * 101, "min_price": service["price"] + 1, "max_duration": 1},
+            {"price": -1, "min_price": 10 ** 9},
+        ),
+    }
+
+
+# ----------------------------------------------------------------------
+# Загрузка схем
+# ----------------------------------------------------------------------
+
+def load_current() -> dict[str, type]:
+    from src.schemas.validators import cache_email_domains
+
+    cache_email_domains()  # как при запуске приложения
+    return {
+        name: getattr(importlib.import_module(path[:-3].replace("/", ".")), name)
+        for name, path in SCHEMAS.items()
+    }
+
+
+def load_baseline(rev: str) -> dict[str, type]:
+    """Схемы из ревизии git; модули грузятся под отдельными именами."""
+    schemas = {}
+    for name, path in SCHEMAS.items():
+        source = subprocess.run(
+            ["git", "show", f"{rev}:{path}"], check=True, capture_output=True, text=True
+        ).stdout
+        module_name = f"baseline_{rev}_{path[:-3]}".translate(str.maketrans("/~^.", "____"))
+        module = types.ModuleType(module_name)
+        sys.modules[module_name] = module
+        exec(compile(source, f"{rev}:{path}", "exec"), module.__dict__)
+        schemas[name] = getattr(module, name)
+    return schemas
+
+
+# ----------------------------------------------------------------------
+# Замеры
+# ----------------------------------------------------------------------
+
+@contextmanager
+def _email_domain_cache(enabled: bool) -> Iterator[None]:
+    """Включает или выключает кэш проверки доменов email на время замера базовых схем."""
+    module = importlib.import_module("email_validator.validate_email")
+    cached = module.validate_email_domain_name
+    if not enabled and hasattr(cached, "__wrapped__"):
+        module.validate_email_domain_name = cached.__wrapped__
+    try:
+        yield
+    finally:
+        module.validate_email_domain_name = cached
+
+
+def measure(
+    variants: dict[str, dict[str, type]], count: int, repeat: int
+) -> dict[str, dict[str, float]]:
+    """
+    Объектов в секунду по схемам для каждого варианта схем.
+
+    Варианты замеряются попеременно на одних и тех же данных, берется лучший
+    из ``repeat`` замеров: так фоновая нагрузка меньше искажает сравнение.
+    """
+    rates: dict[str, dict[str, float]] = {variant: {} for variant in variants}
+    for name, generate in GENERATORS.items():
+        rnd = random.Random(0)
+        items = [generate(rnd, i) for i in range(count)]
+        adapters = {variant: TypeAdapter(list[schemas[name]]) for variant, schemas in variants.items()}
+        best = dict.fromkeys(variants, float("inf"))
+        for _ in range(repeat):
+            for variant, adapter in adapters.items():
+                with _email_domain_cache(variant != "baseline"):
+                    start = time.perf_counter()
+                    adapter.validate_python(items)
+                    best[variant] = min(best[variant], time.perf_counter() - start)
+        for variant in variants:
+            rates[variant][name] = count / best[variant]
+    return rates
+
+
+def _outcome(schema: type, data: dict[str, Any]) -> Any:
+    try:
+        return "ok", schema.model_validate(data).model_dump(mode="json")
+    except ValidationError as exc:
+        return "error", [(e["loc"], e["type"], e["msg"]) for e in exc.errors()]
+
+
+def compare(baseline: dict[str, type], current: dict[str, type]) -> list[str]:
+    """Расхождения результатов валидации на граничных случаях."""
+    mismatches = []
+    for name, cases in edge_cases().items():
+        for index, data in enumerate(cases):
+            before, after = _outcome(baseline[name], data), _outcome(current[name], data)
+            if before[0] == after[0] == "ok":
+                # Поля, добавленные после базовой ревизии, не сравниваются
+                after = "ok", {key: value for key, value in after[1].items() if key in before[1]}
+            if before != after:
+                mismatches.append(f"{name}[{index}]: {before!r} != {after!r}")
+    return mismatches
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=10_000, help="Объектов в пачке")
+    parser.add_argument("--repeat", type=int, default=10, help="Повторов, берется лучший")
+    parser.add_argument("--baseline", help="Ревизия git для сравнения")
+    args = parser.parse_args()
+
+    variants = {"current": load_current()}
+    if args.baseline:
+        variants["baseline"] = load_baseline(args.baseline)
+    rates = measure(variants, args.count, args.repeat)
+
+    header = f"{'schema':<15} {'objects/s':>12}"
+    print(header + (f" {'baseline':>12} {'speedup':>8}" if args.baseline else ""))
+    for name, rate in rates["current"].items():
+        line = f"{name:<15} {rate:>12,.0f}"
+        if args.baseline:
+            before = rates["baseline"][name]
+            line += f" {before:>12,.0f} {rate / before:>7.2f}x"
+        print(line)
+
+    if not args.baseline:
+        return 0
+    mismatches = compare(variants["baseline"], variants["current"])
+    total = sum(len(cases) for cases in edge_cases().values())
+    print(f"\nграничных случаев: {total}, расхождений: {len(mismatches)}")
+    for line in mismatches:
+        print("  " + line)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""
+Поиск по услугам, специалистам и новостям на PostgreSQL.
+
+Таблицы моделей пересоздаются в базе ``--database-url`` (по умолчанию
+``TEST_DATABASE_URL``, ``postgresql+asyncpg://...``; нужно расширение
+pg_trgm) и заполняются ``--rows`` строками: половина — услуги, 30% —
+специалисты, 20% — новости. Затем проверяются:
+
+* планы (``EXPLAIN ANALYZE``) полнотекстового запроса UNION ALL и
+  триграммного добора: каждая ветка должна читать GIN-индекс своей
+  таблицы (``ix_<таблица>_search_vector`` и ``ix_<таблица>_<колонка>_trgm``),
+  а не сканировать таблицу целиком;
+* задержка ``search_service.search`` на наборе запросов: частые и редкие
+  слова, фамилии, опечатки (находятся только триграммами), слово без
+  совпадений (выполняются оба запроса).
+
+Если ветка читает таблицу без индекса или p95 какого-либо запроса больше
+``--budget-ms``, команда завершается с кодом 1.
+
+Запуск из корня репозитория::
+
+    TEST_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.search
+    python -m benchmarks.search --rows 20000 --repeat 50 --database-url postgresql+asyncpg://...
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, time as dt_time
+from decimal import Decimal
+from typing import Any, Iterator
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from src.models import Base, Clinic, ClinicStaff, News, Service, Specialist
+from src.models.service import ServiceCategory, ServiceStatus
+from src.models.user import UserRole
+from src.schemas.search import SearchEntity
+from src.services.search_service import _FTS_BRANCHES, _FTS_QUERY_CTE, _TRIGRAM_BRANCHES, _union, search
+
+SEARCH_TABLES = ("services", "specialists", "news")
+CHUNK_SIZE = 5000
+
+_SERVICE_WORDS = ("Прием", "УЗИ", "Вакцинация", "Анализ крови", "Стерилизация", "Чистка зубов", "Рентген",
+                  "Кастрация", "Груминг", "Чипирование", "Консультация", "Дегельминтизация")
+_ANIMALS = ("кошек", "собак", "кроликов", "хорьков", "попугаев", "черепах")
+_SYLLABLES = ("ка", "ли", "мо", "ро", "ва", "не", "за", "ту", "ше", "бу", "ге", "ды", "жи", "пе", "со", "фа")
+_SUFFIXES = ("ов", "ев", "ин", "ский", "енко")
+_FIRST_NAMES = ("Анна", "Иван", "Мария", "Петр", "Ольга", "Сергей", "Елена", "Дмитрий")
+_SPECIALIZATIONS = ("терапевт", "хирург", "дерматолог", "офтальмолог", "кардиолог", "стоматолог")
+_NEWS_WORDS = ("Открытие", "Акция", "Вакцинация", "Советы", "Лето", "Питание", "Паразиты", "График")
+
+
+def _surname(rnd: random.Random) -> str:
+    return "".join(rnd.choice(_SYLLABLES) for _ in range(rnd.randrange(2, 4))).capitalize() + rnd.choice(_SUFFIXES)
+
+
+def _chunks(rows: list[dict[str, Any]]) -> Iterator[list[dict[str, Any]]]:
+    for start in range(0, len(rows), CHUNK_SIZE):
+        yield rows[start:start + CHUNK_SIZE]
+
+
+async def seed(engine: AsyncEngine, rows: int) -> list[str]:
+    """Пересоздает таблицы и заполняет их; возвращает фамилии специалистов."""
+    rnd = random.Random(0)
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        clinic_ids = (await conn.execute(insert(Clinic).returning(Clinic.id), [
+            {"name": f"Филиал {i}", "address": f"ул. Ленина, {i + 1}", "phone_number": "+70000000000",
+             "email": f"clinic{i}@example.com", "start_time": dt_time(9), "end_time": dt_time(21)}
+            for i in range(10)
+        ])).scalars().all()
+        author_ids = (await conn.execute(insert(ClinicStaff).returning(ClinicStaff.id), [
+            {"email": f"manager{i}@example.com", "hashed_password": "!", "first_name": "Анна",
+             "last_name": "Петрова", "role": UserRole.CLINIC_MANAGER, "clinic_id": clinic_id}
+            for i, clinic_id in enumerate(clinic_ids)
+        ])).scalars().all()
+
+        categories = list(ServiceCategory)
+        services = []
+        for i in range(rows // 2):
+            price = Decimal(rnd.randrange(500, 20000, 50))
+            services.append({
+                "name": f"{rnd.choice(_SERVICE_WORDS)} {rnd.choice(_ANIMALS)} {_surname(rnd).lower()}",
+                "short_description": "Описание услуги для карточки",
+                "description": "Подробное описание услуги.",
+                "price": price, "min_price": price, "max_price": price * 2,
+                "category": rnd.choice(categories),
+                "tags": rnd.sample(_ANIMALS, 2),
+                "order_index": i,
+                "clinic_id": rnd.choice(clinic_ids),
+            })
+        surnames = [_surname(rnd) for _ in range(rows * 3 // 10)]
+        specialists = [
+            {"first_name": rnd.choice(_FIRST_NAMES), "last_name": surname,
+             "specialization": rnd.choice(_SPECIALIZATIONS), "clinic_id": rnd.choice(clinic_ids)}
+            for surname in surnames
+        ]
+        news = [
+            {"title": f"{rnd.choice(_NEWS_WORDS)}: {rnd.choice(_SERVICE_WORDS).lower()} для {rnd.choice(_ANIMALS)}",
+             "excerpt": "Краткое описание новости", "publication_date": now - timedelta(hours=i),
+             "is_published": i % 10 != 0, "author_id": rnd.choice(author_ids)}
+            for i in range(rows - len(services) - len(specialists))
+        ]
+        for model, data in ((Service, services), (Specialist, specialists), (News, news)):
+            for chunk in _chunks(data):
+                await conn.execute(insert(model), chunk)
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in SEARCH_TABLES:
+            await conn.execute(text(f"VACUUM ANALYZE {table}"))
+    return surnames
+
+
+def queries(surnames: list[str]) -> dict[str, str]:
+    """Набор запросов: название -> строка поиска."""
+    rnd = random.Random(1)
+    surname = rnd.choice(surnames)
+    typo = surname[:3] + surname[4:]  # пропущенная буква: слова нет в словаре
+    return {
+        "частое слово": "прием",
+        "два слова": "вакцинация кошек",
+        "специализация": "кардиолог",
+        "фамилия": surname,
+        "опечатка": typo,
+        "новости": "советы для кошек",
+        "нет совпадений": "ъыъ",
+    }
+
+
+def _plan_scans(plan: dict[str, Any]) -> Iterator[tuple[str, str, str]]:
+    """(тип узла, таблица, индекс) всех узлов чтения таблиц плана."""
+    relation = plan.get("Relation Name")
+    index = plan.get("Index Name")
+    if relation or index:
+        yield plan["Node Type"], relation or "", index or ""
+    for child in plan.get("Plans", ()):
+        yield from _plan_scans(child)
+
+
+async def explain(db: AsyncSession, sql: str, params: dict[str, Any]) -> tuple[float, list[tuple[str, str, str]]]:
+    """Время выполнения по EXPLAIN ANALYZE, мс, и узлы чтения таблиц."""
+    row = (await db.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"), params)).scalar_one()
+    plan = (json.loads(row) if isinstance(row, str) else row)[0]
+    return plan["Execution Time"], list(_plan_scans(plan["Plan"]))
+
+
+def check_indexes(branch: str, scans: list[tuple[str, str, str]]) -> list[str]:
+    """Ветки, прочитавшие свою таблицу без ожидаемого GIN-индекса."""
+    suffix = "_search_vector" if branch == "fts" else "_trgm"
+    used = {index for _, _, index in scans}
+    problems = []
+    for table in SEARCH_TABLES:
+        if not any(index.startswith(f"ix_{table}_") and index.endswith(suffix) for index in used):
+            problems.append(f"{branch}: {table} без индекса *{suffix}")
+    problems += [f"{branch}: {node} по {relation}" for node, relation, _ in scans
+                 if node == "Seq Scan" and relation in SEARCH_TABLES]
+    return problems
+
+
+async def run(args: argparse.Namespace) -> int:
+    engine = create_async_engine(args.database_url)
+    try:
+        start = time.perf_counter()
+        surnames = await seed(engine, args.rows)
+        print(f"заполнено {args.rows} строк за {time.perf_counter() - start:.1f} s\n")
+
+        entities = tuple(SearchEntity)
+        fts_sql = _union(_FTS_BRANCHES, entities, _FTS_QUERY_CTE)
+        trigram_sql = _union(_TRIGRAM_BRANCHES, entities)
+        failures: list[str] = []
+        print(f"{'запрос':<16} {'fts ms':>7} {'trgm ms':>8} {'p50 ms':>7} {'p95 ms':>7} {'найдено':>8}  нечеткий")
+        async with AsyncSession(engine) as db:
+            for name, query in queries(surnames).items():
+                params = {"query": query, "limit": args.limit, "service_status": ServiceStatus.ACTIVE.name}
+                fts_ms, fts_scans = await explain(db, fts_sql, params)
+                trigram_ms, trigram_scans = await explain(db, trigram_sql, params)
+                failures += [f"{name}: {p}" for p in check_indexes("fts", fts_scans)]
+                failures += [f"{name}: {p}" for p in check_indexes("trgm", trigram_scans)]
+
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    items, fuzzy = await search(db, query, limit=args.limit)
+                    timings.append((time.perf_counter() - started) * 1000)
+                p50 = statistics.median(timings)
+                p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+                print(f"{name:<16} {fts_ms:>7.2f} {trigram_ms:>8.2f} {p50:>7.2f} {p95:>7.2f} "
+                      f"{len(items):>8}  {'да' if fuzzy else 'нет'}")
+                if p95 > args.budget_ms:
+                    failures.append(f"{name}: p95 {p95:.1f} ms > бюджета {args.budget_ms} ms")
+    finally:
+        await engine.dispose()
+
+    if failures:
+        print("\nОШИБКИ:")
+        for line in failures:
+            print("  " + line)
+        return 1
+    print("\nиндексы используются, в пределах бюджета")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", default=os.environ.get("TEST_DATABASE_URL"),
+                        help="База PostgreSQL; таблицы будут пересозданы")
+    parser.add_argument("--rows", type=int, default=100_000, help="Строк в таблицах поиска")
+    parser.add_argument("--repeat", type=int, default=20, help="Повторов каждого запроса")
+    parser.add_argument("--limit", type=int, default=20, help="Результатов на запрос")
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="Бюджет p95 запроса")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("нужен --database-url или TEST_DATABASE_URL")
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Время холодного старта приложения и бюджет импорта.
+
+Каждый замер — отдельный процесс Python (холодный импорт), в нем по фазам:
+
+* ``import`` — ``import src.main``; импорт не должен ничего настраивать:
+  конфигурация не создана, модули базы данных и роутеры не загружены;
+* ``create_app`` — конфигурация, сервисы, роутеры (импорт моделей и схем);
+* ``lifespan`` — движки базы данных и прогрев (конфигурация мапперов);
+* ``first_request`` — первый ``GET /api/health`` через ASGI.
+
+Берется лучший из ``--repeat`` замеров. Если импорт или старт
+(``create_app`` + ``lifespan``) дольше бюджета, либо импорт выполнил
+настройку, команда завершается с кодом 1. С ``--top`` печатаются самые
+медленные модули по ``python -X importtime``.
+
+Запуск из корня репозитория::
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --import-budget-ms 800 --startup-budget-ms 2500 --top 15
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Модули, которые не должны загружаться при импорте src.main
+HEAVY_MODULES = ("src.core.database", "src.models", "src.api.router", "src.views.main", "sqlalchemy.orm")
+
+
+def child(env: str) -> dict:
+    """Замер фаз в текущем (свежем) процессе."""
+    import asyncio
+
+    phases = {}
+    start = time.perf_counter()
+    import src.main
+    phases["import"] = time.perf_counter() - start
+
+    import src.core.config
+    side_effects = [name for name in HEAVY_MODULES if name in sys.modules]
+    if src.core.config.config is not None:
+        side_effects.append("config")
+    if "app" in vars(src.main):
+        side_effects.append("app")
+
+    start = time.perf_counter()
+    app = src.main.create_app(src.core.config.get_config(env))
+    phases["create_app"] = time.perf_counter() - start
+
+    async def serve() -> None:
+        import httpx
+
+        start = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            phases["lifespan"] = time.perf_counter() - start
+            start = time.perf_counter()
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+                (await client.get("/api/health")).raise_for_status()
+            phases["first_request"] = time.perf_counter() - start
+
+    asyncio.run(serve())
+    return {"phases_ms": {name: round(value * 1000, 1) for name, value in phases.items()},
+            "side_effects": side_effects}
+
+
+def measure(env: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child", "--env", env],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(top: int) -> list[tuple[float, float, str]]:
+    """Модули с наибольшим собственным временем импорта при создании приложения (мс)."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main; src.main.create_app()"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((int(own) / 1000, int(cumulative) / 1000, name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--env", default="testing", help="Окружение конфигурации")
+    parser.add_argument("--repeat", type=int, default=5, help="Процессов, берется лучший замер")
+    parser.add_argument("--import-budget-ms", type=float, default=1000.0)
+    parser.add_argument("--startup-budget-ms", type=float, default=3000.0, help="create_app + lifespan")
+    parser.add_argument("--top", type=int, default=0, help="Показать самые медленные модули")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.env)))
+        return 0
+
+    runs = [measure(args.env) for _ in range(args.repeat)]
+    best = {name: min(run["phases_ms"][name] for run in runs) for name in runs[0]["phases_ms"]}
+    for name, value in best.items():
+        print(f"{name:<14} {value:>9.1f} ms")
+
+    failures = []
+    side_effects = sorted({effect for run in runs for effect in run["side_effects"]})
+    if side_effects:
+        failures.append(f"импорт src.main выполнил настройку или загрузил: {', '.join(side_effects)}")
+    if best["import"] > args.import_budget_ms:
+        failures.append(f"импорт {best['import']:.0f} ms > бюджета {args.import_budget_ms:.0f} ms")
+    startup = best["create_app"] + best["lifespan"]
+    if startup > args.startup_budget_ms:
+        failures.append(f"старт {startup:.0f} ms > бюджета {args.startup_budget_ms:.0f} ms")
+
+    if args.top:
+        print(f"\n{'self, ms':>9} {'cumul., ms':>11}  модуль")
+        for own, cumulative, name in slowest_imports(args.top):
+            print(f"{own:>9.1f} {cumulative:>11.1f}  {name.strip()}")
+
+    if failures:
+        print("\nБЮДЖЕТ ПРЕВЫШЕН:")
+        for line in failures:
+            print("  " + line)
+        return 1
+    print("\nв пределах бюджета")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+
+from src.api.v1.endpoints import auth, clinics, documents, exports, imports, posts, promotions, search, services, specialists, uploads, videos
+
+api_router = APIRouter(prefix="/api/v1")
+
+api_router.include_router(auth.router, prefix="/auth", tags=["Auth"])
+api_router.include_router(clinics.router, prefix="/clinics", tags=["Clinics"])
+api_router.include_router(services.router, prefix="/services", tags=["Services"])
+api_router.include_router(specialists.router, prefix="/specialists", tags=["Specialists"])
+api_router.include_router(posts.router, prefix="/news", tags=["News"])
+api_router.include_router(promotions.router, prefix="/promotions", tags=["Promotions"])
+api_router.include_router(search.router, prefix="/search", tags=["Search"])
+api_router.include_router(videos.router, prefix="/videos", tags=["Videos"])
+api_router.include_router(uploads.router, prefix="/uploads", tags=["Uploads"])
+api_router.include_router(documents.router, prefix="/documents", tags=["Documents"])
+api_router.include_router(imports.router, prefix="/imports", tags=["Imports"])
+api_router.include_router(exports.router, prefix="/exports", tags=["Exports"])
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import get_settings
+from src.core.database import get_db
+from src.core.dependencies import get_current_principal
+from src.schemas.user import (
+    CurrentUser, PasswordChange, PasswordResetConfirm, PasswordResetRequest, Token, UserLogin,
+)
+from src.services import auth_service
+from src.services.auth_service import Principal
+
+router = APIRouter()
+
+
+@router.post("/login", response_model=Token)
+async def login(payload: UserLogin, db: AsyncSession = Depends(get_db)):
+    """Вход по email и паролю."""
+    result = await auth_service.authenticate(db, payload.email, payload.password)
+    if result is None:
+        raise HTTPException(status_code=401, detail="Неверный email или пароль")
+    return Token(access_token=result.access_token, user_type=result.user_type)
+
+
+@router.get("/me", response_model=CurrentUser)
+async def read_current_user(principal: Principal = Depends(get_current_principal)):
+    """Текущий пользователь: роль и клиника."""
+    return principal
+
+
+@router.post("/password", status_code=204)
+async def change_password(
+    payload: PasswordChange,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
+):
+    """Смена пароля текущего пользователя (заблокированный или неактивный получает 401)."""
+    changed = await auth_service.change_password(
+        db, principal.user_type, principal.id, payload.current_password, payload.new_password
+    )
+    if not changed:
+        raise HTTPException(status_code=400, detail="Неверный текущий пароль")
+
+
+@router.post("/password-reset", status_code=202)
+async def request_password_reset(payload: PasswordResetRequest, db: AsyncSession = Depends(get_db)):
+    """Ссылка для восстановления пароля на email; ответ не зависит от того, зарегистрирован ли адрес."""
+    await auth_service.request_password_reset(db, payload.email, get_settings().PASSWORD_RESET_URL)
+    return {"detail": "Если адрес зарегистрирован, на него отправлена ссылка для восстановления пароля"}
+
+
+@router.post("/password-reset/confirm", status_code=204)
+async def confirm_password_reset(payload: PasswordResetConfirm, db: AsyncSession = Depends(get_db)):
+    """Новый пароль по токену из письма."""
+    if not await auth_service.reset_password(db, payload.token, payload.new_password):
+        raise HTTPException(status_code=400, detail="Ссылка недействительна или устарела")
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.database import get_db
+from src.core.query_budget import query_budget
+from src.core.responses import FastJSONResponse, list_response
+from src.schemas.clinic import ClinicNearby
+from src.services import geo_service
+
+router = APIRouter()
+
+
+@router.get(
+    "/nearest",
+    response_model=list[ClinicNearby],
+    response_class=FastJSONResponse,
+    dependencies=[query_budget(max_queries=6)],  # из индекса — 0-1 запрос, холодный путь — до 6
+)
+async def nearest_clinics(
+    lat: float = Query(..., ge=-90, le=90, description="Широта точки поиска"),
+    lon: float = Query(..., ge=-180, le=180, description="Долгота точки поиска"),
+    k: int = Query(5, ge=1, le=geo_service.MAX_NEAREST, description="Сколько клиник вернуть"),
+    open_now: bool = Query(False, description="Только открытые сейчас"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Ближайшие активные клиники к точке, от ближних."""
+    clinics = await geo_service.find_nearest(db, lat, lon, k, open_now=open_now)
+    return list_response(ClinicNearby, clinics)
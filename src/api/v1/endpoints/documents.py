@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from src.api.v1.endpoints.uploads import uploader
+from src.core.dependencies import require_clinic_access
+from src.services.auth_service import Principal
+from src.storage.temp import NETWORK_DIR, temp_storage
+
+router = APIRouter()
+
+
+@router.get("/{folder}/{filename}", response_class=FileResponse)
+async def get_document(folder: str, filename: str, principal: Principal = Depends(uploader)):
+    """
+    Закрытый документ (результаты анализов и т. п.).
+
+    Персонал получает документы своей клиники, документы сети (``network``) —
+    только администратор.
+    """
+    path = temp_storage.private_path("documents", folder, filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Документ не найден")
+    # Права проверяются до обращения к диску: наличие чужих документов не раскрывается
+    if folder == NETWORK_DIR:
+        if not principal.is_admin:
+            raise HTTPException(status_code=403, detail="Недостаточно прав")
+    else:
+        require_clinic_access(int(folder), principal)
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Документ не найден")
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        headers={"Cache-Control": "private, no-store", "X-Content-Type-Options": "nosniff"},
+    )
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+
+from src.core.dependencies import require_clinic_access, require_roles
+from src.models.user import UserRole
+from src.schemas.export import ExportFormat, ExportKind
+from src.services import export_service
+from src.services.auth_service import Principal
+
+router = APIRouter()
+
+
+@router.get("/{kind}")
+async def export_table(
+    kind: ExportKind,
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="Формат выгрузки"),
+    gzip: bool = Query(False, description="Сжать файл gzip"),
+    clinic_id: Optional[int] = Query(None, description="Только записи клиники"),
+    principal: Principal = Depends(require_roles(UserRole.CLINIC_MANAGER)),
+):
+    """
+    Потоковая выгрузка таблицы в NDJSON или CSV.
+
+    Клиенты выгружаются только администратором; менеджер клиники получает
+    записи своей клиники.
+    """
+    if not principal.is_admin:
+        if kind == ExportKind.CLIENTS:
+            raise HTTPException(status_code=403, detail="Недостаточно прав")
+        clinic_id = principal.clinic_id if clinic_id is None else clinic_id
+        require_clinic_access(clinic_id, principal)
+
+    filename = export_service.export_filename(kind, format, gzip)
+    media_type = "application/gzip" if gzip else export_service.MEDIA_TYPES[format]
+    return StreamingResponse(
+        export_service.stream_export(kind, format, clinic_id=clinic_id, gzip=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from src.core.config import get_settings
+from src.core.database import get_db
+from src.core.dependencies import require_roles
+from src.models.user import UserRole
+from src.schemas.catalog_import import ImportFormat, ImportKind, ImportReport
+from src.services import import_service
+from src.services.auth_service import Principal
+from src.services.import_service import ImportFileError
+
+router = APIRouter()
+
+_CONTENT_TYPES = {
+    "text/csv": ImportFormat.CSV,
+    "application/x-ndjson": ImportFormat.NDJSON,
+    "application/jsonl": ImportFormat.NDJSON,
+}
+
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    """Тело запроса с ограничением размера; 413, если файл больше limit."""
+    if int(request.headers.get("content-length") or 0) > limit:
+        raise HTTPException(status_code=413, detail="Файл слишком большой")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise HTTPException(status_code=413, detail="Файл слишком большой")
+    return bytes(body)
+
+
+@router.post("/{kind}", response_model=ImportReport)
+async def import_catalog(
+    kind: ImportKind,
+    request: Request,
+    format: Optional[ImportFormat] = Query(None, description="Формат файла; по умолчанию по Content-Type"),
+    clinic_id: Optional[int] = Query(None, description="Клиника для строк без clinic_id"),
+    principal: Principal = Depends(require_roles(UserRole.CLINIC_MANAGER)),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Массовый импорт услуг или специалистов из CSV/NDJSON (тело запроса — файл).
+
+    Валидные строки загружаются, строки с ошибками перечисляются в отчете.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = format or _CONTENT_TYPES.get(content_type)
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Ожидается text/csv или application/x-ndjson")
+    data = await _read_body(request, get_settings().IMPORT_MAX_SIZE)
+    try:
+        return await import_service.import_catalog(
+            db, kind, data, fmt, clinic_id=clinic_id, allowed_clinic=principal.can_access_clinic
+        )
+    except ImportFileError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
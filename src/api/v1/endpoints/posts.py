@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import HTMLResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from src.core.database import get_db
+from src.core.dependencies import require_roles
+from src.core.query_budget import query_budget
+from src.core.responses import FastJSONResponse, page_response
+from src.crud.base import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError
+from src.models.news import News as NewsModel
+from src.models.user import UserRole
+from src.schemas.news import News, NewsCreate, NewsPreview, NewsUpdate
+from src.schemas.pagination import Page
+from src.services import post_service
+from src.services.auth_service import Principal
+from src.services.post_service import RenderFormat
+
+router = APIRouter()
+
+
+async def _editable_news(db: AsyncSession, news_id: int, principal: Principal) -> NewsModel:
+    news = await post_service.get_news(db, news_id)
+    if news is None:
+        raise HTTPException(status_code=404, detail="Новость не найдена")
+    if not post_service.can_edit(news, principal):
+        raise HTTPException(status_code=403, detail="Нет доступа к новости")
+    return news
+
+
+@router.get(
+    "/",
+    response_model=Page[NewsPreview],
+    response_class=FastJSONResponse,
+    dependencies=[query_budget(max_queries=1)],
+)
+async def list_news(
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    """Лента опубликованных новостей, от свежих."""
+    try:
+        page = await post_service.list_published(db, cursor=cursor, limit=limit)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return page_response(NewsPreview, page.items, page.next_cursor)
+
+
+@router.get("/{news_id}", response_class=Response)
+async def get_news(news_id: int, db: AsyncSession = Depends(get_db)):
+    """Опубликованная статья в JSON (готовый рендер, без повторной сериализации)."""
+    body = await post_service.get_rendered(db, news_id, RenderFormat.JSON)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Новость не найдена")
+    return Response(body, media_type="application/json")
+
+
+@router.get("/{news_id}/html", response_class=HTMLResponse)
+async def get_news_html(news_id: int, db: AsyncSession = Depends(get_db)):
+    """Опубликованная статья в виде готового HTML-фрагмента."""
+    body = await post_service.get_rendered(db, news_id, RenderFormat.HTML)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Новость не найдена")
+    return HTMLResponse(body)
+
+
+@router.post("/", response_model=News, status_code=201)
+async def create_news(
+    data: NewsCreate,
+    principal: Principal = Depends(require_roles(UserRole.CLINIC_MANAGER)),
+    db: AsyncSession = Depends(get_db),
+):
+    """Создает новость; опубликованная статья рендерится сразу."""
+    return await post_service.create_news(db, data, author_id=principal.id)
+
+
+@router.patch("/{news_id}", response_model=News)
+async def update_news(
+    news_id: int,
+    data: NewsUpdate,
+    principal: Principal = Depends(require_roles(UserRole.CLINIC_MANAGER)),
+    db: AsyncSession = Depends(get_db),
+):
+    """Изменяет новость и перерисовывает статью (автор, менеджер клиники автора)."""
+    news = await _editable_news(db, news_id, principal)
+    return await post_service.update_news(db, news, data)
+
+
+@router.delete("/{news_id}", status_code=204)
+async def delete_news(
+    news_id: int,
+    principal: Principal = Depends(require_roles(UserRole.CLINIC_MANAGER)),
+    db: AsyncSession = Depends(get_db),
+):
+    """Удаляет новость (автор, менеджер клиники автора)."""
+    await _editable_news(db, news_id, principal)
+    if not await post_service.delete_news(db, news_id):
+        raise HTTPException(status_code=404, detail="Новость не найдена")
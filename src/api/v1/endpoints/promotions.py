@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from src.core.database import get_db
+from src.core.query_budget import query_budget
+from src.core.responses import FastJSONResponse, page_response
+from src.crud.base import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError
+from src.schemas.pagination import Page
+from src.schemas.promotion import PromotionWithClinic
+from src.services import promotion_service
+
+router = APIRouter()
+
+
+@router.get(
+    "/",
+    response_model=Page[PromotionWithClinic],
+    response_class=FastJSONResponse,
+    dependencies=[query_budget(max_queries=1)],  # акции и клиники одним JOIN
+)
+async def list_promotions(
+    clinic_id: Optional[int] = Query(None, description="Акции клиники (включая общие акции сети)"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    """Действующие акции с клиникой."""
+    try:
+        page = await promotion_service.list_active_page(db, clinic_id=clinic_id, cursor=cursor, limit=limit)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return page_response(PromotionWithClinic, page.items, page.next_cursor)
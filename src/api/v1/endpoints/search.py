@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from src.core.database import get_db
+from src.schemas.search import SearchEntity, SearchResponse
+from src.services import search_service
+
+router = APIRouter()
+
+
+@router.get("/", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=2, max_length=search_service.MAX_QUERY_LENGTH, description="Поисковый запрос"),
+    types: Optional[List[SearchEntity]] = Query(None, description="Типы объектов (по умолчанию все)"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """Поиск по услугам, специалистам и новостям с ранжированием."""
+    items, fuzzy = await search_service.search(db, q, entities=types or tuple(SearchEntity), limit=limit)
+    return SearchResponse(query=q, fuzzy=fuzzy, items=items)
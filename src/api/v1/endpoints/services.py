@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import List, Optional
+
+from src.core.database import get_db
+from src.core.dependencies import get_loaders
+from src.core.responses import FastJSONResponse, page_response
+from src.crud import service as crud_service
+from src.crud.base import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError
+from src.crud.loaders import RelationshipLoaders
+from src.models.service import Service as ServiceModel, ServiceStatus
+from src.schemas.appointment import AvailableSlot, SpecialistAvailability
+from src.schemas.pagination import Page
+from src.schemas.promotion import Promotion
+from src.schemas.service import Service
+from src.services import availability_service, catalog_service, promotion_service
+from src.services.availability_service import DEFAULT_SLOT_STEP, AvailabilityError
+
+router = APIRouter()
+
+
+@router.get("/", response_model=Page[Service], response_class=FastJSONResponse)
+async def list_services(
+    clinic_id: Optional[int] = Query(None, description="Только услуги клиники"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    loaders: RelationshipLoaders = Depends(get_loaders),
+):
+    """Список услуг в порядке order_index."""
+    try:
+        if clinic_id is not None:
+            page = await catalog_service.list_clinic_services(db, clinic_id, cursor=cursor, limit=limit)
+        else:
+            page = await crud_service.get_page(
+                db,
+                cursor=cursor,
+                limit=limit,
+                filters=(ServiceModel.status == ServiceStatus.ACTIVE,),
+                with_relations=False,
+            )
+            await loaders.attach_specialists(page.items)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    items = await promotion_service.with_prices(db, page.items)
+    return page_response(Service, items, page.next_cursor)
+
+
+@router.get("/{service_id}", response_model=Service)
+async def get_service(service_id: int, db: AsyncSession = Depends(get_db)):
+    """Услуга со специалистами и ценой по акциям."""
+    service = await catalog_service.get_service(db, service_id)
+    if service is None:
+        raise HTTPException(status_code=404, detail="Услуга не найдена")
+    return (await promotion_service.with_prices(db, [service]))[0]
+
+
+@router.get("/{service_id}/promotions", response_model=List[Promotion])
+async def get_service_promotions(service_id: int, db: AsyncSession = Depends(get_db)):
+    """Акции, действующие для услуги сейчас."""
+    service = await catalog_service.get_service(db, service_id)
+    if service is None:
+        raise HTTPException(status_code=404, detail="Услуга не найдена")
+    return await promotion_service.applicable_promotions(db, service_id, service.clinic_id)
+
+
+@router.get("/{service_id}/availability", response_model=List[SpecialistAvailability])
+async def get_service_availability(
+    service_id: int,
+    date_from: date = Query(..., description="Первый день периода"),
+    date_to: date = Query(..., description="Последний день периода (включительно)"),
+    specialist_id: Optional[List[int]] = Query(None, description="Только выбранные специалисты"),
+    step: int = Query(DEFAULT_SLOT_STEP, ge=5, le=120, description="Шаг сетки слотов, минуты"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Свободные слоты услуги по специалистам за период."""
+    try:
+        slots = await availability_service.find_slots(
+            db, service_id, date_from, date_to, specialist_ids=specialist_id, step=step
+        )
+    except AvailabilityError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if slots is None:
+        raise HTTPException(status_code=404, detail="Услуга не найдена")
+    return [
+        SpecialistAvailability(specialist_id=sid, slots=[AvailableSlot.model_validate(s) for s in items])
+        for sid, items in slots.items()
+    ]
+
+
+@router.get("/{service_id}/next-slot", response_model=Optional[AvailableSlot])
+async def get_next_slot(
+    service_id: int,
+    days: int = Query(7, ge=1, le=31, description="Горизонт поиска, дни"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Ближайший свободный слот услуги у любого специалиста; null, если свободного времени нет."""
+    if await availability_service.service_duration(db, service_id) is None:
+        raise HTTPException(status_code=404, detail="Услуга не найдена")
+    return await availability_service.next_available_slot(db, service_id, days=days)
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from src.core.database import get_db
+from src.core.dependencies import get_loaders
+from src.core.query_budget import query_budget
+from src.core.responses import FastJSONResponse, page_response
+from src.crud import specialist as crud_specialist
+from src.crud.base import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError
+from src.crud.loaders import RelationshipLoaders
+from src.models.specialist import Specialist as SpecialistModel
+from src.schemas.pagination import Page
+from src.schemas.specialist import Specialist
+
+router = APIRouter()
+
+
+@router.get(
+    "/",
+    response_model=Page[Specialist],
+    response_class=FastJSONResponse,
+    dependencies=[query_budget(max_queries=2)],  # страница и услуги всех специалистов
+)
+async def list_specialists(
+    clinic_id: Optional[int] = Query(None, description="Только специалисты клиники"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    loaders: RelationshipLoaders = Depends(get_loaders),
+):
+    """Список специалистов с услугами: один запрос на страницу и один на все услуги."""
+    filters = (SpecialistModel.clinic_id == clinic_id,) if clinic_id is not None else ()
+    try:
+        page = await crud_specialist.get_page(db, cursor=cursor, limit=limit, filters=filters)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    await loaders.attach_services(page.items)
+    return page_response(Specialist, page.items, page.next_cursor)
+
+
+@router.get("/{specialist_id}", response_model=Specialist)
+async def get_specialist(
+    specialist_id: int,
+    db: AsyncSession = Depends(get_db),
+    loaders: RelationshipLoaders = Depends(get_loaders),
+):
+    """Специалист с услугами."""
+    specialist = await crud_specialist.get(db, specialist_id)
+    if specialist is None:
+        raise HTTPException(status_code=404, detail="Специалист не найден")
+    await loaders.attach_services([specialist])
+    return specialist
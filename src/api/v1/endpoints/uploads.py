@@ -0,0 +1,123 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Request
+from starlette.requests import ClientDisconnect
+from typing import Optional
+
+from src.core.dependencies import require_roles
+from src.models.user import UserRole
+from src.schemas.upload import ChunkAccepted, UploadComplete, UploadInit, UploadKind, UploadResult, UploadStatus
+from src.services.auth_service import Principal
+from src.storage.images import image_storage
+from src.storage.temp import (
+    DEFAULT_CHUNK_SIZE,
+    UploadError,
+    UploadIncomplete,
+    UploadNotFound,
+    UploadQuotaExceeded,
+    UploadSession,
+    temp_storage,
+)
+
+router = APIRouter()
+
+# Загружает файлы только персонал; администратор — тоже (см. require_roles)
+uploader = require_roles(UserRole.CLINIC_MANAGER, UserRole.DOCTOR, UserRole.RECEPTIONIST)
+
+
+def _owner(principal: Principal) -> str:
+    return f"{principal.user_type}:{principal.id}"
+
+
+async def _session(upload_id: str, principal: Principal) -> UploadSession:
+    """Сессия пользователя; администратор видит любые сессии."""
+    return await temp_storage.get_session(upload_id, None if principal.is_admin else _owner(principal))
+
+
+async def _status(session: UploadSession) -> UploadStatus:
+    return UploadStatus(
+        id=session.id,
+        kind=session.kind,
+        filename=session.filename,
+        size=session.size,
+        chunk_size=session.chunk_size,
+        total_chunks=session.total_chunks,
+        received=await temp_storage.received_chunks(session.id),
+    )
+
+
+def _http_error(exc: UploadError) -> HTTPException:
+    if isinstance(exc, UploadNotFound):
+        return HTTPException(status_code=404, detail="Сессия загрузки не найдена")
+    if isinstance(exc, UploadIncomplete):
+        return HTTPException(status_code=409, detail=str(exc))
+    if isinstance(exc, UploadQuotaExceeded):
+        return HTTPException(status_code=429, detail=str(exc))
+    return HTTPException(status_code=400, detail=str(exc))
+
+
+@router.post("/", response_model=UploadStatus, status_code=201)
+async def init_upload(payload: UploadInit, principal: Principal = Depends(uploader)):
+    """Создает сессию поблочной загрузки."""
+    try:
+        session = await temp_storage.init(
+            payload.filename,
+            payload.size,
+            payload.kind.value,
+            payload.chunk_size or DEFAULT_CHUNK_SIZE,
+            owner=_owner(principal),
+            clinic_id=principal.clinic_id,
+        )
+        return await _status(session)
+    except UploadError as exc:
+        raise _http_error(exc)
+
+
+@router.get("/{upload_id}", response_model=UploadStatus)
+async def get_upload(upload_id: str, principal: Principal = Depends(uploader)):
+    """Состояние загрузки: по списку принятых блоков клиент продолжает после обрыва."""
+    try:
+        return await _status(await _session(upload_id, principal))
+    except UploadError as exc:
+        raise _http_error(exc)
+
+
+@router.put("/{upload_id}/chunks/{index}", response_model=ChunkAccepted)
+async def put_chunk(
+    request: Request,
+    upload_id: str,
+    index: int = Path(..., ge=0),
+    x_chunk_sha256: Optional[str] = Header(None, description="sha256 блока для проверки"),
+    principal: Principal = Depends(uploader),
+):
+    """Принимает блок как сырое тело запроса (без multipart) и пишет его на диск потоком."""
+    try:
+        await _session(upload_id, principal)
+        checksum = await temp_storage.write_chunk(upload_id, index, request.stream(), x_chunk_sha256)
+    except UploadError as exc:
+        raise _http_error(exc)
+    except ClientDisconnect:
+        # Маркер блока снят: клиент повторит блок после переподключения
+        raise HTTPException(status_code=400, detail=f"Соединение прервано при передаче блока {index}")
+    return ChunkAccepted(index=index, sha256=checksum)
+
+
+@router.post("/{upload_id}/complete", response_model=UploadResult)
+async def complete_upload(upload_id: str, payload: UploadComplete, principal: Principal = Depends(uploader)):
+    """Собирает файл и переносит его в хранилище (документы — в закрытое)."""
+    try:
+        session = await _session(upload_id, principal)
+        url = await temp_storage.finalize(upload_id, payload.sha256)
+    except UploadError as exc:
+        raise _http_error(exc)
+    if session.kind == UploadKind.IMAGES.value:
+        image_storage.schedule(url)
+    return UploadResult(url=url)
+
+
+@router.delete("/{upload_id}", status_code=204)
+async def abort_upload(upload_id: str, principal: Principal = Depends(uploader)):
+    """Отменяет загрузку и удаляет принятые блоки."""
+    try:
+        await _session(upload_id, principal)
+        await temp_storage.abort(upload_id)
+    except UploadError as exc:
+        raise _http_error(exc)
@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Request
+
+from src.storage.videos import video_storage
+
+router = APIRouter()
+
+
+@router.api_route("/{name:path}", methods=["GET", "HEAD"])
+async def stream_video(name: str, request: Request):
+    """Видео с поддержкой Range: плеер запрашивает файл частями и перематывает без полной загрузки."""
+    return video_storage.stream(request, name)
@@ -0,0 +1,379 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional, Protocol, TypeVar
+
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import ORMExecuteState, Session
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Маркер промаха: None — допустимое закэшированное значение ("объект не найден")
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Локальный LRU-кэш с ограничением времени жизни записей.
+
+    Работает внутри одного процесса и не требует блокировок: все обращения
+    идут из потока event loop. Кроме значений хранит теги записей, чтобы
+    инвалидировать группы ключей (например, все записи одной клиники).
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any, frozenset[str]]] = OrderedDict()
+        self._tags: dict[str, set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any:
+        """Возвращает значение или ``MISSING``, если записи нет или она устарела."""
+        entry = self._data.get(key)
+        if entry is None:
+            return MISSING
+        expires_at, value, _ = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, *, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        """Сохраняет значение; при переполнении вытесняет давно не использованные записи."""
+        if key in self._data:
+            self._remove(key)
+        tags = frozenset(tags)
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._data) > self.maxsize:
+            self._remove(next(iter(self._data)))
+
+    def delete(self, key: Hashable) -> None:
+        self._remove(key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Удаляет все записи с любым из тегов. Возвращает число удаленных записей."""
+        removed = 0
+        for tag in tags:
+            for key in self._tags.pop(tag, ()):
+                if key in self._data:
+                    self._remove(key)
+                    removed += 1
+        return removed
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._tags.clear()
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class CacheBackend(Protocol):
+    """
+    Интерфейс общего (межпроцессного) уровня кэша.
+
+    Реализация отвечает за сериализацию значений и хранение связи
+    "тег -> ключи" (например, множества в Redis).
+    """
+
+    async def get(self, key: str) -> Any:
+        """Возвращает значение или ``MISSING``."""
+        ...
+
+    async def set(self, key: str, value: Any, *, ttl: float, tags: Iterable[str] = ()) -> None:
+        ...
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        ...
+
+    async def clear(self) -> None:
+        ...
+
+
+class InMemoryBackend:
+    """
+    Локальная замена общего уровня кэша.
+
+    Используется в разработке и тестах вместо Redis/Memcached: реализует
+    тот же протокол, но живет в памяти текущего процесса.
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self._cache = TTLCache(maxsize=maxsize)
+
+    async def get(self, key: str) -> Any:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Any, *, ttl: float, tags: Iterable[str] = ()) -> None:
+        self._cache.set(key, value, ttl=ttl, tags=tags)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> None:
+        self._cache.invalidate_tags(tags)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+
+class CatalogCache:
+    """
+    Двухуровневый read-through кэш каталога.
+
+    Порядок чтения: локальный LRU/TTL -> общий уровень (если настроен) -> загрузчик.
+    Одновременные промахи по одному ключу объединяются (single-flight):
+    загрузчик выполняется один раз, остальные запросы ждут его результат,
+    поэтому холодный кэш не выбирает весь пул соединений с БД.
+    """
+
+    def __init__(
+        self,
+        local: Optional[TTLCache] = None,
+        shared: Optional[CacheBackend] = None,
+        shared_ttl: float = 300.0,
+    ):
+        self.local = local or TTLCache()
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self._inflight: dict[str, asyncio.Future] = {}
+        # Теги незавершенных загрузок; None — теги станут известны после загрузки
+        self._inflight_tags: dict[str, Optional[frozenset[str]]] = {}
+        # Номер последней инвалидации и инвалидации, случившиеся во время загрузок
+        self._version = 0
+        self._recent: list[tuple[int, frozenset[str]]] = []
+        self._loads: dict[int, int] = {}  # версия на начало загрузки → число загрузок
+        self._shared_invalidations: set[asyncio.Task] = set()
+        self._listeners: list[Callable[[frozenset[str]], None]] = []
+        self.hits = 0
+        self.misses = 0
+
+    def add_invalidation_listener(self, listener: Callable[[frozenset[str]], None]) -> None:
+        """Подписывает производный кэш (например, фрагментов страниц) на инвалидацию тегов."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[T]],
+        *,
+        tags: Iterable[str] | Callable[[T], Iterable[str]] = (),
+    ) -> T:
+        """
+        Возвращает значение из кэша или загружает его через ``loader``.
+
+        ``tags`` можно передать функцией от загруженного значения, если теги
+        зависят от данных (например, от id вложенных объектов).
+        """
+        value = self.local.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+
+        while (inflight := self._inflight.get(key)) is not None:
+            try:
+                value = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Отменили запрос-владелец загрузки, а не текущий — загружаем сами
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                continue
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self._inflight_tags[key] = None if callable(tags) else frozenset(tags)
+        started = self._begin_load()
+        try:
+            value = MISSING
+            if self.shared is not None:
+                # Общий уровень не должен вернуть запись, инвалидация которой еще в пути
+                if self._shared_invalidations:
+                    await asyncio.gather(*self._shared_invalidations, return_exceptions=True)
+                value = await self.shared.get(key)
+            if value is MISSING:
+                value = await loader()
+                tags = frozenset(tags(value) if callable(tags) else tags)
+                # Запись могла быть инвалидирована, пока шла загрузка: старые данные не кэшируем
+                if self.shared is not None and not self._invalidated_since(started, tags):
+                    await self.shared.set(key, value, ttl=self.shared_ttl, tags=tags)
+            else:
+                tags = frozenset(tags(value) if callable(tags) else tags)
+            if not self._invalidated_since(started, tags):
+                self.local.set(key, value, tags=tags)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Исключение получают ожидающие; гасим предупреждение, если их не было
+            future.exception()
+            raise
+        finally:
+            self._end_load(started)
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+                del self._inflight_tags[key]
+
+    def _begin_load(self) -> int:
+        self._loads[self._version] = self._loads.get(self._version, 0) + 1
+        return self._version
+
+    def _end_load(self, started: int) -> None:
+        if self._loads[started] == 1:
+            del self._loads[started]
+        else:
+            self._loads[started] -= 1
+        # Инвалидации старше самой ранней незавершенной загрузки больше не нужны
+        oldest = min(self._loads, default=self._version)
+        if self._recent and self._recent[0][0] <= oldest:
+            self._recent = [entry for entry in self._recent if entry[0] > oldest]
+
+    def _invalidated_since(self, version: int, tags: frozenset[str]) -> bool:
+        return any(v > version and not tags.isdisjoint(invalidated) for v, invalidated in self._recent)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        """
+        Инвалидирует записи по тегам.
+
+        Локальный уровень очищается сразу, общий — фоновой задачей,
+        поскольку вызов приходит из синхронных событий SQLAlchemy.
+        """
+        tags = frozenset(tags)
+        if not tags:
+            return
+        self.local.invalidate_tags(tags)
+        for listener in self._listeners:
+            listener(tags)
+        # Незавершенные загрузки могли прочитать старые данные: их результат не кэшируется,
+        # а новые запросы к затронутым ключам не ждут их, а загружают заново
+        self._version += 1
+        if self._loads:
+            self._recent.append((self._version, tags))
+        for key, key_tags in list(self._inflight_tags.items()):
+            if key_tags is None or not key_tags.isdisjoint(tags):
+                del self._inflight[key]
+                del self._inflight_tags[key]
+        if self.shared is not None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                logger.warning("Нет event loop для инвалидации общего кэша, теги: %s", sorted(tags))
+                return
+            task = loop.create_task(self.shared.invalidate_tags(tags))
+            self._shared_invalidations.add(task)
+            task.add_done_callback(self._shared_invalidations.discard)
+            task.add_done_callback(_log_task_error)
+
+    async def clear(self) -> None:
+        self.local.clear()
+        self._inflight.clear()
+        self._inflight_tags.clear()
+        if self.shared is not None:
+            await self.shared.clear()
+
+
+def _log_task_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Ошибка инвалидации общего кэша", exc_info=task.exception())
+
+
+def loaded_value(obj: Any, name: str) -> Any:
+    """
+    Значение атрибута объекта ORM, только если оно уже загружено.
+
+    В событиях flush ленивая загрузка невозможна (и в asyncio запрещена):
+    незагруженный атрибут дает None.
+    """
+    return sa_inspect(obj).dict.get(name)
+
+
+class SessionTagCollector:
+    """
+    Теги изменений, прошедших через сессии SQLAlchemy, с действием после коммита.
+
+    Теги копятся в ``session.info[info_key]``: ``flush_tags(session)`` — по
+    объектам сессии в ``after_flush``, ``bulk_tags(state)`` — по массовым
+    ORM-операциям (``update(Model)`` и т. п.) в ``do_orm_execute``. После
+    коммита накопленные теги передаются ``on_commit``, при откате
+    отбрасываются. Тег — любое хэшируемое значение.
+
+    Attributes:
+        info_key: Ключ ``session.info``; у каждого сборщика свой
+    """
+
+    def __init__(
+        self,
+        info_key: str,
+        on_commit: Callable[[set[Hashable]], None],
+        *,
+        flush_tags: Optional[Callable[[Session], Iterable[Hashable]]] = None,
+        bulk_tags: Optional[Callable[[ORMExecuteState], Iterable[Hashable]]] = None,
+    ):
+        self.info_key = info_key
+        self.on_commit = on_commit
+        self.flush_tags = flush_tags
+        self.bulk_tags = bulk_tags
+
+    def _pending(self, session: Session) -> set[Hashable]:
+        return session.info.setdefault(self.info_key, set())
+
+    def _after_flush(self, session: Session, flush_context: Any) -> None:
+        self._pending(session).update(self.flush_tags(session))
+
+    def _do_orm_execute(self, orm_execute_state: ORMExecuteState) -> None:
+        tags = self.bulk_tags(orm_execute_state)
+        if tags:
+            self._pending(orm_execute_state.session).update(tags)
+
+    def _after_commit(self, session: Session) -> None:
+        tags = session.info.pop(self.info_key, None)
+        if tags:
+            self.on_commit(tags)
+
+    def _after_rollback(self, session: Session, *args: Any) -> None:
+        session.info.pop(self.info_key, None)
+
+    def register(self) -> None:
+        """Подписывает сборщик на события всех сессий (идемпотентно)."""
+        listeners = [("after_commit", self._after_commit), ("after_rollback", self._after_rollback)]
+        if self.flush_tags is not None:
+            listeners.append(("after_flush", self._after_flush))
+        if self.bulk_tags is not None:
+            listeners.append(("do_orm_execute", self._do_orm_execute))
+        for name, fn in listeners:
+            if not event.contains(Session, name, fn):
+                event.listen(Session, name, fn)
+
+
+# Глобальный кэш каталога; параметры задаются через init_cache
+catalog_cache = CatalogCache()
+
+
+def init_cache(settings, shared: Optional[CacheBackend] = None) -> CatalogCache:
+    """Настраивает глобальный кэш каталога по конфигурации приложения."""
+    if shared is None and settings.CACHE_SHARED_ENABLED:
+        shared = InMemoryBackend()
+    catalog_cache.local = TTLCache(maxsize=settings.CACHE_LOCAL_MAXSIZE, ttl=settings.CACHE_LOCAL_TTL)
+    catalog_cache.shared = shared
+    catalog_cache.shared_ttl = settings.CACHE_SHARED_TTL
+    return catalog_cache
@@ -1,13 +1,9 @@
 import os
-import sys
 from typing import Optional
 from pydantic import PostgresDsn, field_validator, ValidationInfo
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
-# Загружаем переменные окружения
-load_dotenv()
-
 
 class Settings(BaseSettings):
     """Базовые настройки приложения."""
@@ -23,6 +19,18 @@ class Settings(BaseSettings):
     DB_USER: str = "user"
     DB_PASSWORD: str = "password"
     DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+
+    # Реплики для чтения (GET-запросы); пусто — все читается из основной базы
+    DB_REPLICA_URLS: str = ""  # через запятую, postgresql+asyncpg://...
+    DB_REPLICA_POOL_SIZE: int = 20
+    DB_REPLICA_MAX_OVERFLOW: int = 10
+    DB_REPLICA_POOL_TIMEOUT: int = 5  # короче основного: при перегрузке реплики лучше ошибка, чем очередь
+    DB_REPLICA_RETRY_INTERVAL: int = 30  # секунды без чтения с реплики после ошибки подключения
+    DB_READ_YOUR_WRITES_WINDOW: int = 5  # секунды чтения из основной базы после записи клиента
 
     # Генерируемый URL базы данных
     DATABASE_URL: Optional[PostgresDsn] = None
@@ -31,6 +39,71 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-here"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL: int = 300  # секунды; не дольше срока действия токена
+    PASSWORD_HASH_WORKERS: int = 4  # потоки и одновременные проверки паролей
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: int = 60  # секунды; ограничивает рассинхронизацию прав между процессами
+    PASSWORD_RESET_URL: str = "http://localhost:8000/reset-password"  # страница с формой, токен — в ?token=
+    PASSWORD_RESET_EXPIRE_MINUTES: int = 30
+
+    # Загруженные файлы
+    MEDIA_ROOT: str = "media"
+    MEDIA_URL: str = "/media/"
+    VIDEO_ROOT: str = "videos"  # не внутри MEDIA_ROOT: видео отдается только потоково, с лимитом потоков
+    VIDEO_URL: str = "/api/v1/videos/"
+    VIDEO_MAX_STREAMS_PER_CLIENT: int = 4
+    UPLOAD_TMP_DIR: str = "uploads_tmp"  # не внутри MEDIA_ROOT: незавершенные файлы не раздаются
+    UPLOAD_MAX_SIZE: int = 2 * 1024 ** 3
+    UPLOAD_TTL: int = 24 * 60 * 60  # секунды без активности до удаления сессии
+    UPLOAD_MAX_SESSIONS_PER_USER: int = 5  # незавершенных загрузок на пользователя
+    PRIVATE_MEDIA_ROOT: str = "private_media"  # документы: не внутри MEDIA_ROOT, отдаются с проверкой прав
+    PRIVATE_MEDIA_URL: str = "/api/v1/documents/"
+    IMPORT_MAX_SIZE: int = 50 * 1024 ** 2  # CSV/NDJSON импорта каталога
+
+    # Статика: каталог сборки с хэшированными и предсжатыми файлами
+    STATIC_BUILD_DIR: str = "static_build"
+    # Сборка со сжатием brotli долгая: в продакшене выполняется один раз при деплое
+    # (python -m src.storage.assets), при старте воркеров читается только манифест
+    STATIC_BUILD_ON_STARTUP: bool = False
+
+    # Метрики Prometheus (/metrics): время запросов, SQL и пулы соединений
+    METRICS_ENABLED: bool = True
+
+    # Учет запросов к базе на HTTP-запрос (Server-Timing, N+1, бюджеты endpoint'ов)
+    QUERY_TRACKING_ENABLED: bool = True
+    QUERY_REPEAT_THRESHOLD: int = 5  # одинаковых запросов за HTTP-запрос — предупреждение о N+1
+    QUERY_BUDGET_STRICT: bool = False  # превышение бюджета — ошибка, а не предупреждение
+
+    # Почта
+    EMAIL_ENABLED: bool = False  # без SMTP письма только логируются
+    EMAIL_FROM: str = "noreply@localhost"
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 25
+    SMTP_USERNAME: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    SMTP_USE_TLS: bool = False
+    SMTP_START_TLS: Optional[bool] = None  # None — STARTTLS, если сервер его поддерживает
+    EMAIL_WORKERS: int = 4  # воркеры очереди и SMTP-соединения
+    EMAIL_QUEUE_SIZE: int = 10000
+    EMAIL_QUEUE_RESERVE: int = 1000  # места очереди для подтверждений и сброса пароля; рассылки их не занимают
+    EMAIL_BATCH_SIZE: int = 50
+    EMAIL_REMINDER_INTERVAL: int = 900  # секунды между проходами напоминаний; 0 — выключены
+    EMAIL_REMINDER_DAYS_AHEAD: int = 1  # за сколько дней до приема напоминать
+
+    # Индекс действующих акций
+    PROMOTION_REFRESH_INTERVAL: int = 30  # секунды между проверками изменений
+    PROMOTION_FULL_RELOAD_INTERVAL: int = 600
+
+    # Индекс ближайших клиник
+    CLINIC_LOCATOR_ENABLED: bool = True  # False — поиск только запросами к БД
+    CLINIC_LOCATOR_REFRESH_INTERVAL: int = 60  # секунды между перестроениями без событий
+
+    # Кэш каталога
+    CACHE_LOCAL_MAXSIZE: int = 10000
+    CACHE_LOCAL_TTL: int = 30  # секунды; ограничивает рассинхронизацию между процессами
+    CACHE_SHARED_ENABLED: bool = False
+    CACHE_SHARED_TTL: int = 300
 
     class Config:
         env_file = ".env"
@@ -87,6 +160,7 @@ class DevelopmentConfig(Settings):
         kwargs.setdefault('ENV', 'development')
         kwargs.setdefault('DEBUG', True)
         kwargs.setdefault('DB_ECHO', True)
+        kwargs.setdefault('STATIC_BUILD_ON_STARTUP', True)
         super().__init__(**kwargs)
 
 
@@ -100,6 +174,7 @@ class TestingConfig(Settings):
         kwargs.setdefault('ENV', 'testing')
         kwargs.setdefault('DEBUG', False)
         kwargs.setdefault('DB_ECHO', False)
+        kwargs.setdefault('QUERY_BUDGET_STRICT', True)
         super().__init__(**kwargs)
 
 
@@ -117,14 +192,16 @@ class ProductionConfig(Settings):
 
 
 def get_config(env: Optional[str] = None) -> Settings:
-    """Возвращает конфигурацию в зависимости от окружения."""
+    """
+    Возвращает конфигурацию в зависимости от окружения.
+
+    Без ``env`` окружение берется из переменной ``ENV`` (в том числе из .env);
+    аргументы командной строки разбирает только ``python -m src.main``.
+    """
+    load_dotenv()
     if env is None:
-        # Сначала проверяем аргументы командной строки
-        if len(sys.argv) > 1:
-            env = sys.argv[1].lower()
-        # Затем переменные окружения
-        else:
-            env = os.getenv("ENV", "development").lower()
+        env = os.getenv("ENV", "development")
+    env = env.lower()
 
     config_map = {
         "dev": DevelopmentConfig,
@@ -139,11 +216,25 @@ def get_config(env: Optional[str] = None) -> Settings:
     return config_class()
 
 
-# Глобальный экземпляр конфигурации (будет создан при первом импорте)
-config = None
+# Глобальный экземпляр конфигурации; задается init_config (в create_app)
+config: Optional[Settings] = None
+
 
-def init_config(env: Optional[str] = None):
-    """Инициализирует конфигурацию (вызывается явно)."""
+def init_config(env: Optional[str] = None, settings: Optional[Settings] = None) -> Settings:
+    """
+    Инициализирует конфигурацию (вызывается явно).
+
+    Args:
+        env: Окружение, если конфигурация не передана
+        settings: Готовая конфигурация (тесты, бенчмарки)
+    """
     global config
-    config = get_config(env)
+    config = settings if settings is not None else get_config(env)
+    return config
+
+
+def get_settings() -> Settings:
+    """Текущая конфигурация; до ``init_config`` — ошибка."""
+    if config is None:
+        raise RuntimeError("Конфигурация не инициализирована: вызовите init_config")
     return config
\ No newline at end of file
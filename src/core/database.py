@@ -1,28 +1,285 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from .config import config
-
-engine = create_async_engine(
-    str(config.DATABASE_URL),
-    echo=config.DB_ECHO,
-    pool_size=20,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=1800,
-)
+"""
+Подключения к базе данных: основная база и реплики для чтения.
+
+Сессия ``get_db`` безопасного запроса (GET/HEAD) читает с реплики, если
+реплики настроены и доступны. Основная база используется всегда, когда:
+
+* сессия что-то записала (flush) — до конца сессии она закреплена
+  за основной базой, в том числе для чтения;
+* клиент недавно писал: после запроса с записью его GET-запросы
+  ``DB_READ_YOUR_WRITES_WINDOW`` секунд идут в основную базу, чтобы
+  он видел свои изменения несмотря на отставание реплики. Время записи
+  передается клиенту подписанной меткой в cookie ``db_write`` и заголовке
+  ``X-DB-Write`` (``ReadYourWritesMiddleware``), поэтому окно действует на
+  всех процессах; клиенты без cookie возвращают заголовок сами;
+* сессия закреплена явно через ``use_primary``;
+* все реплики недоступны: реплика с ошибкой подключения пропускается
+  ``DB_REPLICA_RETRY_INTERVAL`` секунд.
+
+Сессии ``AsyncSessionLocal`` вне запросов (экспорт, фоновые задачи)
+работают с основной базой. Движки создает ``init_database``: приложение —
+в lifespan, скрипты — сами после ``init_config``.
+"""
+import hashlib
+import hmac
+import itertools
+import logging
+import time
+from typing import Any, Callable, Optional, Sequence
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, ExceptionContext
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from .metrics import InstrumentedPool, instrument_engine
+from .query_budget import track_engine
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+# Метка последней записи клиента: "<время, мс>.<подпись>"
+WRITE_COOKIE = "db_write"
+WRITE_HEADER = "x-db-write"
+# Допустимое расхождение часов процессов, секунды
+_CLOCK_SKEW = 1.0
+
+# Ключи Session.info
+_REPLICA = "replica"  # Replica для чтения или None
+_WROTE = "wrote"  # сессия писала в основную базу
+
+
+class Replica:
+    """Движок реплики с отметкой о недоступности."""
+
+    def __init__(self, engine: AsyncEngine, retry_interval: float):
+        self.engine = engine
+        self.retry_interval = retry_interval
+        self._down_until = 0.0
+        event.listen(engine.sync_engine, "handle_error", self._on_error)
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def mark_down(self) -> None:
+        if self.healthy:
+            logger.warning("Реплика %s недоступна, чтение переведено на другие базы", self.engine.url.host)
+        self._down_until = time.monotonic() + self.retry_interval
+
+    def _on_error(self, context: ExceptionContext) -> None:
+        # Разрыв соединения; ошибки SQL реплику не выключают
+        if context.is_disconnect:
+            self.mark_down()
+
+
+class DatabaseRouter:
+    """
+    Основной движок, реплики и метки read-your-writes клиентов.
+
+    Движки создаются ``configure`` (через ``init_database`` в lifespan
+    приложения), а не при импорте модуля.
+    """
+
+    def __init__(self):
+        self.primary: Optional[AsyncEngine] = None
+        self.replicas: list[Replica] = []
+        self._next = None
+        self.read_your_writes_window = 5.0
+        self._secret = b""
+
+    def configure(self, primary: AsyncEngine, replicas: Sequence[Replica] = (), *,
+                  read_your_writes_window: float = 5.0, secret_key: str = "") -> None:
+        self.primary = primary
+        self.replicas = list(replicas)
+        self._next = itertools.cycle(self.replicas) if self.replicas else None
+        self.read_your_writes_window = read_your_writes_window
+        self._secret = secret_key.encode()
+
+    def replica(self) -> Optional[Replica]:
+        """Следующая доступная реплика по кругу или None (читать из основной базы)."""
+        for _ in range(len(self.replicas)):
+            replica = next(self._next)
+            if replica.healthy:
+                return replica
+        return None
+
+    def _sign(self, stamp: str) -> str:
+        return hmac.new(self._secret, stamp.encode(), hashlib.blake2b).hexdigest()[:32]
+
+    def write_token(self) -> str:
+        """Подписанная метка записи для клиента."""
+        stamp = str(int(time.time() * 1000))
+        return f"{stamp}.{self._sign(stamp)}"
+
+    def wrote_recently(self, token: Optional[str]) -> bool:
+        """Метка подлинна и запись была не раньше окна read-your-writes."""
+        if not token:
+            return False
+        stamp, _, signature = token.partition(".")
+        if not stamp.isdigit() or not hmac.compare_digest(signature, self._sign(stamp)):
+            return False
+        age = time.time() - int(stamp) / 1000
+        return -_CLOCK_SKEW <= age < self.read_your_writes_window
+
+    async def dispose(self) -> None:
+        """Закрывает пулы; до следующего ``configure`` сессии не работают."""
+        if self.primary is not None:
+            await self.primary.dispose()
+        for replica in self.replicas:
+            await replica.engine.dispose()
+        self.primary, self.replicas, self._next = None, [], None
+
+
+class RoutingSession(Session):
+    """
+    Сессия, выбирающая движок на каждый запрос.
+
+    Чтение идет в реплику из ``info["replica"]``, запись и flush — в основную
+    базу. После первого flush сессия закрепляется за основной базой.
+    """
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kw: Any) -> Engine:
+        replica = self.info.get(_REPLICA)
+        if replica is None or self._flushing or isinstance(clause, UpdateBase):
+            if db_router.primary is None:
+                raise RuntimeError("База данных не настроена: вызовите init_database")
+            return db_router.primary.sync_engine
+        return replica.engine.sync_engine
+
+
+def _pin(session: Session) -> None:
+    session.info[_WROTE] = True
+    session.info[_REPLICA] = None
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_after_flush(session: Session, flush_context: Any) -> None:
+    _pin(session)
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _pin_on_dml(state: ORMExecuteState) -> None:
+    # update()/delete()/insert() без flush
+    if not state.is_select:
+        _pin(state.session)
+
+
+def use_primary(session: AsyncSession) -> None:
+    """Закрепляет сессию за основной базой (чтение сразу после записи в другой сессии)."""
+    session.info[_REPLICA] = None
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI-middleware: ответ на запрос, сессия которого писала в основную базу,
+    несет метку записи в cookie и заголовке.
+
+    Сессии ``get_db`` регистрируются в ``scope["db.sessions"]``; проверка —
+    при начале ответа, когда endpoint уже сделал commit.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        sessions: list[AsyncSession] = []
+        scope["db.sessions"] = sessions
+
+        async def send_with_mark(message: dict) -> None:
+            if message["type"] == "http.response.start" and any(s.info.get(_WROTE) for s in sessions):
+                token = db_router.write_token()
+                cookie = (f"{WRITE_COOKIE}={token}; Max-Age={int(db_router.read_your_writes_window)}; "
+                          "Path=/; HttpOnly; SameSite=Lax")
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"set-cookie", cookie.encode()),
+                    (WRITE_HEADER.encode(), token.encode()),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_mark)
+
+
+def init_database(settings) -> DatabaseRouter:
+    """Создает движки основной базы и реплик по конфигурации (подключений еще нет)."""
+    pool_options = {"poolclass": InstrumentedPool} if settings.METRICS_ENABLED else {}
+    primary = create_async_engine(
+        str(settings.DATABASE_URL),
+        echo=settings.DB_ECHO,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        **pool_options,
+    )
+    replicas = [
+        Replica(
+            create_async_engine(
+                url,
+                echo=settings.DB_ECHO,
+                pool_size=settings.DB_REPLICA_POOL_SIZE,
+                max_overflow=settings.DB_REPLICA_MAX_OVERFLOW,
+                pool_timeout=settings.DB_REPLICA_POOL_TIMEOUT,
+                pool_recycle=settings.DB_POOL_RECYCLE,
+                pool_pre_ping=True,  # разрыв обнаруживается до запроса, а не в нем
+                **pool_options,
+            ),
+            retry_interval=settings.DB_REPLICA_RETRY_INTERVAL,
+        )
+        for url in (u.strip() for u in settings.DB_REPLICA_URLS.split(",")) if url
+    ]
+    if settings.METRICS_ENABLED:
+        instrument_engine(primary, "primary")
+        for replica in replicas:
+            instrument_engine(replica.engine, f"replica:{replica.engine.url.host}")
+    if settings.QUERY_TRACKING_ENABLED:
+        for engine in (primary, *(replica.engine for replica in replicas)):
+            track_engine(engine)
+    db_router.configure(
+        primary,
+        replicas,
+        read_your_writes_window=settings.DB_READ_YOUR_WRITES_WINDOW,
+        secret_key=settings.SECRET_KEY,
+    )
+    return db_router
+
+
+db_router = DatabaseRouter()
 
 AsyncSessionLocal = async_sessionmaker(
-    bind=engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
     expire_on_commit=False,
     autocommit=False,
     autoflush=False,
 )
 
 
-async def get_db():
-    """Генератор сессии базы данных."""
+async def get_db(request: Request):
+    """Генератор сессии базы данных; безопасные запросы читают с реплики."""
+    replica = None
     async with AsyncSessionLocal() as session:
+        sessions = request.scope.get("db.sessions")
+        if sessions is not None:
+            sessions.append(session)
+        write_token = request.cookies.get(WRITE_COOKIE) or request.headers.get(WRITE_HEADER)
+        if request.method in SAFE_METHODS and not db_router.wrote_recently(write_token):
+            replica = session.info[_REPLICA] = db_router.replica()
         try:
             yield session
+        except (OSError, DBAPIError) as exc:
+            # Реплика не принимает подключения (asyncpg выбрасывает OSError
+            # в обход handle_error): следующие запросы читают с других баз
+            if replica is not None and (isinstance(exc, OSError) or exc.connection_invalidated):
+                replica.mark_down()
+            raise
         finally:
             await session.close()
@@ -0,0 +1,62 @@
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.database import get_db
+from src.core.security import InvalidTokenError, TokenClaims, token_manager
+from src.crud.loaders import RelationshipLoaders
+from src.models.user import UserRole
+from src.services.auth_service import Principal, resolve_principal
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+async def get_loaders(db: AsyncSession = Depends(get_db)) -> RelationshipLoaders:
+    """Пакетные загрузчики связей, общие для всего запроса."""
+    return RelationshipLoaders(db)
+
+
+async def get_token_claims(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+) -> TokenClaims:
+    """Данные Bearer-токена; подпись проверяется один раз на токен (см. ``TokenManager``)."""
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Требуется авторизация", headers={"WWW-Authenticate": "Bearer"})
+    try:
+        return token_manager.decode(credentials.credentials)
+    except InvalidTokenError as exc:
+        raise HTTPException(status_code=401, detail=str(exc), headers={"WWW-Authenticate": "Bearer"})
+
+
+async def get_current_principal(
+    claims: TokenClaims = Depends(get_token_claims),
+    db: AsyncSession = Depends(get_db),
+) -> Principal:
+    """
+    Текущий пользователь запроса.
+
+    FastAPI вычисляет зависимость один раз за запрос, а Principal берется
+    из кэша, поэтому БД запрашивается только при промахе.
+    """
+    principal = await resolve_principal(db, claims)
+    if principal is None:
+        raise HTTPException(status_code=401, detail="Пользователь не найден или заблокирован",
+                            headers={"WWW-Authenticate": "Bearer"})
+    return principal
+
+
+def require_roles(*roles: UserRole) -> Callable:
+    """Зависимость: пользователь с одной из ролей (администратор допускается всегда)."""
+    async def dependency(principal: Principal = Depends(get_current_principal)) -> Principal:
+        if not principal.has_role(*roles):
+            raise HTTPException(status_code=403, detail="Недостаточно прав")
+        return principal
+    return dependency
+
+
+def require_clinic_access(clinic_id: int, principal: Principal) -> None:
+    """Проверка доступа к данным клиники без обращения к БД; 403, если доступа нет."""
+    if not principal.can_access_clinic(clinic_id):
+        raise HTTPException(status_code=403, detail="Нет доступа к клинике")
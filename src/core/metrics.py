@@ -0,0 +1,319 @@
+"""
+Метрики процесса в текстовом формате Prometheus.
+
+Счетчики и гистограммы — обычные словари и списки без блокировок: все
+обновления идут из потока event loop (события SQLAlchemy asyncio и ASGI
+тоже вызываются в нем). Серия метки создается при первом обращении,
+дальше наблюдение — поиск в словаре, ``bisect`` и два сложения.
+Показатели, которые дешевле прочитать, чем считать (состояние пулов,
+очередь писем), собираются функциями только при запросе ``/metrics``.
+
+Метрики базы данных подключаются ``instrument_engine``:
+
+* ``db_query_duration_seconds{db, query}`` — время запросов по отпечатку
+  SQL (текст без параметров, списки ``IN``/``VALUES`` свернуты); сам текст —
+  в ``db_query_info``. Отпечатков не больше ``MAX_FINGERPRINTS``, остальные
+  попадают в ``other``;
+* ``db_pool_checkout_wait_seconds{db}`` — ожидание соединения из пула,
+  включая открытие нового;
+* ``db_pool_checked_out``, ``db_pool_overflow``, ``db_pool_size``.
+
+Запросы HTTP — ``RequestMetricsMiddleware``:
+``http_request_duration_seconds{method, route, status}`` по шаблону пути.
+"""
+import hashlib
+import re
+import time
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Iterator, Mapping
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+MAX_FINGERPRINTS = 500
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Монотонный счетчик с метками."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = (), buckets: tuple[float, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # метки → [счетчики корзин (последняя — +Inf), сумма]
+        self._series: dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self) -> Iterator[str]:
+        bounds = self.buckets + (float("inf"),)
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class CallbackMetric:
+    """Показатель, который вычисляется при сборе: функция возвращает пары (метки, значение)."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Iterable[tuple[Labels, float]]],
+        labelnames: Labels = (),
+        kind: str = "gauge",
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.kind = kind
+        self._collect = collect
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self._collect():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        self._metrics: dict[str, Any] = {}
+
+    def register(self, metric: Any) -> Any:
+        """Регистрирует метрику; при повторной регистрации имени возвращает прежнюю."""
+        return self._metrics.setdefault(metric.name, metric)
+
+    def register_snapshot(
+        self, prefix: str, snapshot: Callable[[], Mapping[str, float]], counters: Iterable[str] = ()
+    ) -> None:
+        """
+        Регистрирует показатели из словаря ``snapshot()`` (например, ``EmailMetrics``).
+
+        Ключи из ``counters`` экспортируются счетчиками ``<prefix>_<key>_total``,
+        остальные — показателями ``<prefix>_<key>``.
+        """
+        counters = frozenset(counters)
+        for key in snapshot():
+            is_counter = key in counters
+            name = f"{prefix}_{key}_total" if is_counter else f"{prefix}_{key}"
+            self.register(CallbackMetric(
+                name,
+                f"{prefix}: {key}",
+                lambda key=key: [((), snapshot()[key])],
+                kind="counter" if is_counter else "gauge",
+            ))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Время выполнения SQL по отпечатку запроса", ("db", "query"), QUERY_BUCKETS))
+query_errors = registry.register(Counter(
+    "db_query_errors_total", "Ошибки выполнения SQL по отпечатку запроса", ("db", "query")))
+checkout_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Ожидание соединения из пула", ("db",), QUERY_BUCKETS))
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Время обработки HTTP-запроса по маршруту",
+    ("method", "route", "status"), REQUEST_BUCKETS))
+
+
+# ----------------------------------------------------------------------
+# SQL
+# ----------------------------------------------------------------------
+
+_SPACE = re.compile(r"\s+")
+_PARAM = re.compile(r"\$\d+")  # параметры asyncpg
+_IN_LIST = re.compile(r"\(\?(?:, \?)+\)")
+_VALUES_ROWS = re.compile(r"(\([^()]*\))(?:, \([^()]*\))+")
+
+_statements: dict[str, str] = {}  # отпечаток → нормализованный текст
+
+
+def normalize_sql(statement: str) -> str:
+    """Текст SQL без номеров параметров: ``IN ($1, $2)`` → ``IN (...)``, строки VALUES — одна."""
+    text = _PARAM.sub("?", _SPACE.sub(" ", statement).strip())
+    text = _IN_LIST.sub("(...)", text)
+    return _VALUES_ROWS.sub(r"\1, ...", text)
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """Короткий отпечаток SQL для метки; текст запоминается для ``db_query_info``."""
+    text = normalize_sql(statement)
+    key = hashlib.blake2b(text.encode(), digest_size=6).hexdigest()
+    if key not in _statements:
+        if len(_statements) >= MAX_FINGERPRINTS:
+            return "other"
+        _statements[key] = text
+    return key
+
+
+registry.register(CallbackMetric(
+    "db_query_info",
+    "Нормализованный текст SQL для отпечатка",
+    lambda: [((key, text[:1000]), 1) for key, text in _statements.items()],
+    ("query", "statement"),
+))
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Пул, измеряющий ожидание соединения."""
+    metrics_name = "primary"
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            checkout_wait.observe(time.perf_counter() - start, self.metrics_name)
+
+    def recreate(self) -> "InstrumentedPool":
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+_engines: dict[str, AsyncEngine] = {}
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    """Подключает метрики запросов и пула к движку (пул — ``InstrumentedPool``)."""
+    if isinstance(engine.pool, InstrumentedPool):
+        engine.pool.metrics_name = name
+    _engines[name] = engine
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_metrics_start", None)
+        if start is not None:
+            query_duration.observe(time.perf_counter() - start, name, fingerprint(statement))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        if context.statement is not None:
+            query_errors.inc(name, fingerprint(context.statement))
+
+
+def _pool_values(read: Callable[[Any], float]) -> Callable[[], list[tuple[Labels, float]]]:
+    return lambda: [((name, ), read(engine.pool)) for name, engine in _engines.items()]
+
+
+registry.register(CallbackMetric(
+    "db_pool_checked_out", "Соединений выдано из пула", _pool_values(lambda pool: pool.checkedout()), ("db",)))
+registry.register(CallbackMetric(
+    "db_pool_overflow", "Соединений сверх pool_size (отрицательное — еще не открыты)",
+    _pool_values(lambda pool: pool.overflow()), ("db",)))
+registry.register(CallbackMetric(
+    "db_pool_size", "Постоянный размер пула (pool_size)", _pool_values(lambda pool: pool.size()), ("db",)))
+
+
+# ----------------------------------------------------------------------
+# HTTP
+# ----------------------------------------------------------------------
+
+def _route(scope: dict) -> str:
+    """Шаблон пути маршрута (``/api/v1/news/{news_id}``), а не сам путь: число серий ограничено."""
+    route = scope.get("route")
+    if route is not None:
+        return route.path_format
+    root_path = scope.get("app_root_path") or scope.get("root_path")
+    return f"{root_path}/*" if root_path else "unmatched"
+
+
+class RequestMetricsMiddleware:
+    """ASGI-middleware времени запросов по маршрутам (до отправки всего тела ответа)."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_duration.observe(time.perf_counter() - start, scope["method"], _route(scope), str(status))
+
+
+def render_metrics() -> bytes:
+    return registry.render().encode()
@@ -0,0 +1,191 @@
+"""
+Учет SQL-запросов каждого HTTP-запроса.
+
+``QueryBudgetMiddleware`` считает запросы к базе и их суммарное время
+(события движков подключает ``track_engine``) и добавляет к ответу
+заголовок ``Server-Timing``::
+
+    Server-Timing: db;dur=4.2;desc="3 queries", app;dur=11.8
+
+Одинаковые по форме запросы (хэш SQL без параметров), выполненные
+``QUERY_REPEAT_THRESHOLD`` раз и больше за один HTTP-запрос, — признак N+1
+(ленивая загрузка связей в цикле): такие запросы пишутся в лог.
+
+Endpoint может объявить бюджет::
+
+    @router.get("/", dependencies=[query_budget(max_queries=3)])
+
+Бюджет считает все запросы HTTP-запроса, включая зависимости
+(авторизацию). Превышение пишется в лог, а в строгом режиме
+(``QUERY_BUDGET_STRICT``, включен в тестовой конфигурации) приводит к
+``QueryBudgetExceeded`` до отправки ответа: клиент получает 500, а не
+успешный ответ. Запросы, выполненные уже после начала ответа (потоковые
+ответы), только пишутся в лог. В тестах блок кода проверяется напрямую::
+
+    with count_queries(max_queries=3):
+        response = await client.get("/api/v1/specialists/")
+"""
+import hashlib
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Iterator, Optional
+
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .metrics import normalize_sql
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Запросов к базе больше, чем объявлено бюджетом."""
+
+
+class QueryStats:
+    """Запросы к базе в пределах HTTP-запроса или блока ``count_queries``."""
+
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        self.max_queries: Optional[int] = None
+        self.shapes: dict[str, list] = {}  # форма → [число выполнений, текст первого]
+
+    def add(self, key: str, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.duration += elapsed
+        shape = self.shapes.get(key)
+        if shape is None:
+            self.shapes[key] = [1, statement]
+        else:
+            shape[0] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[int, str]]:
+        """Формы запросов, выполненные ``threshold`` раз и больше, от частых."""
+        return sorted(
+            ((count, statement) for count, statement in self.shapes.values() if count >= threshold),
+            key=lambda item: item[0],
+            reverse=True,
+        )
+
+    def exceeded(self) -> bool:
+        return self.max_queries is not None and self.count > self.max_queries
+
+    def check(self, max_queries: Optional[int] = None) -> None:
+        """Выбрасывает ``QueryBudgetExceeded``, если запросов больше бюджета."""
+        limit = self.max_queries if max_queries is None else max_queries
+        if limit is not None and self.count > limit:
+            shapes = "\n".join(f"  {count}x {statement}" for count, statement in self.repeated(1))
+            raise QueryBudgetExceeded(f"Запросов к базе: {self.count}, бюджет: {limit}\n{shapes}")
+
+
+@lru_cache(maxsize=4096)
+def shape_key(statement: str) -> str:
+    """
+    Ключ формы запроса: хэш нормализованного SQL.
+
+    В отличие от ``metrics.fingerprint`` не ограничен числом форм, так что
+    N+1 находится и после заполнения реестра метрик.
+    """
+    return hashlib.blake2b(normalize_sql(statement).encode(), digest_size=8).hexdigest()
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def count_queries(max_queries: Optional[int] = None) -> Iterator[QueryStats]:
+    """
+    Считает запросы к базе в блоке (в том числе внутри HTTP-запросов через ASGI в том же task).
+
+    С ``max_queries`` после блока проверяет бюджет.
+    """
+    stats = QueryStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+    stats.check(max_queries)
+
+
+def query_budget(max_queries: int) -> Any:
+    """Зависимость endpoint'а: бюджет запросов к базе на HTTP-запрос."""
+    async def declare_budget() -> None:
+        stats = _current.get()
+        if stats is not None:
+            stats.max_queries = max_queries
+    return Depends(declare_budget)
+
+
+def track_engine(engine: AsyncEngine) -> None:
+    """Подключает учет запросов к движку; вне HTTP-запросов и ``count_queries`` учет не ведется."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and _current.get() is not None:
+            context._budget_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_budget_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        key = shape_key(statement)
+        stats = _current.get()
+        while stats is not None:
+            stats.add(key, statement, elapsed)
+            stats = stats.parent
+
+
+class QueryBudgetMiddleware:
+    """ASGI-middleware учета запросов к базе: Server-Timing, N+1 и бюджеты endpoint'ов."""
+
+    def __init__(self, app: Any, *, repeat_threshold: int = 5, strict: bool = False):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+        self.strict = strict
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        stats = QueryStats(parent=_current.get())
+        token = _current.set(stats)
+
+        async def send_with_timing(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                if self.strict and stats.exceeded():
+                    stats.check()  # ответ еще не начат: внешний обработчик ошибок отдаст 500
+                timing = (
+                    f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+                    f"app;dur={(time.perf_counter() - start) * 1000:.1f}"
+                )
+                message["headers"] = [*message.get("headers", ()), (b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+        self._report(scope, stats)
+
+    def _report(self, scope: dict, stats: QueryStats) -> None:
+        request = f"{scope['method']} {scope['path']}"
+        for count, statement in stats.repeated(self.repeat_threshold):
+            logger.warning("Возможный N+1 в %s: запрос выполнен %d раз: %s", request, count, statement)
+        if stats.exceeded():
+            logger.warning(
+                "Превышен бюджет запросов в %s: %d при бюджете %d", request, stats.count, stats.max_queries)
@@ -0,0 +1,281 @@
+"""
+Пароли и JWT.
+
+Хэширование паролей (scrypt) намеренно дорогое: ~50 мс CPU на вызов. Чтобы
+утренняя волна входов не останавливала event loop, хэширование и проверка
+выполняются в отдельном пуле потоков (``hashlib.scrypt`` отпускает GIL),
+а число одновременных вычислений ограничено семафором — остальные запросы
+ждут своей очереди на стороне event loop и не занимают пул.
+
+Проверенные токены кэшируются по SHA-256 от строки токена до истечения
+``exp`` (но не дольше ``TOKEN_CACHE_TTL``), поэтому подпись проверяется
+один раз на токен, а не на каждый запрос. Кэш хранит только результат
+проверки подписи: блокировка пользователя действует сразу, потому что
+статус проверяется при получении Principal (``auth_service``), а кэш
+Principal сбрасывается при изменении пользователя.
+
+Токен восстановления пароля — JWT с ``purpose`` и отпечатком текущего
+хэша пароля: после смены пароля ссылка перестает действовать. Как
+access-токен он не принимается.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional
+
+import jwt
+
+from src.core.cache import MISSING, TTLCache
+
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_SIZE = 16
+KEY_SIZE = 32
+_SCHEME = "scrypt"
+PURPOSE_PASSWORD_RESET = "password_reset"
+
+
+class InvalidTokenError(Exception):
+    """Токен поврежден, подписан другим ключом или истек."""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + 1024 ** 2, dklen=KEY_SIZE
+    )
+
+
+def hash_password(password: str, *, n: int = SCRYPT_N, r: int = SCRYPT_R, p: int = SCRYPT_P) -> str:
+    """Хэш пароля в формате ``scrypt$n$r$p$salt$hash`` (синхронно, ~50 мс CPU)."""
+    salt = os.urandom(SALT_SIZE)
+    key = _scrypt(password, salt, n, r, p)
+    return f"{_SCHEME}${n}${r}${p}${_b64encode(salt)}${_b64encode(key)}"
+
+
+def _parse_hash(hashed: str) -> Optional[tuple[int, int, int, bytes, bytes]]:
+    try:
+        scheme, n, r, p, salt, key = hashed.split("$")
+        if scheme != _SCHEME:
+            return None
+        return int(n), int(r), int(p), _b64decode(salt), _b64decode(key)
+    except (ValueError, AttributeError):
+        return None
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    """Сравнивает пароль с хэшем за постоянное время; неизвестный формат — False."""
+    parsed = _parse_hash(hashed)
+    if parsed is None:
+        return False
+    n, r, p, salt, key = parsed
+    return hmac.compare_digest(_scrypt(password, salt, n, r, p), key)
+
+
+def needs_rehash(hashed: str) -> bool:
+    """True, если хэш получен с устаревшими параметрами."""
+    parsed = _parse_hash(hashed)
+    return parsed is None or parsed[:3] != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+
+@lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    # Хэш случайного пароля: проверяется для несуществующих email, чтобы время
+    # ответа не выдавало, зарегистрирован ли адрес
+    return hash_password(base64.b64encode(os.urandom(24)).decode())
+
+
+def _verify_dummy(password: str) -> bool:
+    return verify_password(password, _dummy_hash())
+
+
+class PasswordHasher:
+    """
+    Хэширование паролей вне event loop.
+
+    Attributes:
+        workers: Размер пула потоков и число одновременных вычислений
+    """
+
+    def __init__(self, workers: int = 4):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.configure(workers)
+
+    def configure(self, workers: int) -> None:
+        self.shutdown()
+        self.workers = max(1, workers)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password")
+        return self._executor
+
+    async def _run(self, func, *args):
+        # Семафор создается лениво: он привязывается к работающему event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), func, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed: Optional[str]) -> bool:
+        """Проверяет пароль; при ``hashed=None`` тратит то же время и возвращает False."""
+        if hashed is None:
+            # Фиктивный хэш (первый вызов — scrypt) получаем в пуле, а не в event loop
+            await self._run(_verify_dummy, password)
+            return False
+        return await self._run(verify_password, password, hashed)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._semaphore = None
+
+
+@dataclass(frozen=True)
+class TokenClaims:
+    """
+    Проверенные данные access-токена.
+
+    Attributes:
+        user_id: ID пользователя
+        user_type: "staff" или "client"
+        expires_at: Время истечения (unix time)
+    """
+    user_id: int
+    user_type: str
+    expires_at: float
+
+
+def user_tag(user_type: str, user_id: int) -> str:
+    """Тег кэша для всех данных одного пользователя."""
+    return f"user:{user_type}:{user_id}"
+
+
+class TokenManager:
+    """
+    Выпуск и проверка JWT с кэшем проверенных токенов.
+
+    Attributes:
+        secret_key: Ключ подписи
+        algorithm: Алгоритм подписи
+        expire_minutes: Время жизни access-токена
+        cache: Проверенные токены по SHA-256 от строки токена
+    """
+
+    def __init__(self, secret_key: str = "", algorithm: str = "HS256", expire_minutes: int = 30,
+                 cache_size: int = 10_000, cache_ttl: float = 300.0, reset_expire_minutes: int = 30):
+        self.configure(secret_key, algorithm, expire_minutes, cache_size, cache_ttl, reset_expire_minutes)
+
+    def configure(self, secret_key: str, algorithm: str, expire_minutes: int,
+                  cache_size: int, cache_ttl: float, reset_expire_minutes: int = 30) -> None:
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.expire_minutes = expire_minutes
+        self.reset_expire_minutes = reset_expire_minutes
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+    def create_access_token(self, user_id: int, user_type: str, expires_delta: Optional[timedelta] = None) -> str:
+        expires_at = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=self.expire_minutes))
+        payload = {"sub": str(user_id), "type": user_type, "exp": expires_at}
+        return jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> TokenClaims:
+        """
+        Проверяет токен; повторные обращения с тем же токеном берутся из кэша.
+
+        Raises:
+            InvalidTokenError: Токен недействителен или истек
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        claims = self.cache.get(key)
+        now = time.time()
+        if claims is not MISSING:
+            if claims.expires_at > now:
+                return claims
+            self.cache.delete(key)
+
+        try:
+            payload = jwt.decode(
+                token, self.secret_key, algorithms=[self.algorithm], options={"require": ["exp", "sub"]}
+            )
+            if "purpose" in payload:
+                raise ValueError("Токен другого назначения")
+            claims = TokenClaims(int(payload["sub"]), str(payload.get("type", "client")), float(payload["exp"]))
+        except (jwt.PyJWTError, ValueError, TypeError) as exc:
+            raise InvalidTokenError("Недействительный токен") from exc
+
+        # Запись не переживает токен: TTL кэша ограничен сроком действия
+        self.cache.set(key, claims, ttl=min(self.cache.ttl, claims.expires_at - now))
+        return claims
+
+    def _password_fingerprint(self, hashed: str) -> str:
+        return hmac.new(self.secret_key.encode(), hashed.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def create_reset_token(self, user_id: int, user_type: str, hashed_password: str) -> str:
+        """Токен восстановления пароля; действует, пока пароль не сменился."""
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=self.reset_expire_minutes)
+        payload = {
+            "sub": str(user_id), "type": user_type, "exp": expires_at,
+            "purpose": PURPOSE_PASSWORD_RESET, "pwd": self._password_fingerprint(hashed_password),
+        }
+        return jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
+
+    def decode_reset_token(self, token: str) -> tuple[TokenClaims, str]:
+        """
+        Данные токена восстановления и отпечаток хэша пароля на момент выпуска.
+
+        Raises:
+            InvalidTokenError: Токен недействителен, истек или другого назначения
+        """
+        try:
+            payload = jwt.decode(
+                token, self.secret_key, algorithms=[self.algorithm], options={"require": ["exp", "sub", "pwd"]}
+            )
+            if payload.get("purpose") != PURPOSE_PASSWORD_RESET:
+                raise ValueError("Токен другого назначения")
+            claims = TokenClaims(int(payload["sub"]), str(payload["type"]), float(payload["exp"]))
+            return claims, str(payload["pwd"])
+        except (jwt.PyJWTError, ValueError, TypeError, KeyError) as exc:
+            raise InvalidTokenError("Недействительный токен") from exc
+
+    def reset_token_matches(self, fingerprint: str, hashed_password: str) -> bool:
+        """Токен выпущен для текущего пароля (не использован и пароль не менялся)."""
+        return hmac.compare_digest(fingerprint, self._password_fingerprint(hashed_password))
+
+
+# Глобальные экземпляры; параметры задаются через init_security
+password_hasher = PasswordHasher()
+token_manager = TokenManager()
+
+
+def init_security(settings) -> None:
+    """Настраивает пул хэширования паролей и JWT по конфигурации."""
+    password_hasher.configure(settings.PASSWORD_HASH_WORKERS)
+    token_manager.configure(
+        settings.SECRET_KEY,
+        settings.ALGORITHM,
+        settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+        settings.TOKEN_CACHE_SIZE,
+        settings.TOKEN_CACHE_TTL,
+        settings.PASSWORD_RESET_EXPIRE_MINUTES,
+    )
@@ -0,0 +1,5 @@
+from .clinic import clinic
+from .post import news
+from .promotion import promotion
+from .service import service
+from .specialist import specialist
@@ -0,0 +1,260 @@
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Generic, Optional, Sequence, Type, TypeVar
+
+from pydantic import BaseModel as SchemaModel
+from sqlalchemy import Select, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute, selectinload
+from sqlalchemy.sql.base import ExecutableOption
+
+from src.models.base import BaseModel
+
+ModelType = TypeVar("ModelType", bound=BaseModel)
+CreateSchemaType = TypeVar("CreateSchemaType", bound=SchemaModel)
+UpdateSchemaType = TypeVar("UpdateSchemaType", bound=SchemaModel)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursorError(ValueError):
+    """Курсор пагинации не удалось разобрать."""
+
+
+@dataclass
+class Page(Generic[ModelType]):
+    """
+    Страница результатов keyset-пагинации.
+
+    Attributes:
+        items: Объекты текущей страницы
+        next_cursor: Курсор следующей страницы (None, если страница последняя)
+    """
+    items: list[ModelType] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """
+    Базовый асинхронный репозиторий для моделей каталога.
+
+    Постраничная выборка сделана через keyset (курсор) по ``sort_columns``
+    вместо OFFSET/LIMIT: стоимость запроса не растет с номером страницы,
+    а порядок стабилен при вставке новых строк. Связи подгружаются
+    по плану ``eager_load`` (``selectinload``), чтобы при сериализации
+    не было ленивых запросов.
+
+    Attributes:
+        model: Класс модели SQLAlchemy
+        sort_columns: Колонки ключа сортировки; последняя должна быть уникальной (обычно id)
+        sort_descending: Страницы идут от больших значений ключа к меньшим
+        eager_load: План жадной загрузки — имена связей, подгружаемых через ``selectinload``
+    """
+    sort_columns: tuple[str, ...] = ("created_at", "id")
+    sort_descending: bool = False
+    eager_load: tuple[str, ...] = ()
+
+    def __init__(self, model: Type[ModelType]):
+        self.model = model
+        self._column_names = frozenset(model.__table__.columns.keys())
+        self._load_options: Optional[list[ExecutableOption]] = None
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+
+    def load_options(self) -> list[ExecutableOption]:
+        """
+        Опции загрузки по плану ``eager_load``.
+
+        Строятся при первом обращении, а не при объявлении класса:
+        ``selectinload`` требует сконфигурированных мапперов.
+        """
+        if self._load_options is None:
+            self._load_options = [selectinload(getattr(self.model, name)) for name in self.eager_load]
+        return self._load_options
+
+    def _select(self, *, with_relations: bool = True) -> Select:
+        """Базовый SELECT с планом жадной загрузки."""
+        stmt = select(self.model)
+        if with_relations and self.eager_load:
+            stmt = stmt.options(*self.load_options())
+        return stmt
+
+    def _sort_attributes(self) -> list[InstrumentedAttribute]:
+        return [getattr(self.model, name) for name in self.sort_columns]
+
+    async def get(self, db: AsyncSession, id: int, *, with_relations: bool = True) -> Optional[ModelType]:
+        """Возвращает объект по первичному ключу."""
+        stmt = self._select(with_relations=with_relations).where(self.model.id == id)
+        result = await db.execute(stmt)
+        return result.scalars().first()
+
+    async def get_many(
+        self, db: AsyncSession, ids: Sequence[int], *, with_relations: bool = True
+    ) -> list[ModelType]:
+        """Возвращает объекты по списку id одним запросом (порядок не гарантируется)."""
+        if not ids:
+            return []
+        stmt = self._select(with_relations=with_relations).where(self.model.id.in_(set(ids)))
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_page(
+        self,
+        db: AsyncSession,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        filters: Sequence[Any] = (),
+        with_relations: bool = True,
+        base: Optional[Select] = None,
+    ) -> Page[ModelType]:
+        """
+        Возвращает страницу объектов, начиная после позиции ``cursor``.
+
+        Запрос выбирает ``limit + 1`` строк: лишняя строка только сигнализирует,
+        что следующая страница существует, и в ответ не попадает.
+
+        Args:
+            base: SELECT колонок вместо объектов модели (например, с join);
+                элементы страницы — строки ``Row``, колонки ``sort_columns``
+                должны входить в выборку под своими именами
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        sort_attrs = self._sort_attributes()
+
+        stmt = base if base is not None else self._select(with_relations=with_relations)
+        if filters:
+            stmt = stmt.where(*filters)
+        if cursor:
+            key, after = tuple_(*sort_attrs), tuple_(*self.decode_cursor(cursor))
+            stmt = stmt.where(key < after if self.sort_descending else key > after)
+        if self.sort_descending:
+            stmt = stmt.order_by(*(attr.desc() for attr in sort_attrs))
+        else:
+            stmt = stmt.order_by(*sort_attrs)
+        stmt = stmt.limit(limit + 1)
+
+        result = await db.execute(stmt)
+        items = list(result.all() if base is not None else result.scalars().all())
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = self.encode_cursor(items[-1])
+        return Page(items=items, next_cursor=next_cursor)
+
+    # ------------------------------------------------------------------
+    # Курсоры
+    # ------------------------------------------------------------------
+
+    def encode_cursor(self, obj: ModelType) -> str:
+        """Кодирует значения ключа сортировки объекта в непрозрачную строку."""
+        values = []
+        for name in self.sort_columns:
+            value = getattr(obj, name)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            values.append(value)
+        raw = json.dumps(values, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> list[Any]:
+        """Разбирает курсор обратно в значения ключа сортировки."""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (ValueError, TypeError) as exc:
+            raise InvalidCursorError("Некорректный курсор пагинации") from exc
+
+        if not isinstance(values, list) or len(values) != len(self.sort_columns):
+            raise InvalidCursorError("Некорректный курсор пагинации")
+
+        columns = self.model.__table__.columns
+        decoded = []
+        for name, value in zip(self.sort_columns, values):
+            if value is not None and columns[name].type.python_type is datetime:
+                try:
+                    value = datetime.fromisoformat(value)
+                except (ValueError, TypeError) as exc:
+                    raise InvalidCursorError("Некорректный курсор пагинации") from exc
+            decoded.append(value)
+        return decoded
+
+    # ------------------------------------------------------------------
+    # Запись
+    # ------------------------------------------------------------------
+
+    def _column_values(self, data: dict[str, Any]) -> dict[str, Any]:
+        """
+        Оставляет только поля, которые являются колонками таблицы.
+
+        Перечисления из схем передаются значениями: классы Enum в схемах
+        и в моделях объявлены независимо.
+        """
+        return {
+            key: value.value if isinstance(value, Enum) else value
+            for key, value in data.items()
+            if key in self._column_names
+        }
+
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        """Создает объект из схемы."""
+        db_obj = self.model(**self._column_values(obj_in.model_dump()))
+        db.add(db_obj)
+        await db.flush()
+        return db_obj
+
+    async def update(
+        self, db: AsyncSession, *, db_obj: ModelType, obj_in: UpdateSchemaType | dict[str, Any]
+    ) -> ModelType:
+        """Обновляет объект переданными полями (частичное обновление)."""
+        data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        for key, value in self._column_values(data).items():
+            setattr(db_obj, key, value)
+        await db.flush()
+        return db_obj
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[ModelType]:
+        """Удаляет объект по id с учетом каскадов ORM. Возвращает удаленный объект."""
+        db_obj = await db.get(self.model, id)
+        if db_obj is None:
+            return None
+        await db.delete(db_obj)
+        await db.flush()
+        return db_obj
+
+    async def bulk_create(self, db: AsyncSession, *, objs_in: Sequence[CreateSchemaType]) -> list[ModelType]:
+        """
+        Создает объекты пачкой.
+
+        Используется ORM bulk INSERT ... RETURNING: драйвер отправляет строки
+        пакетами (insertmanyvalues), а не по одному INSERT на объект.
+        """
+        if not objs_in:
+            return []
+        rows = [self._column_values(obj.model_dump()) for obj in objs_in]
+        result = await db.scalars(insert(self.model).returning(self.model), rows)
+        return list(result.all())
+
+    async def bulk_update(self, db: AsyncSession, *, rows: Sequence[dict[str, Any]]) -> int:
+        """
+        Обновляет объекты пачкой по первичному ключу.
+
+        Каждый словарь должен содержать ``id`` и изменяемые поля.
+        Возвращает количество переданных строк.
+        """
+        if not rows:
+            return 0
+        values = []
+        for row in rows:
+            if "id" not in row:
+                raise ValueError("Для массового обновления каждая строка должна содержать id")
+            values.append(self._column_values(row))
+        await db.execute(update(self.model), values)
+        return len(values)
@@ -0,0 +1,12 @@
+from src.crud.base import CRUDBase
+from src.models.clinic import Clinic
+from src.schemas.clinic import ClinicCreate, ClinicUpdate
+
+
+class CRUDClinic(CRUDBase[Clinic, ClinicCreate, ClinicUpdate]):
+    """Репозиторий клиник."""
+    sort_columns = ("created_at", "id")
+    eager_load = ("services", "specialists")
+
+
+clinic = CRUDClinic(Clinic)
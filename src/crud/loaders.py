@@ -0,0 +1,147 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Generic, Hashable, Iterable, Sequence, TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from src.models.service import Service
+from src.models.service_specialist import service_specialist
+from src.models.specialist import Specialist
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    Пакетный загрузчик в стиле DataLoader.
+
+    Ключи, запрошенные через ``load``/``load_many`` в течение одной итерации
+    event loop, собираются и загружаются одним вызовом ``batch_fn``.
+    Результаты кэшируются на время жизни загрузчика (одного запроса).
+
+    Attributes:
+        batch_fn: Функция, возвращающая словарь ключ -> значение для списка ключей
+        default: Фабрика значения для ключей, которых нет в ответе ``batch_fn``
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[list[K]], Awaitable[dict[K, V]]],
+        *,
+        default: Callable[[], V] = lambda: None,
+    ):
+        self.batch_fn = batch_fn
+        self.default = default
+        self._futures: dict[K, asyncio.Future] = {}
+        self._queue: list[K] = []
+        self._tasks: set[asyncio.Task] = set()
+
+    def load(self, key: K) -> Awaitable[V]:
+        """Возвращает awaitable со значением для ключа."""
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[key] = future
+            if not self._queue:
+                # Отправляем пакет после того, как остальные задачи успеют добавить ключи
+                loop.call_soon(self._dispatch)
+            self._queue.append(key)
+        return future
+
+    async def load_many(self, keys: Iterable[K]) -> list[V]:
+        """Загружает значения для всех ключей одним пакетом, сохраняя порядок."""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: K, value: V) -> None:
+        """Кладет заранее известное значение, чтобы не загружать его повторно."""
+        if key not in self._futures:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._futures[key] = future
+
+    def _dispatch(self) -> None:
+        keys, self._queue = self._queue, []
+        # Ссылка держится до завершения: иначе задачу может собрать сборщик мусора
+        task = asyncio.get_running_loop().create_task(self._run_batch(keys))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, keys: list[K]) -> None:
+        try:
+            values = await self.batch_fn(keys)
+        except Exception as exc:
+            for key in keys:
+                # Ошибку не кэшируем: повторный load попробует снова
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for key in keys:
+            future = self._futures[key]
+            if not future.done():
+                future.set_result(values[key] if key in values else self.default())
+
+
+class RelationshipLoaders:
+    """
+    Загрузчики связи многие-ко-многим ``service_specialist`` для одного запроса.
+
+    Все обращения к сессии сериализуются через общую блокировку:
+    AsyncSession не допускает параллельных запросов.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._lock = asyncio.Lock()
+        self.services_by_specialist: BatchLoader[int, list[Service]] = BatchLoader(
+            self._load_services_by_specialist, default=list
+        )
+        self.specialists_by_service: BatchLoader[int, list[Specialist]] = BatchLoader(
+            self._load_specialists_by_service, default=list
+        )
+
+    async def _load_services_by_specialist(self, specialist_ids: list[int]) -> dict[int, list[Service]]:
+        stmt = (
+            select(service_specialist.c.specialist_id, Service)
+            .join(service_specialist, service_specialist.c.service_id == Service.id)
+            .where(service_specialist.c.specialist_id.in_(specialist_ids))
+            .order_by(Service.order_index, Service.id)
+        )
+        return await self._group(stmt)
+
+    async def _load_specialists_by_service(self, service_ids: list[int]) -> dict[int, list[Specialist]]:
+        stmt = (
+            select(service_specialist.c.service_id, Specialist)
+            .join(service_specialist, service_specialist.c.specialist_id == Specialist.id)
+            .where(service_specialist.c.service_id.in_(service_ids))
+            .order_by(Specialist.last_name, Specialist.id)
+        )
+        return await self._group(stmt)
+
+    async def _group(self, stmt) -> dict[int, list[Any]]:
+        async with self._lock:
+            result = await self.db.execute(stmt)
+        grouped: dict[int, list[Any]] = defaultdict(list)
+        for owner_id, obj in result:
+            grouped[owner_id].append(obj)
+        return grouped
+
+    async def attach_services(self, specialists: Sequence[Specialist]) -> None:
+        """Заполняет ``Specialist.services`` у всех специалистов одним запросом."""
+        await self._attach(specialists, "services", self.services_by_specialist)
+
+    async def attach_specialists(self, services: Sequence[Service]) -> None:
+        """Заполняет ``Service.specialists`` у всех услуг одним запросом."""
+        await self._attach(services, "specialists", self.specialists_by_service)
+
+    @staticmethod
+    async def _attach(objs: Sequence[Any], name: str, loader: BatchLoader) -> None:
+        # set_committed_value заполняет связь как загруженную из БД:
+        # объект не становится "грязным", а сериализация не вызывает ленивую загрузку
+        values = await loader.load_many(obj.id for obj in objs)
+        for obj, value in zip(objs, values):
+            set_committed_value(obj, name, value)
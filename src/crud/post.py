@@ -0,0 +1,13 @@
+from src.crud.base import CRUDBase
+from src.models.news import News
+from src.schemas.news import NewsCreate, NewsUpdate
+
+
+class CRUDNews(CRUDBase[News, NewsCreate, NewsUpdate]):
+    """Репозиторий новостей."""
+    sort_columns = ("publication_date", "id")
+    sort_descending = True  # сначала свежие
+    eager_load = ("author", "blocks")
+
+
+news = CRUDNews(News)
@@ -0,0 +1,11 @@
+from src.crud.base import CRUDBase
+from src.models.promotion import Promotion
+from src.schemas.promotion import PromotionCreate, PromotionUpdate
+
+
+class CRUDPromotion(CRUDBase[Promotion, PromotionCreate, PromotionUpdate]):
+    """Репозиторий акций."""
+    sort_columns = ("created_at", "id")
+
+
+promotion = CRUDPromotion(Promotion)
@@ -0,0 +1,12 @@
+from src.crud.base import CRUDBase
+from src.models.service import Service
+from src.schemas.service import ServiceCreate, ServiceUpdate
+
+
+class CRUDService(CRUDBase[Service, ServiceCreate, ServiceUpdate]):
+    """Репозиторий услуг."""
+    sort_columns = ("order_index", "id")
+    eager_load = ("specialists",)
+
+
+service = CRUDService(Service)
@@ -0,0 +1,11 @@
+from src.crud.base import CRUDBase
+from src.models.specialist import Specialist
+from src.schemas.specialist import SpecialistCreate, SpecialistUpdate
+
+
+class CRUDSpecialist(CRUDBase[Specialist, SpecialistCreate, SpecialistUpdate]):
+    """Репозиторий специалистов."""
+    sort_columns = ("created_at", "id")
+
+
+specialist = CRUDSpecialist(Specialist)
@@ -1,47 +1,204 @@
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from pathlib import Path
+"""
+Точка входа приложения.
+
+Импорт модуля ничего не настраивает: конфигурация, сервисы и роутеры
+собираются в ``create_app``, движки базы данных создаются в lifespan,
+там же заранее конфигурируются мапперы SQLAlchemy (иначе это делает
+первый запрос). ``app`` создается при первом обращении к атрибуту,
+поэтому ``uvicorn src.main:app`` и ``uvicorn --factory src.main:create_app``
+работают одинаково.
+
+Запуск: ``python -m src.main [development|testing|production]``.
+"""
+import asyncio
+import os
 import sys
-import uvicorn
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, Response
+
+from src.core.config import Settings, init_config
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Собирает приложение.
+
+    Args:
+        settings: Конфигурация; по умолчанию — окружения из переменной ``ENV``
+    """
+    config = init_config(settings=settings)
+
+    # Пароли и JWT
+    from src.core.security import init_security, password_hasher
+    from src.services.auth_service import init_auth
+
+    init_security(config)
+    init_auth(config)
+
+    # EmailStr: проверка домена повторяется для каждого адреса, результат зависит только от домена
+    from src.schemas.validators import cache_email_domains
+
+    cache_email_domains()
+
+    # Кэш каталога и его инвалидация по событиям сессий
+    from src.core.cache import init_cache
+    from src.services.catalog_service import register_cache_invalidation
+
+    init_cache(config)
+    register_cache_invalidation()
+
+    # Кэш фрагментов главной страницы сбрасывается вместе с кэшем каталога
+    from src.views.fragments import init_fragment_cache
+
+    init_fragment_cache(config)
+
+    # Индекс действующих акций (подписан на инвалидацию каталога)
+    from src.services.promotion_service import init_promotion_index
+
+    init_promotion_index(config)
+
+    # Индекс ближайших клиник (подписан на инвалидацию каталога)
+    from src.services.geo_service import init_clinic_locator
+
+    init_clinic_locator(config)
+
+    # Хранилище изображений (пул процессов создается при первом ресайзе)
+    from src.storage.images import init_image_storage
+
+    image_storage = init_image_storage(config)
+
+    # Потоковая раздача видео
+    from src.storage.videos import init_video_storage
+
+    init_video_storage(config)
 
-# Импортируем config с возможностью инициализации
-from src.core.config import init_config
+    # Поблочные загрузки
+    from src.storage.temp import init_temp_storage
 
-# Получаем режим из аргументов командной строки
-env = sys.argv[1] if len(sys.argv) > 1 else None
+    temp_storage = init_temp_storage(config)
 
-# Инициализируем конфигурацию
-config = init_config(env)
+    # Очередь писем (воркеры запускаются в lifespan)
+    from src.services.email_service import init_email_service, run_reminder_scheduler
 
-app = FastAPI(
-    title="Vet Clinic API",
-    description="API для ветеринарной клиники",
-    version="1.0.0",
-    debug=config.DEBUG
-)
+    email_service = init_email_service(config)
 
-# Mount static files
-BASE_DIR = Path(__file__).resolve().parent
-app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
+    # Основная база и реплики: движки создаются в lifespan
+    from src.core.database import db_router, init_database
 
-# Include routers
-from src.views.main import router as main_router
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        """Запуск и остановка фоновых ресурсов приложения."""
+        init_database(config)
+        warm_up()
+        sweeper = asyncio.create_task(temp_storage.run_sweeper())
+        email_service.start()
+        reminders = None
+        if email_service.enabled and config.EMAIL_REMINDER_INTERVAL > 0:
+            reminders = asyncio.create_task(
+                run_reminder_scheduler(config.EMAIL_REMINDER_INTERVAL, config.EMAIL_REMINDER_DAYS_AHEAD)
+            )
+        yield
+        if reminders is not None:
+            reminders.cancel()
+        await email_service.stop()
+        sweeper.cancel()
+        image_storage.shutdown()
+        password_hasher.shutdown()
+        await db_router.dispose()
 
-app.include_router(main_router)
+    app = FastAPI(
+        title="Vet Clinic API",
+        description="API для ветеринарной клиники",
+        version="1.0.0",
+        debug=config.DEBUG,
+        lifespan=lifespan,
+    )
+    app.state.settings = config
 
+    # Mount static files (собранная статика с хэшами и .br/.gz, если сборка есть)
+    from fastapi.staticfiles import StaticFiles
+    from src.storage.assets import init_static_assets
 
-@app.get("/api/health")
-async def health_check():
-    return {
-        "status": "healthy",
-        "message": "Vet Clinic API is running",
-        "environment": config.ENV,
-        "debug": config.DEBUG
-    }
+    static_assets = init_static_assets(config)
+    app.mount("/static", static_assets.files(), name="static")
+    app.mount(config.MEDIA_URL.rstrip("/"), StaticFiles(directory=config.MEDIA_ROOT, check_dir=False), name="media")
+
+    # Метрики: время запросов по маршрутам (SQL и пулы подключаются в init_database)
+    from src.core.metrics import CONTENT_TYPE, RequestMetricsMiddleware, render_metrics
+
+    if config.METRICS_ENABLED:
+        app.add_middleware(RequestMetricsMiddleware)
+
+    # Запросы к базе на HTTP-запрос: Server-Timing, предупреждения о N+1, бюджеты
+    from src.core.query_budget import QueryBudgetMiddleware
+
+    if config.QUERY_TRACKING_ENABLED:
+        app.add_middleware(
+            QueryBudgetMiddleware,
+            repeat_threshold=config.QUERY_REPEAT_THRESHOLD,
+            strict=config.QUERY_BUDGET_STRICT,
+        )
+
+    # Метка записи клиента: чтение своих изменений с основной базы на любом процессе
+    from src.core.database import ReadYourWritesMiddleware
+
+    if config.DB_REPLICA_URLS.strip():
+        app.add_middleware(ReadYourWritesMiddleware)
+
+    # Include routers
+    from src.views.main import router as main_router
+    from src.api.router import api_router
+
+    app.include_router(main_router)
+    app.include_router(api_router)
+
+    @app.get("/api/health")
+    async def health_check():
+        return {
+            "status": "healthy",
+            "message": "Vet Clinic API is running",
+            "environment": config.ENV,
+            "debug": config.DEBUG
+        }
+
+    if config.METRICS_ENABLED:
+        @app.get("/metrics", include_in_schema=False)
+        async def metrics():
+            """Метрики в текстовом формате Prometheus."""
+            return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+    return app
+
+
+def warm_up() -> None:
+    """Работа, которую иначе выполнил бы первый запрос: конфигурация мапперов SQLAlchemy."""
+    from sqlalchemy.orm import configure_mappers
+
+    import src.models  # noqa: F401 — все модели до конфигурации
+
+    configure_mappers()
+
+
+def __getattr__(name: str):
+    # uvicorn src.main:app: приложение создается при первом обращении, а не при импорте
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Запуск приложения
 if __name__ == "__main__":
+    import uvicorn
+
+    from src.core.config import get_config
+
+    # Режим из аргументов командной строки; процессы uvicorn с reload получают его через ENV
+    config = get_config(sys.argv[1] if len(sys.argv) > 1 else None)
+    os.environ["ENV"] = config.ENV
+
     print("🚀 Запуск Vet Clinic API...")
     print(f"📊 Режим: {config.ENV}")
     print(f"🐛 Debug: {config.DEBUG}")
@@ -63,8 +220,8 @@ if __name__ == "__main__":
     else:
         # Production/Testing режим - без reload
         uvicorn.run(
-            app,  # Можно передавать объект
+            create_app(config),
             host="0.0.0.0",
             port=8000,
             log_level="info"
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,16 @@
+"""
+Модели приложения.
+
+Связи между моделями заданы строками, поэтому все модели должны быть
+импортированы до первой конфигурации мапперов — импорт любого модуля
+``src.models.*`` сначала выполняет этот файл.
+"""
+from .base import Base, BaseModel
+from .clinic import Clinic
+from .service_specialist import service_specialist
+from .service import Service
+from .specialist import Specialist
+from .promotion import Promotion
+from .user import Client, ClinicStaff
+from .appointment import Appointment
+from .news import News, NewsBlock
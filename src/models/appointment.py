@@ -0,0 +1,61 @@
+from sqlalchemy import Text, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from datetime import datetime
+from enum import StrEnum
+from typing import Optional
+from .base import BaseModel
+
+
+class AppointmentStatus(StrEnum):
+    SCHEDULED = "scheduled"
+    CONFIRMED = "confirmed"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    NO_SHOW = "no_show"
+
+
+# Статусы, при которых запись занимает время специалиста
+BLOCKING_STATUSES = (
+    AppointmentStatus.SCHEDULED,
+    AppointmentStatus.CONFIRMED,
+    AppointmentStatus.COMPLETED,
+)
+
+
+class Appointment(BaseModel):
+    """
+    Модель записи на прием.
+
+    Запись занимает интервал ``[starts_at, ends_at)`` у специалиста.
+    Время хранится без часового пояса, в местном времени клиники —
+    так же, как часы работы клиники (``Clinic.start_time``/``end_time``).
+    """
+    __tablename__ = "appointments"
+    __table_args__ = (
+        # Поиск занятых интервалов специалистов за период
+        Index("ix_appointments_specialist_id_starts_at", "specialist_id", "starts_at"),
+        Index("ix_appointments_client_id_starts_at", "client_id", "starts_at"),
+    )
+
+    starts_at: Mapped[datetime] = mapped_column(DateTime, doc="Начало приема (местное время клиники)")
+    ends_at: Mapped[datetime] = mapped_column(DateTime, doc="Окончание приема (не включительно)")
+    status: Mapped[AppointmentStatus] = mapped_column(Enum(AppointmentStatus), default=AppointmentStatus.SCHEDULED,
+                                                      doc="Статус записи")
+    notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True, doc="Комментарий к записи")
+    reminder_sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True,
+                                                                  doc="Когда напоминание поставлено в очередь (UTC)")
+
+    # Foreign keys
+    clinic_id: Mapped[int] = mapped_column(ForeignKey("clinics.id"), doc="ID клиники")
+    specialist_id: Mapped[int] = mapped_column(ForeignKey("specialists.id"), doc="ID специалиста (карточка каталога)")
+    service_id: Mapped[Optional[int]] = mapped_column(ForeignKey("services.id"), nullable=True, doc="ID услуги")
+    client_id: Mapped[int] = mapped_column(ForeignKey("clients.id"), doc="ID клиента")
+    doctor_id: Mapped[Optional[int]] = mapped_column(ForeignKey("clinic_staff.id"), nullable=True,
+                                                     doc="ID учетной записи врача, если она есть")
+
+    # Relationships
+    clinic: Mapped["Clinic"] = relationship()
+    specialist: Mapped["Specialist"] = relationship()
+    service: Mapped[Optional["Service"]] = relationship()
+    client: Mapped["Client"] = relationship(back_populates="appointments", foreign_keys=[client_id])
+    doctor: Mapped[Optional["ClinicStaff"]] = relationship(back_populates="appointments", foreign_keys=[doctor_id])
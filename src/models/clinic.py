@@ -1,4 +1,4 @@
-from sqlalchemy import String, Text, Time
+from sqlalchemy import Float, String, Text, Time, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Optional
 from .base import BaseModel
@@ -12,6 +12,10 @@ class Clinic(BaseModel):
     с полной контактной информацией и описанием.
     """
     __tablename__ = "clinics"
+    __table_args__ = (
+        Index("ix_clinics_created_at_id", "created_at", "id"),  # ключ keyset-пагинации
+        Index("ix_clinics_latitude_longitude", "latitude", "longitude"),  # bounding box поиска ближайших
+    )
 
     name: Mapped[str] = mapped_column(String(100), index=True, doc="Название клиники (макс. 100 символов)")
     address: Mapped[str] = mapped_column(Text, doc="Полный адрес клиники")
@@ -22,6 +26,8 @@ class Clinic(BaseModel):
         doc="Флаг круглосуточной работы. Если True, поля start_time и end_time игнорируются"
     )
     map_url: Mapped[Optional[str]] = mapped_column(String(500), doc="Ссылка URL карты или навигационного сервиса")
+    latitude: Mapped[Optional[float]] = mapped_column(Float, doc="Широта в градусах (WGS 84)")
+    longitude: Mapped[Optional[float]] = mapped_column(Float, doc="Долгота в градусах (WGS 84)")
     start_time: Mapped[str | None] = mapped_column(Time, doc="Время начала работы в формате HH:MM.")
     end_time: Mapped[str | None] = mapped_column(Time, doc="Время окончания работы в формате HH:MM.")
     description: Mapped[Optional[str]] = mapped_column(Text, doc="Подробное описание клиники")
@@ -38,3 +44,11 @@ class Clinic(BaseModel):
         cascade="all, delete-orphan",
         doc="Список услуг клиники"
     )
+    promotions: Mapped[list["Promotion"]] = relationship(
+        back_populates="clinic",
+        doc="Акции, привязанные к клинике"
+    )
+    staff: Mapped[list["ClinicStaff"]] = relationship(
+        back_populates="clinic",
+        doc="Учетные записи персонала клиники"
+    )
@@ -1,11 +1,15 @@
-from sqlalchemy import String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import String, Text, DateTime, ForeignKey, Enum, Index, text
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from .base import BaseModel
+from .search import (
+    register_parent_touch_trigger, register_search_trigger, search_vector_index, trigram_index, weighted
+)
 from enum import StrEnum
 
 
-class ImagePosition(str, StrEnum):
+class ImagePosition(StrEnum):
     LEFT = "left"
     RIGHT = "right"
     TOP = "top"
@@ -21,7 +25,7 @@ class NewsBlock(BaseModel):
     """
     __tablename__ = "news_blocks"
 
-    news_id: Mapped[int] = mapped_column(ForeignKey("news.id", ondelete="CASCADE"),
+    news_id: Mapped[int] = mapped_column(ForeignKey("news.id", ondelete="CASCADE"), index=True,
                                          doc="ID новости, к которой принадлежит блок")
     title: Mapped[str | None] = mapped_column(String(200), nullable=True, doc="Заголовок блока (опционально)")
     text_content: Mapped[str | None] = mapped_column(Text, nullable=True,  doc="Текстовое содержание блока")
@@ -29,7 +33,7 @@ class NewsBlock(BaseModel):
     image_position: Mapped[ImagePosition | None] = mapped_column(Enum(ImagePosition), nullable=True,
                                                                  doc="Позиция изображения относительно текста")
     order: Mapped[int] = mapped_column(default=0, doc="Порядок блока в новости")
-    meta: Mapped[dict | None] = mapped_column(Text, nullable=True, doc="Дополнительные метаданные в формате JSON")
+    meta: Mapped[dict | None] = mapped_column(JSONB, nullable=True, doc="Дополнительные метаданные (JSONB)")
 
     # Relationship
     news: Mapped["News"] = relationship(back_populates="blocks")
@@ -43,23 +47,41 @@ class News(BaseModel):
     с информацией об авторе и статусе публикации.
     """
     __tablename__ = "news"
+    __table_args__ = (
+        search_vector_index("news"),
+        trigram_index("news", "title"),
+        # Лента опубликованных новостей: keyset по (publication_date, id), от свежих
+        Index("ix_news_published_date_id", "publication_date", "id", postgresql_where=text("is_published")),
+    )
 
     title: Mapped[str] = mapped_column(String(200), doc="Заголовок новости")
     excerpt: Mapped[str | None] = mapped_column(Text, nullable=True, doc="Краткое описание новости для превью")
     publication_date: Mapped[datetime] = mapped_column(DateTime, doc="Дата публикации")
     cover_image: Mapped[str | None] = mapped_column(String(255), nullable=True, doc="URL обложки новости")
     is_published: Mapped[bool] = mapped_column(default=False, doc="Флаг публикации (True/False)")
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR, nullable=True, deferred=True,
+        doc="Поисковый документ (заголовок, превью, текст блоков); заполняется триггером БД")
+
+    # Готовая статья; заполняется при публикации и изменении (post_service.render_news)
+    rendered_html: Mapped[str | None] = mapped_column(
+        Text, nullable=True, deferred=True, doc="HTML статьи (блоки в порядке отображения)")
+    rendered_json: Mapped[str | None] = mapped_column(
+        Text, nullable=True, deferred=True, doc="JSON статьи для API, уже сериализованный")
+    rendered_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True, doc="Когда статья была отрендерена")
 
     # Foreign key
     author_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id"),
-        doc="ID пользователя-автора новости"
+        ForeignKey("clinic_staff.id"),
+        index=True,
+        doc="ID сотрудника-автора новости"
     )
 
     # Relationships
-    author: Mapped["User"] = relationship(
+    author: Mapped["ClinicStaff"] = relationship(
         back_populates="news",
-        doc="Объект пользователя-автора новости"
+        doc="Сотрудник-автор новости"
     )
     blocks: Mapped[list["NewsBlock"]] = relationship(
         "NewsBlock",
@@ -68,3 +90,17 @@ class News(BaseModel):
         order_by="NewsBlock.order",
         doc="Блоки новости в порядке отображения"
     )
+
+
+register_search_trigger(
+    News.__table__,
+    " || ".join((
+        weighted("NEW.title", "A"),
+        weighted("NEW.excerpt", "B"),
+        weighted(
+            "(SELECT string_agg(text_content, ' ' ORDER BY \"order\") FROM news_blocks WHERE news_id = NEW.id)",
+            "C",
+        ),
+    )),
+)
+register_parent_touch_trigger(NewsBlock.__table__, "news", "news_id")
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Text, Integer, DateTime, Numeric, ForeignKey, ARRAY
+from sqlalchemy import String, Text, Integer, DateTime, Numeric, ForeignKey, ARRAY, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from .base import BaseModel
@@ -12,6 +12,16 @@ class Promotion(BaseModel):
     и информацией о скидке или специальных условиях.
     """
     __tablename__ = "promotions"
+    __table_args__ = (
+        Index("ix_promotions_created_at_id", "created_at", "id"),  # ключ keyset-пагинации
+        # Действующие акции: окно дат среди включенных
+        Index("ix_promotions_active_end_date", "end_date", "start_date",
+              postgresql_where=text("is_active")),
+        # Акции услуги: service_ids @> ARRAY[id]
+        Index("ix_promotions_service_ids", "service_ids", postgresql_using="gin"),
+        # Инкрементальное обновление индекса акций по updated_at
+        Index("ix_promotions_updated_at", "updated_at"),
+    )
 
     title: Mapped[str] = mapped_column(String(200), doc="Заголовок акции (макс. 200 символов)")
     short_description: Mapped[str | None] = mapped_column(
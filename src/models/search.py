@@ -0,0 +1,104 @@
+"""
+DDL полнотекстового поиска.
+
+Колонки ``search_vector`` заполняются триггерами PostgreSQL, а не приложением:
+документ новости включает текст ее блоков из другой таблицы, а
+``array_to_string`` (теги услуг) нельзя использовать в генерируемой колонке.
+DDL выполняется вместе с ``metadata.create_all`` только на PostgreSQL.
+"""
+from sqlalchemy import DDL, Index, Table, event
+
+from .base import BaseModel
+
+# Триграммы нужны для нечеткого поиска (опечатки в фамилиях и названиях)
+event.listen(
+    BaseModel.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+def weighted(column: str, weight: str, *, config: str = "russian") -> str:
+    """SQL-выражение взвешенного tsvector для колонки строки NEW."""
+    return f"setweight(to_tsvector('{config}', coalesce({column}, '')), '{weight}')"
+
+
+def search_vector_index(table_name: str) -> Index:
+    """GIN-индекс по колонке search_vector."""
+    return Index(f"ix_{table_name}_search_vector", "search_vector", postgresql_using="gin")
+
+
+def trigram_index(table_name: str, column: str) -> Index:
+    """GIN-индекс триграмм для операторов ``%`` и ``similarity``."""
+    return Index(
+        f"ix_{table_name}_{column}_trgm",
+        column,
+        postgresql_using="gin",
+        postgresql_ops={column: "gin_trgm_ops"},
+    )
+
+
+def register_search_trigger(table: Table, document: str) -> None:
+    """
+    Создает триггер, пересчитывающий ``search_vector`` при INSERT/UPDATE строки.
+
+    Args:
+        table: Таблица с колонкой search_vector
+        document: SQL-выражение tsvector над строкой ``NEW``
+    """
+    function = f"{table.name}_search_vector_update"
+    event.listen(
+        table,
+        "after_create",
+        DDL(
+            f"CREATE OR REPLACE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$\n"
+            f"BEGIN\n"
+            f"  NEW.search_vector := {document};\n"
+            f"  RETURN NEW;\n"
+            f"END\n"
+            f"$$"
+        ).execute_if(dialect="postgresql"),
+    )
+    event.listen(
+        table,
+        "after_create",
+        DDL(
+            f"CREATE TRIGGER {function} BEFORE INSERT OR UPDATE ON {table.name} "
+            f"FOR EACH ROW EXECUTE FUNCTION {function}()"
+        ).execute_if(dialect="postgresql"),
+    )
+
+
+def register_parent_touch_trigger(table: Table, parent_table: str, foreign_key: str) -> None:
+    """
+    Создает триггер, который "касается" родительской строки при изменении дочерних.
+
+    Пустой UPDATE родителя заново запускает его триггер поиска, поэтому
+    документ новости остается согласованным с текстом ее блоков.
+    """
+    function = f"{table.name}_touch_{parent_table}"
+    event.listen(
+        table,
+        "after_create",
+        DDL(
+            f"CREATE OR REPLACE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$\n"
+            f"BEGIN\n"
+            f"  IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.{foreign_key} IS DISTINCT FROM NEW.{foreign_key}) THEN\n"
+            f"    UPDATE {parent_table} SET id = id WHERE id = OLD.{foreign_key};\n"
+            f"  END IF;\n"
+            f"  IF TG_OP <> 'DELETE' THEN\n"
+            f"    UPDATE {parent_table} SET id = id WHERE id = NEW.{foreign_key};\n"
+            f"  END IF;\n"
+            f"  RETURN NULL;\n"
+            f"END\n"
+            f"$$"
+        ).execute_if(dialect="postgresql"),
+    )
+    event.listen(
+        table,
+        "after_create",
+        DDL(
+            f"CREATE TRIGGER {function} AFTER INSERT OR UPDATE OR DELETE ON {table.name} "
+            f"FOR EACH ROW EXECUTE FUNCTION {function}()"
+        ).execute_if(dialect="postgresql"),
+    )
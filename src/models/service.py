@@ -1,8 +1,10 @@
-from sqlalchemy import String, Text, Integer, ForeignKey, Numeric, ARRAY, Enum
+from sqlalchemy import String, Text, Integer, ForeignKey, Numeric, ARRAY, Enum, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import BaseModel
 from enum import StrEnum
 from .service_specialist import service_specialist
+from .search import register_search_trigger, search_vector_index, trigram_index, weighted
 
 
 class ServiceCategory(StrEnum):
@@ -35,6 +37,13 @@ class Service(BaseModel):
     с детальной информацией о стоимости, продолжительности, категории и других параметрах.
     """
     __tablename__ = "services"
+    __table_args__ = (
+        # Ключи keyset-пагинации: общий каталог и каталог конкретной клиники
+        Index("ix_services_order_index_id", "order_index", "id"),
+        Index("ix_services_clinic_id_order_index_id", "clinic_id", "order_index", "id"),
+        search_vector_index("services"),
+        trigram_index("services", "name"),
+    )
 
     name: Mapped[str] = mapped_column(String(100), doc="Название услуги (макс. 100 символов)")
     short_description: Mapped[str | None] = mapped_column(
@@ -66,6 +75,9 @@ class Service(BaseModel):
     gallery: Mapped[list[str] | None] = mapped_column(ARRAY(String), nullable=True,
                                                       doc="Массив URL дополнительных изображений")
     order_index: Mapped[int] = mapped_column(Integer, default=0, doc="Порядковый индекс для сортировки")
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR, nullable=True, deferred=True,
+        doc="Поисковый документ (название, теги, описания); заполняется триггером БД")
 
     # Foreign keys
     clinic_id: Mapped[int] = mapped_column(ForeignKey("clinics.id"), doc="ID клиники, предоставляющей услугу")
@@ -80,3 +92,15 @@ class Service(BaseModel):
         back_populates="services",
         doc="Специалисты, которые предоставляют эту услугу"
     )
+
+
+register_search_trigger(
+    Service.__table__,
+    " || ".join((
+        weighted("NEW.name", "A"),
+        weighted("NEW.name", "A", config="simple"),
+        weighted("array_to_string(NEW.tags, ' ')", "B"),
+        weighted("NEW.short_description", "C"),
+        weighted("NEW.description", "D"),
+    )),
+)
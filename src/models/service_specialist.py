@@ -1,9 +1,11 @@
-from sqlalchemy import Table, Column, ForeignKey
+from sqlalchemy import Table, Column, ForeignKey, Index
 from .base import BaseModel
 
 service_specialist = Table(
     'service_specialist',
     BaseModel.metadata,
     Column('service_id', ForeignKey('services.id', ondelete='CASCADE'), primary_key=True),
-    Column('specialist_id', ForeignKey('specialists.id', ondelete='CASCADE'), primary_key=True)
+    Column('specialist_id', ForeignKey('specialists.id', ondelete='CASCADE'), primary_key=True),
+    # Первичный ключ покрывает поиск по service_id; обратное направление — отдельный индекс
+    Index('ix_service_specialist_specialist_id', 'specialist_id'),
 )
@@ -1,8 +1,10 @@
-from sqlalchemy import String, Integer, Text, ForeignKey
+from sqlalchemy import String, Integer, Text, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Optional
 from .base import BaseModel
 from .service_specialist import service_specialist  # Импортируем таблицу связи
+from .search import register_search_trigger, search_vector_index, trigram_index, weighted
 
 
 class Specialist(BaseModel):
@@ -13,6 +15,13 @@ class Specialist(BaseModel):
     и связью с конкретной клиникой и услугами.
     """
     __tablename__ = "specialists"
+    __table_args__ = (
+        # Ключи keyset-пагинации: общий список и список специалистов клиники
+        Index("ix_specialists_created_at_id", "created_at", "id"),
+        Index("ix_specialists_clinic_id_created_at_id", "clinic_id", "created_at", "id"),
+        search_vector_index("specialists"),
+        trigram_index("specialists", "last_name"),
+    )
 
     first_name: Mapped[str] = mapped_column(String(50), doc="Имя специалиста (макс. 50 символов)")
     last_name: Mapped[str] = mapped_column(String(50), doc="Фамилия специалиста (макс. 50 символов)")
@@ -22,6 +31,9 @@ class Specialist(BaseModel):
     experience: Mapped[int | None] = mapped_column(Integer, nullable=True, doc="Опыт работы в годах")
     description: Mapped[str | None] = mapped_column(Text, nullable=True, doc="Подробное описание специалиста")
     photo_url: Mapped[str | None] = mapped_column(String(255), nullable=True, doc="URL фотографии (макс. 255 символов)")
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR, nullable=True, deferred=True,
+        doc="Поисковый документ (ФИО, специализация); заполняется триггером БД")
 
     # Foreign key
     clinic_id: Mapped[int] = mapped_column(ForeignKey("clinics.id"), doc="ID клиники, к которой привязан специалист")
@@ -36,4 +48,16 @@ class Specialist(BaseModel):
         secondary=service_specialist,
         back_populates="specialists",
         doc="Услуги, которые предоставляет специалист"
-    )
\ No newline at end of file
+    )
+
+
+# Фамилии и имена индексируются и без стемминга (simple): "Иванова" не должна сводиться к "иван"
+register_search_trigger(
+    Specialist.__table__,
+    " || ".join((
+        weighted("NEW.last_name", "A", config="simple"),
+        weighted("NEW.first_name", "B", config="simple"),
+        weighted("NEW.patronymic", "C", config="simple"),
+        weighted("NEW.specialization", "B"),
+    )),
+)
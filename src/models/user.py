@@ -61,6 +61,7 @@ class ClinicStaff(BaseUser):
     clinic: Mapped["Clinic"] = relationship("Clinic", back_populates="staff")
     appointments: Mapped[list["Appointment"]] = relationship("Appointment", back_populates="doctor",
                                                              foreign_keys="Appointment.doctor_id")
+    news: Mapped[list["News"]] = relationship("News", back_populates="author")
 
 
 class Client(BaseUser):
@@ -86,4 +87,5 @@ class Client(BaseUser):
     # Relationships
     appointments: Mapped[list["Appointment"]] = relationship("Appointment", back_populates="client",
                                                              foreign_keys="Appointment.client_id")
-    medical_records: Mapped[list["MedicalRecord"]] = relationship("MedicalRecord", back_populates="client")
+    # Модели MedicalRecord пока нет; связь ломала конфигурацию всех мапперов
+    # medical_records: Mapped[list["MedicalRecord"]] = relationship("MedicalRecord", back_populates="client")
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+from typing import List
+
+
+class AvailableSlot(BaseModel):
+    """Свободный слот специалиста."""
+    specialist_id: int = Field(..., description="ID специалиста")
+    starts_at: datetime = Field(..., description="Начало (местное время клиники)")
+    ends_at: datetime = Field(..., description="Окончание")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SpecialistAvailability(BaseModel):
+    """Свободные слоты одного специалиста."""
+    specialist_id: int = Field(..., description="ID специалиста")
+    slots: List[AvailableSlot] = Field(default_factory=list, description="Слоты в порядке времени")
@@ -0,0 +1,30 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from enum import Enum
+
+
+class ImportKind(str, Enum):
+    SERVICES = "services"
+    SPECIALISTS = "specialists"
+
+
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class ImportRowError(BaseModel):
+    """Ошибка в строке файла импорта."""
+    row: int = Field(..., description="Номер строки в файле (для CSV с учетом заголовка)")
+    field: Optional[str] = Field(None, description="Поле с ошибкой")
+    message: str = Field(..., description="Описание ошибки")
+
+
+class ImportReport(BaseModel):
+    """Результат импорта."""
+    kind: ImportKind
+    total: int = Field(..., description="Строк в файле")
+    inserted: int = Field(0, description="Создано записей")
+    updated: int = Field(0, description="Обновлено записей")
+    failed: int = Field(0, description="Строк с ошибками")
+    errors: List[ImportRowError] = Field(default_factory=list, description="Ошибки по строкам")
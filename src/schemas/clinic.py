@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field, field_validator, ConfigDict, ValidationInfo
+from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict, ValidationInfo
 from datetime import time, datetime
-from typing import Optional
+from typing import Any, Optional
 
 
 class ClinicBase(BaseModel):
@@ -17,35 +17,39 @@ class ClinicBase(BaseModel):
         max_length=500,
         description="Ссылка на схему проезда (URL карты или навигационного сервиса)"
     )
+    latitude: float | None = Field(None, ge=-90, le=90, description="Широта в градусах")
+    longitude: float | None = Field(
+        None, ge=-180, le=180, validate_default=True, description="Долгота в градусах"
+    )
     description: str | None = Field(None, description="Описание клиники")
     is_active: bool = Field(default=True, description="Активна ли клиника")
 
     @field_validator('start_time', 'end_time')
     @classmethod
     def validate_working_hours(cls, v: Optional[time], info: ValidationInfo) -> Optional[time]:
-        """Валидация времени работы."""
-        data = info.data
-        is_24_7 = data.get('is_24_7', False)
-
-        if is_24_7 and v is not None:
-            raise ValueError("Время работы не должно указываться для круглосуточной клиники")
-
-        if not is_24_7 and v is None:
+        """
+        Валидация времени работы.
+
+        Проверяется только переданное время: значение по умолчанию (None) не проверяется.
+        """
+        if info.data.get('is_24_7', False):
+            if v is not None:
+                raise ValueError("Время работы не должно указываться для круглосуточной клиники")
+            return v
+        if v is None:
             raise ValueError("Время работы обязательно для не круглосуточных клиник")
-
+        if info.field_name == 'end_time':
+            start_time = info.data.get('start_time')
+            if start_time is not None and v <= start_time:
+                raise ValueError("Время окончания должно быть после времени начала")
         return v
 
-    @field_validator('end_time')
+    @field_validator('longitude')
     @classmethod
-    def validate_end_time(cls, v: Optional[time], info: ValidationInfo) -> Optional[time]:
-        """Валидация что время окончания после времени начала."""
-        data = info.data
-        start_time = data.get('start_time')
-        is_24_7 = data.get('is_24_7', False)
-
-        if not is_24_7 and start_time and v and v <= start_time:
-            raise ValueError("Время окончания должно быть после времени начала")
-
+    def validate_coordinates(cls, v: float | None, info: ValidationInfo) -> float | None:
+        """Координаты указываются парой: широта без долготы (и наоборот) не принимается."""
+        if 'latitude' in info.data and (info.data['latitude'] is None) != (v is None):
+            raise ValueError("Координаты указываются вместе: широта и долгота")
         return v
 
     @field_validator('map_url')
@@ -76,9 +80,25 @@ class ClinicUpdate(BaseModel):
         max_length=500,
         description="Ссылка на схему проезда (URL карты или навигационного сервиса)"
     )
+    latitude: Optional[float] = Field(None, ge=-90, le=90, description="Широта в градусах")
+    longitude: Optional[float] = Field(None, ge=-180, le=180, description="Долгота в градусах")
     description: Optional[str] = Field(None, description="Описание клиники")
     is_active: Optional[bool] = Field(None, description="Активна ли клиника")
 
+    @model_validator(mode='before')
+    @classmethod
+    def validate_coordinates(cls, data: Any) -> Any:
+        """
+        Координаты меняются только парой (или обе сбрасываются).
+
+        Проверяется наличие ключей в запросе, а не значения полей: без пары
+        клиника осталась бы с одной координатой и выпала бы из поиска ближайших.
+        """
+        if isinstance(data, dict) and ('latitude' in data or 'longitude' in data):
+            if ('latitude' in data) != ('longitude' in data) or (data['latitude'] is None) != (data['longitude'] is None):
+                raise ValueError("Координаты указываются вместе: широта и долгота")
+        return data
+
 
 class Clinic(ClinicBase):
     """Схема для возврата клиники."""
@@ -86,4 +106,9 @@ class Clinic(ClinicBase):
 
     id: int
     created_at: datetime
-    updated_at: Optional[datetime]
\ No newline at end of file
+    updated_at: Optional[datetime]
+
+
+class ClinicNearby(Clinic):
+    """Клиника с расстоянием до точки поиска."""
+    distance_km: float = Field(..., description="Расстояние по поверхности Земли, км")
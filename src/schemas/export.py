@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+class ExportKind(str, Enum):
+    CLIENTS = "clients"
+    SERVICES = "services"
+    PROMOTIONS = "promotions"
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
@@ -1,11 +1,13 @@
-from pydantic import BaseModel, Field, ConfigDict, validator, field_validator
+from pydantic import BaseModel, Field, ConfigDict, ValidationInfo, computed_field, field_validator
 from datetime import datetime
 from typing import List, Optional
 from enum import StrEnum
-import json
 
+from src.schemas.validators import is_image_url, is_json_serializable, utc_naive
+from src.storage.images import image_storage
 
-class ImagePosition(str, StrEnum):
+
+class ImagePosition(StrEnum):
     LEFT = "left"
     RIGHT = "right"
     TOP = "top"
@@ -28,31 +30,24 @@ class NewsBlockBase(BaseModel):
     @classmethod
     def validate_image_url(cls, v: str | None) -> str | None:
         """Валидация URL изображения."""
-        if v and not v.startswith(('http://', 'https://', '/media/')):
+        if v and not is_image_url(v):
             raise ValueError("URL изображения должен начинаться с http://, https:// или /media/")
         return v
 
     @field_validator('image_position')
     @classmethod
-    def validate_image_position(cls, v: ImagePosition | None, values):
+    def validate_image_position(cls, v: ImagePosition | None, info: ValidationInfo) -> ImagePosition | None:
         """Валидация позиции изображения."""
-        text_content = values.data.get('text_content')
-        image_url = values.data.get('image_url')
-
-        if v is not None:
-            if not text_content or not image_url:
-                raise ValueError("Позиция изображения может быть указана только если есть и текст и изображение")
+        if v is not None and (not info.data.get('text_content') or not info.data.get('image_url')):
+            raise ValueError("Позиция изображения может быть указана только если есть и текст и изображение")
         return v
 
     @field_validator('meta')
     @classmethod
     def validate_meta(cls, v: dict | None) -> dict | None:
         """Валидация метаданных."""
-        if v is not None:
-            try:
-                json.dumps(v)  # Проверяем что можно сериализовать в JSON
-            except TypeError:
-                raise ValueError("Meta должен быть валидным JSON-объектом")
+        if v is not None and not is_json_serializable(v):
+            raise ValueError("Meta должен быть валидным JSON-объектом")
         return v
 
 
@@ -83,6 +78,11 @@ class NewsBlock(NewsBlockBase):
     created_at: datetime
     updated_at: datetime | None
 
+    @computed_field(description="srcset уменьшенных копий изображения; пуст, пока копии не построены")
+    @property
+    def image_srcset(self) -> str:
+        return image_storage.srcset(self.image_url)
+
 
 class NewsBase(BaseModel):
     """Базовая схема новости."""
@@ -96,7 +96,7 @@ class NewsBase(BaseModel):
     @classmethod
     def validate_cover_image(cls, v: str | None) -> str | None:
         """Валидация URL обложки."""
-        if v and not v.startswith(('http://', 'https://', '/media/')):
+        if v and not is_image_url(v):
             raise ValueError("URL обложки должен начинаться с http://, https:// или /media/")
         return v
 
@@ -117,7 +117,13 @@ class NewsBase(BaseModel):
 
 class NewsCreate(NewsBase):
     """Схема для создания новости."""
-    publication_date: datetime = Field(default_factory=datetime.now, description="Дата публикации")
+    publication_date: datetime = Field(default_factory=datetime.utcnow, description="Дата публикации (UTC)")
+
+    @field_validator('publication_date')
+    @classmethod
+    def validate_publication_date(cls, v: datetime) -> datetime:
+        """Дата публикации в UTC без часового пояса."""
+        return utc_naive(v)
 
 
 class NewsUpdate(BaseModel):
@@ -126,7 +132,20 @@ class NewsUpdate(BaseModel):
     excerpt: str | None = Field(None, description="Краткое описание новости")
     cover_image: str | None = Field(None, description="URL обложки новости")
     is_published: bool | None = Field(None, description="Флаг публикации")
-    publication_date: datetime | None = Field(None, description="Дата публикации")
+    publication_date: datetime | None = Field(None, description="Дата публикации (UTC)")
+    blocks: List[NewsBlockCreate] | None = Field(None, description="Новый набор блоков (заменяет текущий)")
+
+    @field_validator('publication_date')
+    @classmethod
+    def validate_publication_date(cls, v: datetime | None) -> datetime | None:
+        """Дата публикации в UTC без часового пояса."""
+        return utc_naive(v) if v is not None else v
+
+    @field_validator('blocks')
+    @classmethod
+    def validate_blocks(cls, v: List[NewsBlockCreate] | None) -> List[NewsBlockCreate] | None:
+        """Валидация блоков (как при создании)."""
+        return NewsBase.validate_blocks(v) if v is not None else v
 
 
 class News(NewsBase):
@@ -140,8 +159,24 @@ class News(NewsBase):
     updated_at: datetime | None
     blocks: List[NewsBlock] = Field(..., description="Блоки новости")
 
+    @computed_field(description="srcset уменьшенных копий обложки; пуст, пока копии не построены")
+    @property
+    def cover_srcset(self) -> str:
+        return image_storage.srcset(self.cover_image)
+
 
 class NewsWithAuthor(News):
     """Схема новости с информацией об авторе."""
-    author_username: str = Field(..., description="Имя автора")
-    author_email: str | None = Field(None, description="Email автора")
\ No newline at end of file
+    author_name: str = Field(..., description="Имя автора")
+    author_email: str | None = Field(None, description="Email автора")
+
+
+class NewsPreview(BaseModel):
+    """Схема новости для списков (без блоков)."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    excerpt: str | None
+    cover_image: str | None
+    publication_date: datetime
\ No newline at end of file
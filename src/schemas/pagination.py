@@ -0,0 +1,10 @@
+from pydantic import BaseModel, Field
+from typing import Generic, List, TypeVar
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """Страница списка с курсором на следующую."""
+    items: List[T] = Field(..., description="Элементы страницы")
+    next_cursor: str | None = Field(None, description="Курсор следующей страницы (None для последней)")
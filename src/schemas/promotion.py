@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field, ConfigDict, validator, field_validator
+from pydantic import BaseModel, Field, ConfigDict, ValidationInfo, field_validator
 from datetime import datetime
 from typing import List, Optional
 from enum import Enum
 
+from src.schemas.validators import IMAGE_URL_PREFIXES, is_image_url
+
 
 class DiscountType(str, Enum):
     PERCENTAGE = "percentage"
@@ -31,43 +33,46 @@ class PromotionBase(BaseModel):
     clinic_id: int | None = Field(None, description="ID клиники")
     service_ids: List[int] | None = Field(None, description="ID услуг")
 
-    @field_validator('end_date')
-    @classmethod
-    def validate_end_date(cls, v: datetime, values):
-        """Валидация даты окончания."""
-        start_date = values.data.get('start_date')
-        if start_date and v <= start_date:
-            raise ValueError("Дата окончания должна быть после даты начала")
-        return v
-
     @field_validator('discount_value')
     @classmethod
-    def validate_discount_value(cls, v: float | None, values):
-        """Валидация значения скидки."""
-        discount_type = values.data.get('discount_type')
-
-        if discount_type == DiscountType.PERCENTAGE and v is not None:
+    def validate_discount_value(cls, v: float | None, info: ValidationInfo) -> float | None:
+        """Валидация значения скидки по ее типу."""
+        if v is None:
+            return v
+        discount_type = info.data.get('discount_type')
+        if discount_type is DiscountType.PERCENTAGE:
             if v > 100:
                 raise ValueError("Процент скидки не может превышать 100%")
             if v <= 0:
                 raise ValueError("Процент скидки должен быть положительным")
+        elif discount_type is DiscountType.FIXED and v <= 0:
+            raise ValueError("Фиксированная скидка должна быть положительной")
+        return v
 
-        elif discount_type == DiscountType.FIXED and v is not None:
-            if v <= 0:
-                raise ValueError("Фиксированная скидка должна быть положительной")
+    @field_validator('end_date')
+    @classmethod
+    def validate_end_date(cls, v: datetime, info: ValidationInfo) -> datetime:
+        """Валидация даты окончания."""
+        start_date = info.data.get('start_date')
+        if start_date is not None and v <= start_date:
+            raise ValueError("Дата окончания должна быть после даты начала")
+        return v
 
+    @field_validator('image_url')
+    @classmethod
+    def validate_image_url(cls, v: str | None) -> str | None:
+        """Валидация URL изображения."""
+        if v is not None and not is_image_url(v):
+            raise ValueError("URL изображения должен начинаться с http://, https:// или /media/")
         return v
 
-    @field_validator('image_url', 'gallery')
+    @field_validator('gallery')
     @classmethod
-    def validate_image_urls(cls, v, values):
-        """Валидация URL изображений."""
-        if isinstance(v, str):
-            if v and not v.startswith(('http://', 'https://', '/media/')):
-                raise ValueError("URL изображения должен начинаться с http://, https:// или /media/")
-        elif isinstance(v, list):
+    def validate_gallery(cls, v: List[str] | None) -> List[str] | None:
+        """Валидация URL галереи."""
+        if v is not None:
             for url in v:
-                if url and not url.startswith(('http://', 'https://', '/media/')):
+                if url and not url.startswith(IMAGE_URL_PREFIXES):
                     raise ValueError("URL изображения должен начинаться с http://, https:// или /media/")
         return v
 
@@ -0,0 +1,25 @@
+from pydantic import BaseModel, Field
+from enum import Enum
+from typing import List
+
+
+class SearchEntity(str, Enum):
+    SERVICE = "service"
+    SPECIALIST = "specialist"
+    NEWS = "news"
+
+
+class SearchResult(BaseModel):
+    """Один результат поиска."""
+    type: SearchEntity = Field(..., description="Тип найденного объекта")
+    id: int = Field(..., description="ID объекта")
+    title: str = Field(..., description="Название услуги, ФИО специалиста или заголовок новости")
+    snippet: str | None = Field(None, description="Краткое описание")
+    rank: float = Field(..., description="Релевантность (больше — выше)")
+
+
+class SearchResponse(BaseModel):
+    """Ответ поиска."""
+    query: str = Field(..., description="Исходный запрос")
+    fuzzy: bool = Field(False, description="Результаты дополнены нечетким (триграммным) поиском")
+    items: List[SearchResult] = Field(..., description="Результаты в порядке релевантности")
@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field, ConfigDict, field_validator, ValidationInfo
+from pydantic import BaseModel, Field, ConfigDict, ValidationInfo, computed_field, field_validator
 from datetime import datetime
 from typing import List, Optional
 from enum import Enum
 
+from src.storage.images import image_storage
+
 
 class ServiceCategory(Enum):
     CONSULTATION = "consultation"
@@ -48,30 +50,30 @@ class ServiceBase(BaseModel):
 
     @field_validator('min_price', 'max_price')
     @classmethod
-    def validate_price_range(cls, v: Optional[float], info: ValidationInfo) -> Optional[float]:
+    def validate_price_range(cls, v: float | None, info: ValidationInfo) -> float | None:
         """Валидация диапазона цен."""
-        if v is not None:
-            data = info.data
-            price = data.get('price')
-            if price is not None:
-                if 'min_price' in info.field_name and v > price:
-                    raise ValueError("Минимальная цена не может быть больше базовой")
-                if 'max_price' in info.field_name and v < price:
-                    raise ValueError("Максимальная цена не может быть меньше базовой")
+        price = info.data.get('price')
+        if v is None or price is None:
+            return v
+        if info.field_name == 'min_price':
+            if v > price:
+                raise ValueError("Минимальная цена не может быть больше базовой")
+        elif v < price:
+            raise ValueError("Максимальная цена не может быть меньше базовой")
         return v
 
     @field_validator('min_duration', 'max_duration')
     @classmethod
-    def validate_duration_range(cls, v: Optional[int], info: ValidationInfo) -> Optional[int]:
+    def validate_duration_range(cls, v: int | None, info: ValidationInfo) -> int | None:
         """Валидация диапазона продолжительности."""
-        if v is not None:
-            data = info.data
-            duration = data.get('duration_minutes')
-            if duration is not None:
-                if 'min_duration' in info.field_name and v > duration:
-                    raise ValueError("Минимальная продолжительность не может быть больше базовой")
-                if 'max_duration' in info.field_name and v < duration:
-                    raise ValueError("Максимальная продолжительность не может быть меньше базовой")
+        duration = info.data.get('duration_minutes')
+        if v is None or duration is None:
+            return v
+        if info.field_name == 'min_duration':
+            if v > duration:
+                raise ValueError("Минимальная продолжительность не может быть больше базовой")
+        elif v < duration:
+            raise ValueError("Максимальная продолжительность не может быть меньше базовой")
         return v
 
 
@@ -115,6 +117,13 @@ class Service(ServiceBase):
     created_at: datetime
     updated_at: datetime | None
     specialists: List["SpecialistShort"] = Field(..., description="Специалисты, предоставляющие услугу")
+    final_price: float | None = Field(None, description="Цена с учетом действующих акций")
+    promotion_id: int | None = Field(None, description="Акция, дающая итоговую цену")
+
+    @computed_field(description="srcset уменьшенных копий изображения; пуст, пока копии не построены")
+    @property
+    def image_srcset(self) -> str:
+        return image_storage.srcset(self.image_url)
 
 
 class ServiceWithClinic(Service):
@@ -133,3 +142,8 @@ class SpecialistShort(BaseModel):
     last_name: str
     specialization: str
     photo_url: str | None
+
+    @computed_field(description="srcset уменьшенных копий фотографии; пуст, пока копии не построены")
+    @property
+    def photo_srcset(self) -> str:
+        return image_storage.srcset(self.photo_url)
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, Field, ConfigDict, field_validator, ValidationInfo
+from pydantic import BaseModel, Field, ConfigDict, computed_field, field_validator, ValidationInfo
 from typing import List, Optional
 from datetime import datetime
 
+from src.storage.images import image_storage
+
 
 class SpecialistBase(BaseModel):
     """Базовая схема специалиста."""
@@ -58,6 +60,11 @@ class Specialist(SpecialistBase):
     updated_at: Optional[datetime] = None
     services: List["ServiceShort"] = Field(..., description="Услуги, которые предоставляет специалист")
 
+    @computed_field(description="srcset уменьшенных копий фотографии; пуст, пока копии не построены")
+    @property
+    def photo_srcset(self) -> str:
+        return image_storage.srcset(self.photo_url)
+
 
 class ServiceShort(BaseModel):
     """Короткая схема услуги для вложений."""
@@ -0,0 +1,44 @@
+from pydantic import BaseModel, Field
+from enum import Enum
+from typing import List, Optional
+
+
+class UploadKind(str, Enum):
+    IMAGES = "images"
+    VIDEOS = "videos"
+    DOCUMENTS = "documents"
+
+
+class UploadInit(BaseModel):
+    """Запрос на создание сессии загрузки."""
+    filename: str = Field(..., min_length=1, max_length=255, description="Исходное имя файла")
+    size: int = Field(..., gt=0, description="Размер файла в байтах")
+    kind: UploadKind = Field(..., description="Хранилище назначения")
+    chunk_size: Optional[int] = Field(None, description="Размер блока в байтах")
+
+
+class UploadStatus(BaseModel):
+    """Состояние сессии загрузки."""
+    id: str = Field(..., description="ID сессии")
+    kind: UploadKind
+    filename: str
+    size: int
+    chunk_size: int
+    total_chunks: int = Field(..., description="Число блоков")
+    received: List[int] = Field(default_factory=list, description="Номера принятых блоков")
+
+
+class ChunkAccepted(BaseModel):
+    """Подтверждение записи блока."""
+    index: int
+    sha256: str
+
+
+class UploadComplete(BaseModel):
+    """Запрос на завершение загрузки."""
+    sha256: Optional[str] = Field(None, min_length=64, max_length=64, description="sha256 всего файла для проверки")
+
+
+class UploadResult(BaseModel):
+    """Готовый файл."""
+    url: str = Field(..., description="URL файла в хранилище")
@@ -3,6 +3,10 @@ from datetime import datetime, date
 from typing import Optional, List
 from enum import Enum
 
+from src.schemas.validators import has_digit, phone_digits
+
+VALID_BLOOD_TYPES = frozenset(('A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-'))
+
 
 class UserRole(str, Enum):
     ADMIN = "admin"
@@ -33,7 +37,7 @@ class UserBase(BaseModel):
         """Валидация номера телефона."""
         if v is not None:
             # Убираем все нецифровые символы кроме +
-            cleaned = ''.join(c for c in v if c.isdigit() or c == '+')
+            cleaned = phone_digits(v)
             if not cleaned.startswith('+') and len(cleaned) not in (10, 11):
                 raise ValueError("Некорректный формат номера телефона")
         return v
@@ -66,7 +70,7 @@ class ClinicStaffCreate(ClinicStaffBase):
         """Валидация пароля."""
         if len(v) < 6:
             raise ValueError("Пароль должен содержать минимум 6 символов")
-        if not any(c.isdigit() for c in v):
+        if not has_digit(v):
             raise ValueError("Пароль должен содержать хотя бы одну цифру")
         return v
 
@@ -106,8 +110,7 @@ class ClientBase(UserBase):
     def validate_blood_type(cls, v: Optional[str]) -> Optional[str]:
         """Валидация группы крови."""
         if v is not None:
-            valid_blood_types = ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']
-            if v.upper() not in valid_blood_types:
+            if v.upper() not in VALID_BLOOD_TYPES:
                 raise ValueError("Некорректная группа крови")
         return v
 
@@ -116,9 +119,10 @@ class ClientBase(UserBase):
     def validate_date_of_birth(cls, v: Optional[date]) -> Optional[date]:
         """Валидация даты рождения."""
         if v is not None:
-            if v > date.today():
+            today = date.today()
+            if v > today:
                 raise ValueError("Дата рождения не может быть в будущем")
-            age = (date.today() - v).days // 365
+            age = (today - v).days // 365
             if age < 0 or age > 120:
                 raise ValueError("Некорректная дата рождения")
         return v
@@ -134,7 +138,7 @@ class ClientCreate(ClientBase):
         """Валидация пароля."""
         if len(v) < 6:
             raise ValueError("Пароль должен содержать минимум 6 символов")
-        if not any(c.isdigit() for c in v):
+        if not has_digit(v):
             raise ValueError("Пароль должна содержать хотя бы одну цифру")
         return v
 
@@ -192,6 +196,17 @@ class Token(BaseModel):
     user_type: str  # "staff" или "client"
 
 
+class CurrentUser(BaseModel):
+    """Схема текущего пользователя запроса."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_type: str
+    role: UserRole
+    clinic_id: Optional[int] = None
+    status: UserStatus
+
+
 class PasswordChange(BaseModel):
     """Схема для изменения пароля."""
     current_password: str
@@ -203,6 +218,26 @@ class PasswordChange(BaseModel):
         """Валидация нового пароля."""
         if len(v) < 6:
             raise ValueError("Пароль должен содержать минимум 6 символов")
-        if not any(c.isdigit() for c in v):
+        if not has_digit(v):
             raise ValueError("Пароль должен содержать хотя бы одну цифру")
-        return v
\ No newline at end of file
+        return v
+
+class PasswordResetRequest(BaseModel):
+    """Схема запроса на восстановление пароля."""
+    email: EmailStr
+
+
+class PasswordResetConfirm(BaseModel):
+    """Схема установки нового пароля по ссылке восстановления."""
+    token: str
+    new_password: str
+
+    @field_validator('new_password')
+    @classmethod
+    def validate_new_password(cls, v: str) -> str:
+        """Валидация нового пароля."""
+        if len(v) < 6:
+            raise ValueError("Пароль должен содержать минимум 6 символов")
+        if not has_digit(v):
+            raise ValueError("Пароль должен содержать хотя бы одну цифру")
+        return v
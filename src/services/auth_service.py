@@ -0,0 +1,294 @@
+"""
+Аутентификация и авторизация персонала и клиентов.
+
+Пароль проверяется в пуле ``password_hasher``; запрос к БД выполняется до
+проверки и занимает соединение только на время выборки строки.
+
+Текущий пользователь запроса описывается неизменяемым ``Principal``
+(id, роль, клиника, статус). Principal кэшируется по (тип, id): проверки
+ролей и доступа к клинике в обработчиках не обращаются к БД. Изменения
+``status``, ``is_active``, ``role`` и ``clinic_id``, прошедшие через сессию,
+сбрасывают запись пользователя после коммита; массовые ``update(Model)``
+сбрасывают весь кэш для этого типа пользователей. Между процессами
+рассинхронизацию ограничивает ``PRINCIPAL_CACHE_TTL``.
+
+Восстановление пароля: ссылка с токеном уходит письмом только активному
+пользователю, ответ на запрос одинаков для любого email. Токен привязан к
+текущему хэшу пароля, поэтому срабатывает один раз.
+"""
+import logging
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional, Union
+
+from sqlalchemy import inspect as sa_inspect, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from src.core.cache import MISSING, SessionTagCollector, TTLCache, loaded_value
+from src.core.security import (
+    InvalidTokenError, TokenClaims, needs_rehash, password_hasher, token_manager, user_tag,
+)
+from src.models.user import Client, ClinicStaff, UserRole, UserStatus
+from src.services.email_service import TEMPLATE_PASSWORD_RESET, EmailQueueFull, email_service
+
+logger = logging.getLogger(__name__)
+
+USER_TYPES: dict[str, type[Union[ClinicStaff, Client]]] = {"staff": ClinicStaff, "client": Client}
+_USER_KINDS = {model: user_type for user_type, model in USER_TYPES.items()}
+
+# Поля, от которых зависят права пользователя
+PRINCIPAL_FIELDS = ("status", "is_active", "role", "clinic_id")
+
+
+@dataclass(frozen=True)
+class AuthResult:
+    """Успешный вход: токен и тип пользователя."""
+    access_token: str
+    user_type: str
+    user_id: int
+
+
+async def _find_credentials(db: AsyncSession, email: str) -> Optional[tuple[str, int, str]]:
+    """(тип, id, хэш) активного пользователя по email; персонал проверяется первым."""
+    for user_type, model in USER_TYPES.items():
+        row = (await db.execute(
+            select(model.id, model.hashed_password).where(
+                model.email == email,
+                model.is_active.is_(True),
+                model.status == UserStatus.ACTIVE,
+            )
+        )).first()
+        if row is not None:
+            return user_type, row.id, row.hashed_password
+    return None
+
+
+async def authenticate(db: AsyncSession, email: str, password: str) -> Optional[AuthResult]:
+    """
+    Проверяет email и пароль и выпускает access-токен.
+
+    Для неизвестного email пароль все равно проверяется (по фиктивному хэшу),
+    чтобы время ответа не отличалось.
+
+    Returns:
+        Результат входа или None при неверных данных
+    """
+    credentials = await _find_credentials(db, email)
+    hashed = credentials[2] if credentials is not None else None
+    if not await password_hasher.verify(password, hashed) or credentials is None:
+        return None
+
+    user_type, user_id, _ = credentials
+    model = USER_TYPES[user_type]
+    values = {"last_login": datetime.utcnow()}
+    if needs_rehash(hashed):
+        values["hashed_password"] = await password_hasher.hash(password)
+    await db.execute(
+        update(model).where(model.id == user_id).values(**values).execution_options(principal_unchanged=True)
+    )
+    await db.commit()
+    return AuthResult(token_manager.create_access_token(user_id, user_type), user_type, user_id)
+
+
+async def change_password(db: AsyncSession, user_type: str, user_id: int, current: str, new: str) -> bool:
+    """Меняет пароль после проверки текущего; False, если пароль неверен или пользователь заблокирован."""
+    model = USER_TYPES[user_type]
+    hashed = (await db.execute(
+        select(model.hashed_password).where(
+            model.id == user_id,
+            model.is_active.is_(True),
+            model.status == UserStatus.ACTIVE,
+        )
+    )).scalar_one_or_none()
+    if not await password_hasher.verify(current, hashed):
+        return False
+    new_hash = await password_hasher.hash(new)
+    await db.execute(
+        update(model).where(model.id == user_id).values(hashed_password=new_hash)
+        .execution_options(principal_unchanged=True)
+    )
+    await db.commit()
+    return True
+
+
+async def request_password_reset(db: AsyncSession, email: str, reset_url: str) -> bool:
+    """
+    Отправляет ссылку восстановления пароля, если email принадлежит активному пользователю.
+
+    Returns:
+        Было ли письмо поставлено в очередь (клиенту не сообщается)
+    """
+    credentials = await _find_credentials(db, email)
+    if credentials is None:
+        return False
+    user_type, user_id, hashed = credentials
+    token = token_manager.create_reset_token(user_id, user_type, hashed)
+    separator = "&" if "?" in reset_url else "?"
+    try:
+        email_service.submit(email, TEMPLATE_PASSWORD_RESET, {
+            "reset_url": f"{reset_url}{separator}token={token}",
+            "expires_minutes": token_manager.reset_expire_minutes,
+        })
+    except EmailQueueFull:
+        logger.warning("Очередь писем переполнена, ссылка восстановления не отправлена")
+        return False
+    return True
+
+
+async def reset_password(db: AsyncSession, token: str, new: str) -> bool:
+    """Задает новый пароль по токену восстановления; False, если токен недействителен или уже использован."""
+    try:
+        claims, fingerprint = token_manager.decode_reset_token(token)
+    except InvalidTokenError:
+        return False
+    model = USER_TYPES.get(claims.user_type)
+    if model is None:
+        return False
+    hashed = (await db.execute(
+        select(model.hashed_password).where(
+            model.id == claims.user_id,
+            model.is_active.is_(True),
+            model.status == UserStatus.ACTIVE,
+        )
+    )).scalar_one_or_none()
+    if hashed is None or not token_manager.reset_token_matches(fingerprint, hashed):
+        return False
+    new_hash = await password_hasher.hash(new)
+    # Условие на старый хэш: из двух одновременных запросов с одним токеном проходит один
+    result = await db.execute(
+        update(model).where(model.id == claims.user_id, model.hashed_password == hashed)
+        .values(hashed_password=new_hash).execution_options(principal_unchanged=True)
+    )
+    if result.rowcount == 0:
+        await db.rollback()
+        return False
+    await db.commit()
+    return True
+
+
+# ----------------------------------------------------------------------
+# Текущий пользователь
+# ----------------------------------------------------------------------
+
+class Principal:
+    """
+    Пользователь запроса: только то, что нужно для проверки прав.
+
+    Неизменяемый объект со ``__slots__``: экземпляр из кэша разделяется
+    между запросами.
+    """
+    __slots__ = ("id", "user_type", "role", "clinic_id", "status")
+
+    id: int
+    user_type: str
+    role: UserRole
+    clinic_id: Optional[int]
+    status: UserStatus
+
+    def __init__(self, id: int, user_type: str, role: UserRole, clinic_id: Optional[int], status: UserStatus):
+        for name, value in zip(self.__slots__, (id, user_type, role, clinic_id, status)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Principal is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Principal is immutable")
+
+    def __repr__(self) -> str:
+        return f"Principal({self.user_type}:{self.id}, role={self.role}, clinic_id={self.clinic_id})"
+
+    @property
+    def is_staff(self) -> bool:
+        return self.user_type == "staff"
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == UserRole.ADMIN
+
+    def has_role(self, *roles: UserRole) -> bool:
+        """Роль пользователя входит в roles; администратор проходит любую проверку."""
+        return self.is_admin or self.role in roles
+
+    def can_access_clinic(self, clinic_id: int) -> bool:
+        """Доступ к данным клиники: администратор — к любой, персонал — к своей."""
+        return self.is_admin or (self.is_staff and self.clinic_id == clinic_id)
+
+
+# Кэш Principal по (тип, id); None — пользователь не найден или заблокирован
+principal_cache = TTLCache(maxsize=10_000, ttl=60)
+
+
+def _principal_tags(user_type: str, user_id: int) -> tuple[str, str]:
+    return user_tag(user_type, user_id), f"user:{user_type}:all"
+
+
+async def resolve_principal(db: AsyncSession, claims: TokenClaims) -> Optional[Principal]:
+    """
+    Principal по данным токена; None, если пользователь удален или не активен.
+
+    Повторные запросы с токеном того же пользователя обслуживаются из кэша.
+    """
+    key = (claims.user_type, claims.user_id)
+    principal = principal_cache.get(key)
+    if principal is not MISSING:
+        return principal
+
+    model = USER_TYPES.get(claims.user_type)
+    if model is None:
+        return None
+    clinic_id = model.clinic_id if model is ClinicStaff else literal(None)
+    row = (await db.execute(
+        select(model.id, model.role, clinic_id, model.status, model.is_active).where(model.id == claims.user_id)
+    )).first()
+
+    principal = None
+    if row is not None and row.is_active and row.status == UserStatus.ACTIVE:
+        principal = Principal(row[0], claims.user_type, row.role, row[2], row.status)
+    principal_cache.set(key, principal, tags=_principal_tags(*key))
+    return principal
+
+
+def _principal_changed(obj: Any) -> bool:
+    attrs = sa_inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in PRINCIPAL_FIELDS if name in attrs)
+
+
+def _flush_tags(session: Session) -> set[str]:
+    changed = [obj for obj in session.dirty if type(obj) in _USER_KINDS and _principal_changed(obj)]
+    changed += [obj for obj in session.deleted if type(obj) in _USER_KINDS]
+    return {
+        user_tag(_USER_KINDS[type(obj)], user_id)
+        for obj in changed
+        if (user_id := loaded_value(obj, "id")) is not None
+    }
+
+
+def _bulk_tags(orm_execute_state: ORMExecuteState) -> tuple[str, ...]:
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return ()
+    if orm_execute_state.execution_options.get("principal_unchanged"):
+        return ()
+    mapper = orm_execute_state.bind_mapper
+    user_type = _USER_KINDS.get(mapper.class_) if mapper is not None else None
+    return (f"user:{user_type}:all",) if user_type is not None else ()
+
+
+_invalidation = SessionTagCollector(
+    "principal_cache_tags", principal_cache.invalidate_tags, flush_tags=_flush_tags, bulk_tags=_bulk_tags
+)
+
+
+def register_principal_invalidation() -> None:
+    """Подписывает кэш Principal на события сессий SQLAlchemy (идемпотентно)."""
+    _invalidation.register()
+
+
+def init_auth(settings) -> None:
+    """Настраивает кэш Principal по конфигурации и подписывает его на события сессий."""
+    principal_cache.maxsize = settings.PRINCIPAL_CACHE_SIZE
+    principal_cache.ttl = settings.PRINCIPAL_CACHE_TTL
+    principal_cache.clear()
+    register_principal_invalidation()
@@ -0,0 +1,290 @@
+"""
+Свободное время специалистов.
+
+Расписание считается целиком в памяти: за период выполняются три запроса
+(услуга, специалисты с часами работы клиник, занятые интервалы), после чего
+для каждого специалиста рабочие окна клиники "вычитаются" из отсортированного
+списка записей. Время переводится в целые минуты, поэтому операции над
+интервалами — это слияние и проход двумя указателями, O(дней + записей).
+
+Слоты выравниваются по сетке ``step`` (по умолчанию 15 минут) от полуночи.
+"""
+import heapq
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+from typing import Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.appointment import BLOCKING_STATUSES, Appointment
+from src.models.clinic import Clinic
+from src.models.service import Service
+from src.models.service_specialist import service_specialist
+from src.models.specialist import Specialist
+
+DEFAULT_SLOT_STEP = 15
+DEFAULT_DURATION = 30
+MAX_RANGE_DAYS = 62
+
+_EPOCH = datetime(1970, 1, 1)
+_MINUTES_PER_DAY = 24 * 60
+
+Interval = tuple[int, int]
+
+
+class AvailabilityError(ValueError):
+    """Некорректные параметры расчета расписания."""
+
+
+@dataclass(frozen=True)
+class Slot:
+    """Свободный слот специалиста."""
+    specialist_id: int
+    starts_at: datetime
+    ends_at: datetime
+
+
+@dataclass(frozen=True)
+class _SpecialistHours:
+    specialist_id: int
+    is_24_7: bool
+    start_time: Optional[time]
+    end_time: Optional[time]
+
+
+def _to_minutes(value: datetime) -> int:
+    return (value - _EPOCH) // timedelta(minutes=1)
+
+
+def _from_minutes(value: int) -> datetime:
+    return _EPOCH + timedelta(minutes=value)
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> list[Interval]:
+    """Сливает пересекающиеся и соприкасающиеся интервалы (вход отсортирован по началу)."""
+    merged: list[Interval] = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(windows: Sequence[Interval], busy: Sequence[Interval]) -> list[Interval]:
+    """
+    Вычитает занятые интервалы из окон.
+
+    Оба списка отсортированы и не пересекаются внутри себя; проход
+    двумя указателями, каждый занятый интервал просматривается не более
+    двух раз.
+    """
+    free: list[Interval] = []
+    i = 0
+    for start, end in windows:
+        while i < len(busy) and busy[i][1] <= start:
+            i += 1
+        cursor = start
+        j = i
+        while j < len(busy) and busy[j][0] < end:
+            if busy[j][0] > cursor:
+                free.append((cursor, busy[j][0]))
+            cursor = max(cursor, busy[j][1])
+            j += 1
+        if cursor < end:
+            free.append((cursor, end))
+    return free
+
+
+def working_windows(hours: _SpecialistHours, start: int, end: int) -> list[Interval]:
+    """Рабочие окна клиники внутри ``[start, end)`` в минутах."""
+    if hours.is_24_7:
+        return [(start, end)] if start < end else []
+    if hours.start_time is None or hours.end_time is None:
+        return []
+    opens = hours.start_time.hour * 60 + hours.start_time.minute
+    closes = hours.end_time.hour * 60 + hours.end_time.minute
+    if closes <= opens:
+        closes += _MINUTES_PER_DAY  # ночной график: окно заканчивается на следующий день
+
+    windows = []
+    # Начинаем с предыдущих суток: их ночное окно может заходить в период
+    day = start - start % _MINUTES_PER_DAY - _MINUTES_PER_DAY
+    while day < end:
+        window_start, window_end = max(day + opens, start), min(day + closes, end)
+        if window_start < window_end:
+            windows.append((window_start, window_end))
+        day += _MINUTES_PER_DAY
+    return windows
+
+
+def iter_slot_starts(free: Iterable[Interval], duration: int, step: int) -> Iterator[int]:
+    """Начала слотов длиной duration по сетке step внутри свободных интервалов."""
+    for start, end in free:
+        slot = -(-start // step) * step
+        while slot + duration <= end:
+            yield slot
+            slot += step
+
+
+class AvailabilityEngine:
+    """
+    Расписание специалистов на период.
+
+    Создается через ``load`` одним набором запросов; все дальнейшие
+    вычисления выполняются без обращений к БД.
+    """
+
+    def __init__(
+        self,
+        hours: Sequence[_SpecialistHours],
+        busy: dict[int, list[Interval]],
+        start: int,
+        end: int,
+    ):
+        self.start = start
+        self.end = end
+        self.free: dict[int, list[Interval]] = {
+            h.specialist_id: subtract_intervals(working_windows(h, start, end), busy.get(h.specialist_id, []))
+            for h in hours
+        }
+
+    @classmethod
+    async def load(
+        cls,
+        db: AsyncSession,
+        specialist_ids: Optional[Sequence[int]],
+        start: datetime,
+        end: datetime,
+        *,
+        service_id: Optional[int] = None,
+    ) -> "AvailabilityEngine":
+        """
+        Загружает часы работы и занятые интервалы.
+
+        Args:
+            specialist_ids: Специалисты; None — все специалисты услуги service_id
+            start: Начало периода (включительно)
+            end: Конец периода (не включительно)
+        """
+        stmt = (
+            select(Specialist.id, Clinic.is_24_7, Clinic.start_time, Clinic.end_time)
+            .join(Clinic, Clinic.id == Specialist.clinic_id)
+            .where(Clinic.is_active.is_(True))
+        )
+        if service_id is not None:
+            stmt = stmt.join(service_specialist, service_specialist.c.specialist_id == Specialist.id).where(
+                service_specialist.c.service_id == service_id
+            )
+        if specialist_ids is not None:
+            stmt = stmt.where(Specialist.id.in_(specialist_ids))
+        hours = [_SpecialistHours(*row) for row in await db.execute(stmt.order_by(Specialist.id))]
+
+        busy: dict[int, list[Interval]] = {}
+        if hours:
+            rows = await db.execute(
+                select(Appointment.specialist_id, Appointment.starts_at, Appointment.ends_at)
+                .where(
+                    Appointment.specialist_id.in_([h.specialist_id for h in hours]),
+                    Appointment.status.in_(BLOCKING_STATUSES),
+                    Appointment.starts_at < end,
+                    Appointment.ends_at > start,
+                )
+                .order_by(Appointment.specialist_id, Appointment.starts_at)
+            )
+            for specialist_id, group in groupby(rows, key=lambda row: row[0]):
+                busy[specialist_id] = merge_intervals(
+                    (_to_minutes(starts_at), _to_minutes(ends_at)) for _, starts_at, ends_at in group
+                )
+        return cls(hours, busy, _to_minutes(start), _to_minutes(end))
+
+    def slots(self, duration: int, step: int = DEFAULT_SLOT_STEP) -> dict[int, list[Slot]]:
+        """Все свободные слоты по специалистам."""
+        return {
+            specialist_id: [
+                Slot(specialist_id, _from_minutes(s), _from_minutes(s + duration))
+                for s in iter_slot_starts(free, duration, step)
+            ]
+            for specialist_id, free in self.free.items()
+        }
+
+    def first_slot(self, duration: int, step: int = DEFAULT_SLOT_STEP) -> Optional[Slot]:
+        """
+        Ближайший слот среди всех специалистов.
+
+        Генераторы слотов специалистов упорядочены по времени, поэтому
+        ``heapq.merge`` берет из каждого только первые элементы.
+        """
+        def stream(specialist_id: int, free: list[Interval]) -> Iterator[tuple[int, int]]:
+            for start in iter_slot_starts(free, duration, step):
+                yield start, specialist_id
+
+        for start, specialist_id in heapq.merge(*(stream(sid, free) for sid, free in self.free.items())):
+            return Slot(specialist_id, _from_minutes(start), _from_minutes(start + duration))
+        return None
+
+
+async def service_duration(db: AsyncSession, service_id: int) -> Optional[int]:
+    """Длительность услуги в минутах; None, если услуги нет."""
+    row = (await db.execute(
+        select(Service.duration_minutes, Service.min_duration).where(Service.id == service_id)
+    )).first()
+    if row is None:
+        return None
+    return row.duration_minutes or row.min_duration or DEFAULT_DURATION
+
+
+def _period(date_from: date, date_to: date, now: datetime) -> tuple[datetime, datetime]:
+    if date_to < date_from:
+        raise AvailabilityError("Дата окончания раньше даты начала")
+    if (date_to - date_from).days >= MAX_RANGE_DAYS:
+        raise AvailabilityError(f"Период не должен превышать {MAX_RANGE_DAYS} дней")
+    start = max(datetime.combine(date_from, time.min), now)
+    end = datetime.combine(date_to + timedelta(days=1), time.min)
+    return start, max(start, end)
+
+
+async def find_slots(
+    db: AsyncSession,
+    service_id: int,
+    date_from: date,
+    date_to: date,
+    *,
+    specialist_ids: Optional[Sequence[int]] = None,
+    step: int = DEFAULT_SLOT_STEP,
+    now: Optional[datetime] = None,
+) -> Optional[dict[int, list[Slot]]]:
+    """
+    Свободные слоты услуги за период (даты включительно) по специалистам.
+
+    Returns:
+        Слоты по специалистам или None, если услуги нет
+    """
+    duration = await service_duration(db, service_id)
+    if duration is None:
+        return None
+    start, end = _period(date_from, date_to, now or datetime.now())
+    engine = await AvailabilityEngine.load(db, specialist_ids, start, end, service_id=service_id)
+    return engine.slots(duration, step)
+
+
+async def next_available_slot(
+    db: AsyncSession,
+    service_id: int,
+    *,
+    days: int = 7,
+    specialist_ids: Optional[Sequence[int]] = None,
+    step: int = DEFAULT_SLOT_STEP,
+    now: Optional[datetime] = None,
+) -> Optional[Slot]:
+    """Ближайший свободный слот услуги у любого из ее специалистов в пределах days дней."""
+    duration = await service_duration(db, service_id)
+    if duration is None:
+        return None
+    now = now or datetime.now()
+    start, end = _period(now.date(), now.date() + timedelta(days=days - 1), now)
+    engine = await AvailabilityEngine.load(db, specialist_ids, start, end, service_id=service_id)
+    return engine.first_slot(duration, step)
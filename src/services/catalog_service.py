@@ -0,0 +1,202 @@
+"""
+Чтение каталога (клиники, услуги, специалисты, акции) через кэш.
+
+Записи кэша помечаются тегами:
+
+* ``<kind>:<id>`` — конкретный объект;
+* ``clinic:<id>`` — всё, что относится к клинике;
+* ``<kind>:list`` — общие (не привязанные к клинике) списки;
+* ``<kind>:all`` — любая запись, содержащая объекты этого типа.
+
+Изменения, прошедшие через flush сессии, инвалидируют первые три группы тегов
+после коммита. Массовые ORM-операции (``update(Model)``, ``insert(Model)``)
+не знают затронутых клиник и сбрасывают ``<kind>:all``.
+
+Загрузчики читают основную базу (``use_primary``): запись, заполненная с
+отстающей реплики сразу после инвалидации, держала бы старые данные до
+следующего изменения или истечения TTL.
+"""
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import inspect as sa_inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from src.core.cache import SessionTagCollector, catalog_cache, loaded_value
+from src.core.database import use_primary
+from src.crud import clinic as crud_clinic, promotion as crud_promotion, service as crud_service
+from src.crud.base import DEFAULT_PAGE_SIZE, Page
+from src.models.clinic import Clinic
+from src.models.promotion import Promotion
+from src.models.service import Service
+from src.models.specialist import Specialist
+from src.schemas.clinic import Clinic as ClinicSchema
+from src.schemas.promotion import Promotion as PromotionSchema
+from src.schemas.service import Service as ServiceSchema
+from src.schemas.validators import list_adapter
+
+CATALOG_KINDS: dict[type, str] = {
+    Clinic: "clinic",
+    Service: "service",
+    Specialist: "specialist",
+    Promotion: "promotion",
+}
+
+# ----------------------------------------------------------------------
+# Чтение
+# ----------------------------------------------------------------------
+
+async def get_clinic(db: AsyncSession, clinic_id: int) -> Optional[ClinicSchema]:
+    """Возвращает клинику по id."""
+    async def load():
+        use_primary(db)
+        obj = await crud_clinic.get(db, clinic_id, with_relations=False)
+        return ClinicSchema.model_validate(obj) if obj else None
+
+    return await catalog_cache.get_or_load(
+        f"clinic:{clinic_id}", load, tags=(f"clinic:{clinic_id}", "clinic:all")
+    )
+
+
+async def list_clinics(db: AsyncSession) -> list[ClinicSchema]:
+    """Возвращает все активные клиники (их единицы, поэтому без пагинации)."""
+    async def load():
+        use_primary(db)
+        result = await db.execute(
+            select(Clinic).where(Clinic.is_active.is_(True)).order_by(Clinic.name, Clinic.id)
+        )
+        return list_adapter(ClinicSchema).validate_python(result.scalars().all(), from_attributes=True)
+
+    return await catalog_cache.get_or_load("clinic:list", load, tags=("clinic:list", "clinic:all"))
+
+
+async def get_service(db: AsyncSession, service_id: int) -> Optional[ServiceSchema]:
+    """Возвращает услугу со специалистами."""
+    async def load():
+        use_primary(db)
+        obj = await crud_service.get(db, service_id)
+        return ServiceSchema.model_validate(obj) if obj else None
+
+    def tags(value: Optional[ServiceSchema]) -> set[str]:
+        tags = {f"service:{service_id}", "service:all", "specialist:all"}
+        if value is not None:
+            tags.add(f"clinic:{value.clinic_id}")
+            tags.update(f"specialist:{s.id}" for s in value.specialists)
+        return tags
+
+    return await catalog_cache.get_or_load(f"service:{service_id}", load, tags=tags)
+
+
+async def list_clinic_services(
+    db: AsyncSession,
+    clinic_id: int,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Page[ServiceSchema]:
+    """Возвращает страницу услуг клиники в порядке ``order_index``."""
+    async def load():
+        use_primary(db)
+        page = await crud_service.get_page(
+            db, cursor=cursor, limit=limit, filters=(Service.clinic_id == clinic_id,)
+        )
+        return Page(
+            items=list_adapter(ServiceSchema).validate_python(page.items, from_attributes=True),
+            next_cursor=page.next_cursor,
+        )
+
+    return await catalog_cache.get_or_load(
+        f"clinic:{clinic_id}:services:{cursor or ''}:{limit}",
+        load,
+        tags=(f"clinic:{clinic_id}", "service:all", "specialist:all"),
+    )
+
+
+async def get_promotion(db: AsyncSession, promotion_id: int) -> Optional[PromotionSchema]:
+    """Возвращает акцию по id."""
+    async def load():
+        use_primary(db)
+        obj = await crud_promotion.get(db, promotion_id)
+        return PromotionSchema.model_validate(obj) if obj else None
+
+    return await catalog_cache.get_or_load(
+        f"promotion:{promotion_id}", load, tags=(f"promotion:{promotion_id}", "promotion:all")
+    )
+
+
+async def list_active_promotions(
+    db: AsyncSession, clinic_id: Optional[int] = None, *, now: Optional[datetime] = None
+) -> list[PromotionSchema]:
+    """
+    Возвращает акции, действующие сейчас, для клиники (включая общие акции сети).
+
+    В кэше хранится список включенных акций без учета дат: окно действия
+    проверяется при каждом чтении, чтобы начало и окончание акции
+    не зависели от времени жизни записи.
+    """
+    async def load():
+        use_primary(db)
+        stmt = select(Promotion).where(Promotion.is_active.is_(True))
+        if clinic_id is not None:
+            stmt = stmt.where((Promotion.clinic_id == clinic_id) | Promotion.clinic_id.is_(None))
+        result = await db.execute(stmt.order_by(Promotion.start_date, Promotion.id))
+        return list_adapter(PromotionSchema).validate_python(result.scalars().all(), from_attributes=True)
+
+    tags = ["promotion:list", "promotion:all"]
+    if clinic_id is not None:
+        tags.append(f"clinic:{clinic_id}")
+    promotions = await catalog_cache.get_or_load(f"promotion:list:{clinic_id or ''}", load, tags=tags)
+
+    now = now or datetime.utcnow()
+    return [p for p in promotions if p.start_date <= now < p.end_date]
+
+
+# ----------------------------------------------------------------------
+# Инвалидация
+# ----------------------------------------------------------------------
+
+def _object_tags(obj: Any) -> set[str]:
+    """Теги записей кэша, которые устаревают при изменении объекта."""
+    kind = CATALOG_KINDS[type(obj)]
+    obj_id = loaded_value(obj, "id")
+    tags = {f"{kind}:list"}
+    if obj_id is not None:
+        tags.add(f"{kind}:{obj_id}")
+
+    if kind == "clinic":
+        if obj_id is not None:
+            tags.add(f"clinic:{obj_id}")
+    else:
+        clinic_ids = {loaded_value(obj, "clinic_id")}
+        clinic_ids.update(sa_inspect(obj).attrs.clinic_id.history.deleted or ())
+        tags.update(f"clinic:{cid}" for cid in clinic_ids if cid is not None)
+    return tags
+
+
+def _flush_tags(session: Session) -> set[str]:
+    tags: set[str] = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if type(obj) in CATALOG_KINDS:
+            tags.update(_object_tags(obj))
+    return tags
+
+
+def _bulk_tags(orm_execute_state: ORMExecuteState) -> tuple[str, ...]:
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return ()
+    mapper = orm_execute_state.bind_mapper
+    kind = CATALOG_KINDS.get(mapper.class_) if mapper is not None else None
+    if kind is None:
+        return ()
+    return f"{kind}:all", f"{kind}:list"
+
+
+_invalidation = SessionTagCollector(
+    "catalog_cache_tags", catalog_cache.invalidate_tags, flush_tags=_flush_tags, bulk_tags=_bulk_tags
+)
+
+
+def register_cache_invalidation() -> None:
+    """Подписывает кэш каталога на события сессий SQLAlchemy (идемпотентно)."""
+    _invalidation.register()
@@ -0,0 +1,623 @@
+"""
+Асинхронная отправка писем.
+
+Письма кладутся в ограниченную очередь и отправляются фоновыми воркерами:
+обработчик запроса только ставит письмо в очередь (``submit`` не ждет ни
+SMTP, ни рендеринга). Каждый воркер забирает пакет до ``batch_size`` писем
+и отправляет его через одно соединение из пула, поэтому на тысячи писем
+открываются единицы соединений.
+
+Временные ошибки (обрыв соединения, таймаут, ответ 4xx) повторяются с
+экспоненциальной задержкой; постоянные (5xx, отказ всех получателей) —
+нет. Массовые рассылки используют ``enqueue``: он ждет места в очереди,
+то есть притормаживает саму рассылку, а не запросы. Последние
+``EMAIL_QUEUE_RESERVE`` мест очереди рассылке недоступны: подтверждения и
+сброс пароля (``submit``) не упираются в очередь, заполненную напоминаниями.
+
+Шаблоны писем лежат в ``templates/email``: HTML-версия — результат
+рендеринга шаблона, тема и текстовая версия — блоки ``subject`` и ``text``. Скомпилированные шаблоны кэшируются
+окружением Jinja.
+
+Письма о записях отправляются сами: подтверждение — после коммита сессии,
+создавшей ``Appointment``; напоминания — периодической задачей
+``run_reminder_scheduler`` на приемы через ``EMAIL_REMINDER_DAYS_AHEAD``
+дней (отправленные помечаются ``reminder_sent_at``).
+
+Для локальной проверки подходит ``python -m aiosmtpd -n -l localhost:8025``
+с ``SMTP_PORT=8025``.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from email.header import Header
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid, parseaddr
+from pathlib import Path
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Optional
+
+import aiosmtplib
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from sqlalchemy import Select, select, update
+from sqlalchemy.orm import Session
+
+from src.core.cache import SessionTagCollector, loaded_value
+from src.core.database import AsyncSessionLocal
+from src.core.metrics import registry
+from src.models.appointment import Appointment, AppointmentStatus
+from src.models.clinic import Clinic
+from src.models.service import Service
+from src.models.specialist import Specialist
+from src.models.user import Client
+
+logger = logging.getLogger(__name__)
+
+EMAIL_TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+
+TEMPLATE_APPOINTMENT_CONFIRMATION = "appointment_confirmation.html"
+TEMPLATE_APPOINTMENT_REMINDER = "appointment_reminder.html"
+TEMPLATE_PASSWORD_RESET = "password_reset.html"
+
+# Ошибки соединения: письмо повторяется, соединение пересоздается
+_CONNECTION_ERRORS = (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError,
+                      aiosmtplib.SMTPTimeoutError, OSError, asyncio.TimeoutError)
+
+
+async def _aiter(items: Iterable[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
+
+
+class EmailQueueFull(Exception):
+    """Очередь писем переполнена."""
+
+
+@dataclass
+class OutgoingEmail:
+    """Письмо в очереди; рендеринг выполняется воркером."""
+    to: str
+    template: str
+    context: dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+
+
+@dataclass
+class EmailMetrics:
+    """Счетчики отправки и пропускная способность за последнюю минуту."""
+    enqueued: int = 0
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    rejected: int = 0
+    batches: int = 0
+    connections_opened: int = 0
+    _recent: deque = field(default_factory=deque, repr=False)
+
+    def record_sent(self, count: int) -> None:
+        self.sent += count
+        self._recent.append((time.monotonic(), count))
+
+    def throughput(self, window: float = 60.0) -> float:
+        """Писем в секунду за окно."""
+        border = time.monotonic() - window
+        while self._recent and self._recent[0][0] < border:
+            self._recent.popleft()
+        return sum(count for _, count in self._recent) / window
+
+    def snapshot(self, queue_size: int = 0) -> dict[str, float]:
+        return {
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "connections_opened": self.connections_opened,
+            "queue_size": queue_size,
+            "throughput_per_second": round(self.throughput(), 3),
+        }
+
+
+class EmailRenderer:
+    """Рендеринг писем из блоков шаблона."""
+
+    def __init__(self, directory: Path = EMAIL_TEMPLATES_DIR, sender: str = "noreply@localhost"):
+        self.sender = sender
+        # Домен для Message-ID: make_msgid без домена на каждое письмо вызывает socket.getfqdn
+        self.domain = parseaddr(sender)[1].rpartition("@")[2] or "localhost"
+        self.env = Environment(
+            loader=FileSystemLoader(str(directory)),
+            autoescape=select_autoescape(("html",)),
+            auto_reload=False,  # шаблоны не меняются без деплоя: без проверки mtime на каждое письмо
+            cache_size=100,
+        )
+
+    def render(self, email: OutgoingEmail) -> bytes:
+        """
+        Письмо в виде байтов для DATA.
+
+        Используются классы ``email.mime`` (политика compat32): сборка через
+        ``EmailMessage`` с политикой по умолчанию в несколько раз медленнее,
+        что заметно на рассылках в десятки тысяч писем.
+        """
+        template = self.env.get_template(email.template)
+        html = template.render(email.context)
+        subject = "".join(template.blocks["subject"](template.new_context(email.context))).strip()
+
+        if "text" in template.blocks:
+            text = "".join(template.blocks["text"](template.new_context(email.context))).strip()
+            message = MIMEMultipart("alternative")
+            message.attach(MIMEText(text, "plain", "utf-8"))
+            message.attach(MIMEText(html, "html", "utf-8"))
+        else:
+            message = MIMEText(html, "html", "utf-8")
+        message["From"] = self.sender
+        message["To"] = email.to
+        message["Subject"] = Header(subject, "utf-8")
+        message["Date"] = formatdate(usegmt=True)
+        message["Message-ID"] = make_msgid(domain=self.domain)
+        return message.as_bytes()
+
+
+class SMTPPool:
+    """
+    Пул переиспользуемых SMTP-соединений.
+
+    Соединение пересоздается после ``max_messages`` писем (многие серверы
+    ограничивают число писем на сессию) и после любой ошибки.
+    """
+
+    def __init__(
+        self,
+        *,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        start_tls: Optional[bool] = None,
+        size: int = 4,
+        max_messages: int = 100,
+        timeout: float = 30,
+        metrics: Optional[EmailMetrics] = None,
+    ):
+        self.options = dict(
+            hostname=hostname, port=port, username=username or None, password=password or None,
+            use_tls=use_tls, start_tls=start_tls, timeout=timeout,
+        )
+        self.max_messages = max_messages
+        self.metrics = metrics or EmailMetrics()
+        self._idle: asyncio.LifoQueue = asyncio.LifoQueue()
+        self._slots = asyncio.Semaphore(size)
+        self._sent_by: dict[int, int] = {}
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(**self.options)
+        await client.connect()
+        self.metrics.connections_opened += 1
+        return client
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        """Соединение из пула; при ошибке внутри блока соединение закрывается."""
+        async with self._slots:
+            client: Optional[aiosmtplib.SMTP] = None
+            while not self._idle.empty():
+                candidate = self._idle.get_nowait()
+                if candidate.is_connected:
+                    client = candidate
+                    break
+                self._sent_by.pop(id(candidate), None)
+            if client is None:
+                client = await self._connect()
+            try:
+                yield client
+            except BaseException:
+                await self._discard(client)
+                raise
+            if self._sent_by.get(id(client), 0) >= self.max_messages:
+                await self._discard(client)
+            else:
+                self._idle.put_nowait(client)
+
+    def count_sent(self, client: aiosmtplib.SMTP, count: int = 1) -> None:
+        self._sent_by[id(client)] = self._sent_by.get(id(client), 0) + count
+
+    async def _discard(self, client: aiosmtplib.SMTP) -> None:
+        self._sent_by.pop(id(client), None)
+        try:
+            if client.is_connected:
+                await client.quit()
+        except Exception:
+            client.close()
+
+    async def close(self) -> None:
+        while not self._idle.empty():
+            await self._discard(self._idle.get_nowait())
+
+
+class EmailService:
+    """
+    Очередь писем с пулом воркеров.
+
+    Attributes:
+        queue_size: Максимум писем в очереди
+        submit_reserve: Места очереди только для ``submit``; ``enqueue`` их не занимает
+        workers: Число воркеров (и соединений)
+        batch_size: Писем на одно соединение за проход
+        max_attempts: Попыток отправки письма
+        retry_base_delay: Задержка перед первым повтором, секунды
+    """
+
+    def __init__(self, **options: Any):
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._retry_handles: set[asyncio.TimerHandle] = set()
+        self._space: Optional[asyncio.Event] = None  # воркер забрал письма из очереди
+        self.configure(**options)
+
+    def configure(
+        self,
+        *,
+        pool: Optional[SMTPPool] = None,
+        renderer: Optional[EmailRenderer] = None,
+        queue_size: int = 10_000,
+        submit_reserve: int = 1000,
+        workers: int = 4,
+        batch_size: int = 50,
+        max_attempts: int = 5,
+        retry_base_delay: float = 2.0,
+    ) -> None:
+        """Задает SMTP и параметры очереди; вызывается до start."""
+        self.pool = pool
+        self.renderer = renderer or EmailRenderer()
+        self.metrics = pool.metrics if pool is not None else EmailMetrics()
+        self.queue_size = queue_size
+        self.submit_reserve = min(submit_reserve, queue_size - 1)
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+
+    @property
+    def enabled(self) -> bool:
+        return self.pool is not None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def snapshot(self) -> dict[str, float]:
+        """Счетчики отправки и текущий размер очереди."""
+        return self.metrics.snapshot(self._queue.qsize() if self._queue is not None else 0)
+
+    def start(self) -> None:
+        """Запускает воркеры в текущем event loop (вызывается в lifespan)."""
+        if not self.enabled or self.running:
+            return
+        self._queue = asyncio.Queue(self.queue_size)
+        self._space = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(), name=f"email-worker-{i}") for i in range(self.workers)]
+
+    async def stop(self, drain_timeout: float = 10.0) -> None:
+        """
+        Дожидается отправки очереди и отложенных повторов (не дольше
+        drain_timeout) и останавливает воркеры.
+        """
+        if not self.running:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + drain_timeout
+        try:
+            while True:
+                await asyncio.wait_for(self._queue.join(), deadline - loop.time())
+                if not self._retry_handles:
+                    break
+                if loop.time() >= deadline:
+                    raise asyncio.TimeoutError
+                # Повтор ждет в таймере вне очереди
+                await asyncio.sleep(min(0.05, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            logger.warning("Не отправлено писем при остановке: %d в очереди, %d ждут повтора",
+                           self._queue.qsize(), len(self._retry_handles))
+        for handle in self._retry_handles:
+            handle.cancel()
+        self._retry_handles.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.pool.close()
+
+    # ------------------------------------------------------------------
+    # Постановка в очередь
+    # ------------------------------------------------------------------
+
+    def submit(self, to: str, template: str, context: Optional[dict[str, Any]] = None) -> None:
+        """
+        Ставит письмо в очередь без ожидания (для обработчиков запросов).
+
+        Raises:
+            EmailQueueFull: Очередь заполнена
+        """
+        if not self.running:
+            logger.info("Отправка писем отключена, письмо %s для %s не отправлено", template, to)
+            return
+        try:
+            self._queue.put_nowait(OutgoingEmail(to, template, context or {}))
+        except asyncio.QueueFull:
+            self.metrics.rejected += 1
+            raise EmailQueueFull from None
+        self.metrics.enqueued += 1
+
+    async def enqueue(self, emails: Iterable[OutgoingEmail] | AsyncIterable[OutgoingEmail]) -> int:
+        """Ставит письма в очередь, ожидая места вне резерва ``submit`` (для массовых рассылок)."""
+        if not self.running:
+            logger.info("Отправка писем отключена, рассылка пропущена")
+            return 0
+        if not isinstance(emails, AsyncIterable):
+            emails = _aiter(emails)
+        limit = self.queue_size - self.submit_reserve
+        count = 0
+        async for email in emails:
+            while self._queue.qsize() >= limit:
+                self._space.clear()
+                await self._space.wait()
+            self._queue.put_nowait(email)
+            self.metrics.enqueued += 1
+            count += 1
+        return count
+
+    # ------------------------------------------------------------------
+    # Воркеры
+    # ------------------------------------------------------------------
+
+    async def _worker(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._space.set()
+            try:
+                await self._send_batch(batch)
+            except Exception:
+                logger.exception("Ошибка отправки пакета писем")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _render_batch(self, batch: list[OutgoingEmail]) -> tuple[list[tuple[OutgoingEmail, bytes]], int]:
+        rendered, failed = [], 0
+        for email in batch:
+            try:
+                rendered.append((email, self.renderer.render(email)))
+            except Exception:
+                failed += 1
+                logger.exception("Не удалось отрендерить письмо %s", email.template)
+        return rendered, failed
+
+    async def _send_batch(self, batch: list[OutgoingEmail]) -> None:
+        # Рендеринг и сборка MIME — миллисекунды на письмо; в потоке они не задерживают запросы
+        pending, failed = await asyncio.to_thread(self._render_batch, batch)
+        self.metrics.failed += failed
+        if not pending:
+            return
+
+        self.metrics.batches += 1
+        # Письма начиная с handled при ошибке соединения уходят на повтор
+        handled = 0
+        try:
+            async with self.pool.connection() as client:
+                for handled, (email, data) in enumerate(pending):
+                    try:
+                        await client.sendmail(self.renderer.sender, [email.to], data)
+                    except aiosmtplib.SMTPRecipientsRefused:
+                        self.metrics.failed += 1
+                        logger.warning("Получатель отклонен сервером: %s", email.to)
+                        continue
+                    except aiosmtplib.SMTPResponseException as exc:
+                        if exc.code >= 500:
+                            self.metrics.failed += 1
+                            logger.warning("Письмо для %s отклонено: %s %s", email.to, exc.code, exc.message)
+                        else:
+                            self._retry(email)
+                        continue
+                    self.pool.count_sent(client)
+                    self.metrics.record_sent(1)
+                handled = len(pending)
+        except _CONNECTION_ERRORS as exc:
+            # Соединение уже закрыто пулом; неотправленные письма — на повтор
+            logger.warning("Ошибка SMTP-соединения: %r", exc)
+            for email, _ in pending[handled:]:
+                self._retry(email)
+
+    def _retry(self, email: OutgoingEmail) -> None:
+        email.attempts += 1
+        if email.attempts >= self.max_attempts:
+            self.metrics.failed += 1
+            logger.error("Письмо %s для %s не отправлено после %d попыток", email.template, email.to, email.attempts)
+            return
+        self.metrics.retried += 1
+        # Экспоненциальная задержка со случайной добавкой, чтобы повторы не шли волной
+        delay = self.retry_base_delay * 2 ** (email.attempts - 1) * (1 + random.random() / 2)
+        loop = asyncio.get_running_loop()
+        handle: asyncio.TimerHandle
+
+        def requeue() -> None:
+            self._retry_handles.discard(handle)
+            try:
+                self._queue.put_nowait(email)
+            except asyncio.QueueFull:
+                # Очередь занята рассылкой: пробуем позже, не вытесняя новые письма
+                self._retry_handles.add(loop.call_later(self.retry_base_delay, requeue))
+
+        handle = loop.call_later(delay, requeue)
+        self._retry_handles.add(handle)
+
+
+def _appointment_emails() -> Select:
+    """Данные для писем о записях: получатель, время, специалист, адрес, услуга."""
+    return (
+        select(
+            Client.email, Client.first_name, Appointment.starts_at,
+            Specialist.last_name, Specialist.first_name, Clinic.address, Service.name,
+        )
+        .join(Client, Client.id == Appointment.client_id)
+        .join(Specialist, Specialist.id == Appointment.specialist_id)
+        .join(Clinic, Clinic.id == Appointment.clinic_id)
+        .outerjoin(Service, Service.id == Appointment.service_id)
+        .order_by(Appointment.starts_at, Appointment.id)
+    )
+
+
+def _appointment_context(row: Any) -> dict[str, Any]:
+    _, client_name, starts_at, last_name, first_name, address, service_name = row
+    return {
+        "client_name": client_name,
+        "starts_at": starts_at,
+        "specialist_name": f"{last_name} {first_name}",
+        "clinic_address": address,
+        "service_name": service_name,
+    }
+
+
+async def queue_appointment_reminders(day: date, *, batch_size: int = 500) -> int:
+    """
+    Ставит в очередь напоминания о приемах на день.
+
+    Приемы забираются порциями по ``batch_size``: каждая порция помечается
+    ``reminder_sent_at`` (``FOR UPDATE SKIP LOCKED`` — параллельные
+    процессы берут разные записи), читается и коммитится в своей сессии,
+    и только потом ``enqueue`` ждет места в очереди — соединение с базой
+    на время ожидания возвращается в пул. Запись помечается до отправки:
+    при падении процесса между коммитом и очередью напоминание теряется,
+    но не дублируется.
+    """
+    if not email_service.running:
+        logger.info("Отправка писем отключена, напоминания на %s пропущены", day)
+        return 0
+    start = datetime.combine(day, datetime.min.time())
+    due = (
+        select(Appointment.id)
+        .where(
+            Appointment.starts_at >= start,
+            Appointment.starts_at < start + timedelta(days=1),
+            Appointment.status.in_((AppointmentStatus.SCHEDULED, AppointmentStatus.CONFIRMED)),
+            Appointment.reminder_sent_at.is_(None),
+        )
+        .order_by(Appointment.starts_at, Appointment.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            claimed = (await db.execute(
+                update(Appointment)
+                .where(Appointment.id.in_(due.scalar_subquery()))
+                .values(reminder_sent_at=datetime.utcnow())
+                .returning(Appointment.id)
+                .execution_options(synchronize_session=False)
+            )).scalars().all()
+            rows = (await db.execute(_appointment_emails().where(Appointment.id.in_(claimed)))).all() if claimed else []
+            await db.commit()
+        total += await email_service.enqueue(
+            OutgoingEmail(row[0], TEMPLATE_APPOINTMENT_REMINDER, _appointment_context(row)) for row in rows
+        )
+        if len(claimed) < batch_size:
+            return total
+
+
+async def run_reminder_scheduler(interval: float, days_ahead: int = 1) -> None:
+    """Фоновая задача напоминаний на день через ``days_ahead`` (запускается в lifespan)."""
+    while True:
+        try:
+            queued = await queue_appointment_reminders(date.today() + timedelta(days=days_ahead))
+            if queued:
+                logger.info("В очередь поставлено напоминаний: %d", queued)
+        except Exception:
+            logger.exception("Ошибка постановки напоминаний")
+        await asyncio.sleep(interval)
+
+
+async def send_appointment_confirmations(appointment_ids: Iterable[int]) -> None:
+    """Ставит в очередь подтверждения записей; данные читаются с основной базы."""
+    try:
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(_appointment_emails().where(Appointment.id.in_(list(appointment_ids))))).all()
+    except Exception:
+        logger.exception("Не удалось прочитать записи для подтверждений: %s", sorted(appointment_ids))
+        return
+    for row in rows:
+        try:
+            email_service.submit(row[0], TEMPLATE_APPOINTMENT_CONFIRMATION, _appointment_context(row))
+        except EmailQueueFull:
+            logger.warning("Очередь писем переполнена, подтверждение для %s не отправлено", row[0])
+
+
+# Задачи отправки подтверждений: ссылки держатся до завершения
+_confirmation_tasks: set[asyncio.Task] = set()
+
+
+def _new_appointments(session: Session) -> set[int]:
+    return {
+        appointment_id
+        for obj in session.new
+        if isinstance(obj, Appointment) and (appointment_id := loaded_value(obj, "id")) is not None
+    }
+
+
+def _confirm_appointments(appointment_ids: set[int]) -> None:
+    if not email_service.running:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # синхронная сессия вне event loop (скрипты): подтверждения не отправляются
+    task = loop.create_task(send_appointment_confirmations(appointment_ids))
+    _confirmation_tasks.add(task)
+    task.add_done_callback(_confirmation_tasks.discard)
+
+
+_confirmations = SessionTagCollector(
+    "appointment_confirmations", _confirm_appointments, flush_tags=_new_appointments
+)
+
+
+# Счетчики EmailMetrics (остальные показатели — мгновенные значения)
+EMAIL_COUNTERS = ("enqueued", "sent", "failed", "retried", "rejected", "batches", "connections_opened")
+
+# Глобальный сервис; SMTP настраивается через init_email_service
+email_service = EmailService()
+
+
+def init_email_service(settings) -> EmailService:
+    """Настраивает сервис писем по конфигурации; без EMAIL_ENABLED письма только логируются."""
+    pool = None
+    if settings.EMAIL_ENABLED:
+        pool = SMTPPool(
+            hostname=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            username=settings.SMTP_USERNAME,
+            password=settings.SMTP_PASSWORD,
+            use_tls=settings.SMTP_USE_TLS,
+            start_tls=settings.SMTP_START_TLS,
+            size=settings.EMAIL_WORKERS,
+        )
+    email_service.configure(
+        pool=pool,
+        renderer=EmailRenderer(sender=settings.EMAIL_FROM),
+        queue_size=settings.EMAIL_QUEUE_SIZE,
+        submit_reserve=settings.EMAIL_QUEUE_RESERVE,
+        workers=settings.EMAIL_WORKERS,
+        batch_size=settings.EMAIL_BATCH_SIZE,
+    )
+    _confirmations.register()
+    if settings.METRICS_ENABLED:
+        registry.register_snapshot("email", email_service.snapshot, counters=EMAIL_COUNTERS)
+    return email_service
@@ -0,0 +1,295 @@
+"""
+Поиск ближайших клиник.
+
+Горячий путь — ``ClinicLocator``: активные клиники с координатами в памяти
+процесса, k-d дерево по точкам на единичной сфере (x, y, z). Евклидово
+расстояние между такими точками (хорда) монотонно по расстоянию на
+поверхности, поэтому дерево дает честных ближайших соседей без искажений
+у полюсов и на 180-м меридиане; в километры хорда переводится только для
+найденных клиник. Поиск k ближайших — O(log n) узлов, фильтр "открыта
+сейчас" проверяется при обходе, так что закрытые клиники не занимают
+места в ответе.
+
+Дерево перестраивается целиком (клиник немного, сборка — миллисекунды):
+по событиям инвалидации каталога (``clinic:list``/``clinic:all``) и раз в
+``CLINIC_LOCATOR_REFRESH_INTERVAL`` — так подхватываются изменения из
+других процессов.
+
+Холодный путь — ``nearest_from_db``: до первой загрузки индекса (или если
+он выключен) кандидаты выбираются из БД по прямоугольнику широта/долгота
+(индекс ``ix_clinics_latitude_longitude``), прямоугольник расширяется,
+пока клиник не наберется достаточно.
+
+Часы работы клиник хранятся без часового пояса, в местном времени клиники
+(как и время приемов). Фильтр "открыта сейчас" сравнивает их с местным
+временем сервера, то есть предполагает, что сервер и все клиники работают в
+одном часовом поясе; для клиник в разных поясах пояс нужно хранить у
+клиники и переводить текущее время в него.
+"""
+import asyncio
+import heapq
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, time as dt_time
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import catalog_cache
+from src.core.database import use_primary
+from src.models.clinic import Clinic
+
+EARTH_RADIUS_KM = 6371.0088
+MAX_NEAREST = 50
+
+# Радиусы прямоугольника холодного поиска, км; после последнего — без ограничения
+_COLD_RADII_KM = (5, 25, 100, 500, 2000)
+
+_COLUMNS = tuple(Clinic.__table__.c)
+
+
+@dataclass(frozen=True, slots=True)
+class _Point:
+    x: float
+    y: float
+    z: float
+    clinic: dict[str, Any]
+
+    def coord(self, axis: int) -> float:
+        return self.z if axis == 2 else self.y if axis else self.x
+
+
+def _unit_vector(latitude: float, longitude: float) -> tuple[float, float, float]:
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    cos_lat = math.cos(lat)
+    return cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat)
+
+
+def _chord_to_km(chord_squared: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord_squared) / 2))
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Расстояние по поверхности Земли между двумя точками, км."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def is_open(clinic: dict[str, Any], at: dt_time) -> bool:
+    """Открыта ли клиника во время ``at``; ночной график (конец раньше начала) — через полночь."""
+    if clinic["is_24_7"]:
+        return True
+    opens, closes = clinic["start_time"], clinic["end_time"]
+    if opens is None or closes is None:
+        return False
+    if opens < closes:
+        return opens <= at < closes
+    return at >= opens or at < closes
+
+
+class _KDTree:
+    """
+    Сбалансированное k-d дерево в неявном виде: узел — середина отрезка
+    списка, отсортированного по оси глубины, потомки — половины отрезка.
+    """
+
+    def __init__(self, points: list[_Point]):
+        self.points = points
+        self._build(0, len(points), 0)
+
+    def _build(self, lo: int, hi: int, axis: int) -> None:
+        if hi - lo <= 1:
+            return
+        self.points[lo:hi] = sorted(self.points[lo:hi], key=lambda p: p.coord(axis))
+        mid = (lo + hi) // 2
+        self._build(lo, mid, (axis + 1) % 3)
+        self._build(mid + 1, hi, (axis + 1) % 3)
+
+    def nearest(self, target: tuple[float, float, float], k: int, accept) -> list[tuple[float, _Point]]:
+        """k ближайших точек, прошедших ``accept``: пары (квадрат хорды, точка) от ближних."""
+        points = self.points
+        tx, ty, tz = target
+        heap: list[tuple[float, int]] = []  # (-квадрат хорды, индекс): на вершине самая дальняя
+
+        def visit(lo: int, hi: int, axis: int) -> None:
+            while lo < hi:
+                mid = (lo + hi) // 2
+                point = points[mid]
+                dx, dy, dz = point.x - tx, point.y - ty, point.z - tz
+                distance = dx * dx + dy * dy + dz * dz
+                if (len(heap) < k or distance < -heap[0][0]) and accept(point.clinic):
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-distance, mid))
+                    else:
+                        heapq.heapreplace(heap, (-distance, mid))
+                delta = (dx, dy, dz)[axis]
+                near, far = ((lo, mid), (mid + 1, hi)) if delta > 0 else ((mid + 1, hi), (lo, mid))
+                next_axis = (axis + 1) % 3
+                visit(near[0], near[1], next_axis)
+                # Дальняя половина — только если плоскость разбиения ближе k-й найденной точки
+                if len(heap) == k and delta * delta >= -heap[0][0]:
+                    return
+                lo, hi, axis = far[0], far[1], next_axis
+
+        visit(0, len(points), 0)
+        return [(-distance, points[index]) for distance, index in sorted(heap, reverse=True)]
+
+
+class ClinicLocator:
+    """
+    Индекс активных клиник с координатами для поиска ближайших.
+
+    Attributes:
+        refresh_interval: Как часто перестраивать индекс без событий, секунды
+    """
+
+    def __init__(self, refresh_interval: float = 60, enabled: bool = True):
+        self.configure(refresh_interval, enabled)
+
+    def configure(self, refresh_interval: float, enabled: bool = True) -> None:
+        self.refresh_interval = refresh_interval
+        self.enabled = enabled
+        self._tree = _KDTree([])
+        self._loaded_at = 0.0
+        self._reload = True
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tree.points)
+
+    @property
+    def is_loaded(self) -> bool:
+        return bool(self._loaded_at)
+
+    def on_invalidate(self, tags: frozenset[str]) -> None:
+        """Слушатель инвалидации каталога: изменились клиники."""
+        if "clinic:list" in tags or "clinic:all" in tags:
+            self._reload = True
+
+    def _needs_refresh(self) -> bool:
+        return self._reload or time.monotonic() - self._loaded_at >= self.refresh_interval
+
+    async def ensure_fresh(self, db: AsyncSession, *, wait: bool = True) -> None:
+        """
+        Перестраивает индекс, если он устарел.
+
+        Пока один запрос перестраивает индекс, остальные читают текущее
+        дерево; до первой загрузки ждут, если ``wait``.
+        """
+        if not self._needs_refresh():
+            return
+        if self._lock.locked() and (self._loaded_at or not wait):
+            return
+        async with self._lock:
+            if self._needs_refresh():
+                await self._load(db)
+
+    async def _load(self, db: AsyncSession) -> None:
+        self._reload = False
+        use_primary(db)  # перестройка после инвалидации не должна читать отстающую реплику
+        rows = (await db.execute(
+            select(*_COLUMNS).where(
+                Clinic.is_active.is_(True), Clinic.latitude.is_not(None), Clinic.longitude.is_not(None)
+            )
+        )).all()
+        self.rebuild(row._asdict() for row in rows)
+
+    def rebuild(self, clinics: Iterable[dict[str, Any]]) -> None:
+        """Строит индекс по словарям колонок клиник (активных, с координатами)."""
+        points = [_Point(*_unit_vector(c["latitude"], c["longitude"]), c) for c in clinics]
+        self._tree = _KDTree(points)
+        self._loaded_at = time.monotonic()
+
+    def nearest(
+        self, latitude: float, longitude: float, k: int = 5, *, open_at: Optional[dt_time] = None
+    ) -> list[dict[str, Any]]:
+        """
+        k ближайших клиник к точке (словари колонок с ``distance_km``), от ближних.
+
+        Args:
+            open_at: Только клиники, открытые в это время
+        """
+        accept = (lambda clinic: True) if open_at is None else (lambda clinic: is_open(clinic, open_at))
+        found = self._tree.nearest(_unit_vector(latitude, longitude), k, accept)
+        return [{**point.clinic, "distance_km": round(_chord_to_km(chord), 3)} for chord, point in found]
+
+
+def _bounding_box(latitude: float, longitude: float, radius_km: float) -> list[Any]:
+    """Условия прямоугольника, покрывающего круг радиуса ``radius_km``."""
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    conditions = [Clinic.latitude.between(latitude - delta_lat, latitude + delta_lat)]
+    if abs(latitude) + delta_lat >= 90:
+        return conditions  # круг накрывает полюс: подходят все долготы
+    delta_lon = math.degrees(math.asin(math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude))))
+    west, east = longitude - delta_lon, longitude + delta_lon
+    if west < -180 or east > 180:
+        # Прямоугольник пересекает 180-й меридиан: две полосы долгот
+        west, east = (west + 360, east) if west < -180 else (west, east - 360)
+        conditions.append((Clinic.longitude >= west) | (Clinic.longitude <= east))
+    else:
+        conditions.append(Clinic.longitude.between(west, east))
+    return conditions
+
+
+async def nearest_from_db(
+    db: AsyncSession, latitude: float, longitude: float, k: int = 5, *, open_at: Optional[dt_time] = None
+) -> list[dict[str, Any]]:
+    """
+    k ближайших клиник запросами к БД с расширяющимся прямоугольником.
+
+    Клиника из прямоугольника радиуса r принимается, только если она не
+    дальше r: за углами прямоугольника могут быть более близкие клиники
+    соседнего радиуса.
+    """
+    base = select(*_COLUMNS).where(
+        Clinic.is_active.is_(True), Clinic.latitude.is_not(None), Clinic.longitude.is_not(None)
+    )
+    radii: tuple[Optional[float], ...] = (*_COLD_RADII_KM, None)
+    found: list[dict[str, Any]] = []
+    for radius in radii:
+        stmt = base if radius is None else base.where(*_bounding_box(latitude, longitude, radius))
+        found = []
+        for row in (await db.execute(stmt)).all():
+            clinic = row._asdict()
+            if open_at is not None and not is_open(clinic, open_at):
+                continue
+            distance = haversine_km(latitude, longitude, clinic["latitude"], clinic["longitude"])
+            if radius is None or distance <= radius:
+                found.append({**clinic, "distance_km": round(distance, 3)})
+        if len(found) >= k:
+            break
+    found.sort(key=lambda clinic: (clinic["distance_km"], clinic["id"]))
+    return found[:k]
+
+
+# Глобальный индекс клиник; параметры задаются через init_clinic_locator
+clinic_locator = ClinicLocator()
+catalog_cache.add_invalidation_listener(clinic_locator.on_invalidate)
+
+
+def init_clinic_locator(settings) -> ClinicLocator:
+    """Настраивает индекс ближайших клиник по конфигурации."""
+    clinic_locator.configure(settings.CLINIC_LOCATOR_REFRESH_INTERVAL, settings.CLINIC_LOCATOR_ENABLED)
+    return clinic_locator
+
+
+async def find_nearest(
+    db: AsyncSession, latitude: float, longitude: float, k: int = 5, *, open_now: bool = False
+) -> list[dict[str, Any]]:
+    """
+    k ближайших активных клиник к точке.
+
+    Из индекса, если он включен и загружен; пока первый запрос загружает
+    индекс, остальные идут холодным путем, а не ждут. ``open_now`` —
+    по местному времени сервера, совпадающему с временем клиник.
+    """
+    open_at = datetime.now().time() if open_now else None
+    if clinic_locator.enabled:
+        await clinic_locator.ensure_fresh(db, wait=False)
+        if clinic_locator.is_loaded:
+            return clinic_locator.nearest(latitude, longitude, k, open_at=open_at)
+    return await nearest_from_db(db, latitude, longitude, k, open_at=open_at)
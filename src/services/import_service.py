@@ -0,0 +1,561 @@
+"""
+Массовый импорт каталога (услуги, специалисты) из CSV и NDJSON.
+
+Путь строки:
+
+1. разбор файла в словари: CSV — ``csv.DictReader`` (разделитель ``,`` или
+   ``;``, списки через ``|``), NDJSON — объект JSON на строку;
+2. валидация пачками по ``BATCH_SIZE`` одним вызовом
+   ``TypeAdapter(list[ServiceCreate])``; адаптеры создаются один раз на модуль.
+   Строки с ошибками исключаются, ошибки собираются с номером строки файла;
+3. ``COPY`` валидных строк во временную таблицу (asyncpg
+   ``copy_records_to_table``, бинарный протокол);
+4. один оператор на таблицу: upsert в ``services``/``specialists`` и
+   синхронизация ``service_specialist``.
+
+Естественный ключ: услуга — (clinic_id, name), специалист — (clinic_id,
+last_name, first_name, patronymic). Уникальных индексов на эти колонки нет,
+поэтому upsert сделан через ``UPDATE ... FROM`` и ``INSERT ... WHERE NOT EXISTS``
+в одном операторе, а параллельные импорты в одну клинику сериализуются
+advisory-блокировкой транзакции.
+
+У существующих записей обновляются только колонки, присутствующие в файле;
+пустая ячейка CSV означает значение по умолчанию. Если в строке указан список
+связей (``specialist_ids``/``service_ids``), связи записи заменяются им.
+
+Запуск из командной строки::
+
+    python -m src.services.import_service services prices.csv --clinic-id 3
+"""
+import asyncio
+import csv
+import io
+import json
+from dataclasses import dataclass
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Iterator, Optional
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import Numeric, String, Table, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import catalog_cache
+from src.models.service import Service
+from src.models.specialist import Specialist
+from src.schemas.catalog_import import ImportFormat, ImportKind, ImportReport, ImportRowError
+from src.schemas.service import ServiceCreate
+from src.schemas.specialist import SpecialistCreate
+from src.schemas.validators import list_adapter
+
+BATCH_SIZE = 1000
+LIST_SEPARATOR = "|"
+
+# Пространство имен advisory-блокировок импорта (первый аргумент pg_advisory_xact_lock)
+_LOCK_NAMESPACE = 0x494D50
+
+
+class ImportFileError(ValueError):
+    """Файл импорта не удалось разобрать целиком (кодировка, заголовок)."""
+
+
+class _FieldError(ValueError):
+    """Значение поля строки не подходит колонке таблицы."""
+
+    def __init__(self, field: str, message: str):
+        super().__init__(message)
+        self.field = field
+
+
+@dataclass(frozen=True)
+class _ImportSpec:
+    """
+    Описание импортируемой сущности.
+
+    Attributes:
+        table: Целевая таблица
+        schema: Схема строки; пачка проверяется ``list_adapter(schema)``
+        columns: Колонки таблицы, заполняемые из файла
+        key: Естественный ключ записи
+        list_fields: Поля-списки (в CSV — через ``|``)
+        link_field: Поле схемы со списком связанных ID
+        link_column: Колонка записи в ``service_specialist``
+        other_column: Колонка связанной записи в ``service_specialist``
+        other_table: Таблица связанных записей
+    """
+    kind: ImportKind
+    table: Table
+    schema: type[BaseModel]
+    columns: tuple[str, ...]
+    key: tuple[str, ...]
+    list_fields: frozenset[str]
+    link_field: str
+    link_column: str
+    other_column: str
+    other_table: str
+
+    @property
+    def adapter(self) -> TypeAdapter:
+        # Создается при первом импорте, а не при загрузке модуля
+        return list_adapter(self.schema)
+
+    @property
+    def staging(self) -> str:
+        return f"import_{self.table.name}"
+
+
+SPECS: dict[ImportKind, _ImportSpec] = {
+    ImportKind.SERVICES: _ImportSpec(
+        kind=ImportKind.SERVICES,
+        table=Service.__table__,
+        schema=ServiceCreate,
+        columns=(
+            "clinic_id", "name", "short_description", "description", "price", "min_price", "max_price",
+            "duration_minutes", "min_duration", "max_duration", "category", "status", "is_popular",
+            "is_available_online", "is_emergency", "preparation_info", "contraindications",
+            "required_specializations", "tags", "image_url", "gallery", "order_index",
+        ),
+        key=("clinic_id", "name"),
+        list_fields=frozenset({"required_specializations", "tags", "gallery", "specialist_ids"}),
+        link_field="specialist_ids",
+        link_column="service_id",
+        other_column="specialist_id",
+        other_table="specialists",
+    ),
+    ImportKind.SPECIALISTS: _ImportSpec(
+        kind=ImportKind.SPECIALISTS,
+        table=Specialist.__table__,
+        schema=SpecialistCreate,
+        columns=(
+            "clinic_id", "first_name", "last_name", "patronymic", "specialization", "experience",
+            "description", "photo_url",
+        ),
+        key=("clinic_id", "last_name", "first_name", "patronymic"),
+        list_fields=frozenset({"service_ids"}),
+        link_field="service_ids",
+        link_column="specialist_id",
+        other_column="service_id",
+        other_table="services",
+    ),
+}
+
+
+@dataclass
+class PreparedImport:
+    """
+    Проверенные строки, готовые к загрузке.
+
+    Attributes:
+        records: Строки для COPY: (номер строки, значения columns..., связи)
+        clinic_ids: Клиника каждой записи (параллельно records)
+        present: Колонки, присутствующие в файле (обновляются у существующих записей)
+        total: Строк в файле
+        errors: Ошибки по строкам
+    """
+    spec: _ImportSpec
+    records: list[tuple]
+    clinic_ids: list[int]
+    present: tuple[str, ...]
+    total: int
+    errors: list[ImportRowError]
+
+
+# ----------------------------------------------------------------------
+# Разбор и валидация
+# ----------------------------------------------------------------------
+
+def _decode(data: bytes) -> str:
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        raise ImportFileError("Файл должен быть в кодировке UTF-8") from exc
+
+
+def _csv_reader(content: str) -> csv.DictReader:
+    try:
+        dialect = csv.Sniffer().sniff(content.split("\n", 1)[0], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(io.StringIO(content, newline=""), dialect=dialect)
+    if not reader.fieldnames:
+        raise ImportFileError("В CSV нет строки заголовка")
+    return reader
+
+
+def _iter_csv(reader: csv.DictReader, spec: _ImportSpec) -> Iterator[tuple[int, Any]]:
+    for row in reader:
+        values = {}
+        for name, value in row.items():
+            if name is None or value is None:
+                continue
+            name, value = name.strip(), value.strip()
+            if not value:
+                continue
+            if name in spec.list_fields:
+                value = [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+            values[name] = value
+        yield reader.line_num, values
+
+
+def _iter_ndjson(content: str) -> Iterator[tuple[int, Any]]:
+    for line_no, line in enumerate(content.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError:
+            yield line_no, None
+
+
+def _column_errors(spec: _ImportSpec, values: dict[str, Any]) -> Optional[tuple[str, str]]:
+    """Ограничения колонок БД, которых нет в схеме: длина строк и разрядность чисел."""
+    for name in spec.columns:
+        value = values.get(name)
+        if value is None:
+            continue
+        column_type = spec.table.c[name].type
+        if isinstance(value, str) and isinstance(column_type, String) and column_type.length \
+                and len(value) > column_type.length:
+            return name, f"Не длиннее {column_type.length} символов"
+        if isinstance(column_type, Numeric) and column_type.precision:
+            limit = 10 ** (column_type.precision - (column_type.scale or 0))
+            if abs(value) >= limit:
+                return name, f"Значение должно быть меньше {limit}"
+    return None
+
+
+def _to_record(spec: _ImportSpec, line_no: int, item: Any) -> tuple:
+    values = item.model_dump()
+    record = [line_no]
+    for name in spec.columns:
+        value = values.get(name)
+        if isinstance(value, Enum):
+            # Перечисления модели хранятся в БД по имени члена (CONSULTATION)
+            try:
+                value = spec.table.c[name].type.enum_class(value.value).name
+            except ValueError:
+                raise _FieldError(name, f"Недопустимое значение: {value.value}") from None
+        elif isinstance(value, float) and isinstance(spec.table.c[name].type, Numeric):
+            value = Decimal(str(value))
+        record.append(value)
+    links = values.get(spec.link_field)
+    record.append(sorted(set(links)) if links is not None else None)
+    return tuple(record)
+
+
+def prepare_import(
+    kind: ImportKind,
+    data: bytes,
+    fmt: ImportFormat,
+    *,
+    clinic_id: Optional[int] = None,
+) -> PreparedImport:
+    """
+    Разбирает и валидирует файл импорта (синхронно, CPU; вызывается в потоке).
+
+    Args:
+        clinic_id: Клиника для строк, в которых она не указана
+
+    Raises:
+        ImportFileError: Файл не удалось разобрать
+    """
+    spec = SPECS[kind]
+    content = _decode(data)
+    present: set[str] = set()
+    if fmt == ImportFormat.CSV:
+        reader = _csv_reader(content)
+        present.update(name.strip() for name in reader.fieldnames)
+        rows = _iter_csv(reader, spec)
+    else:
+        rows = _iter_ndjson(content)
+    errors: list[ImportRowError] = []
+    records: list[tuple] = []
+    keys: dict[tuple, int] = {}
+    total = 0
+
+    def flush(batch: list[tuple[int, dict]]) -> None:
+        try:
+            items = spec.adapter.validate_python([values for _, values in batch])
+            valid = batch
+        except ValidationError as exc:
+            failed = set()
+            for error in exc.errors(include_url=False):
+                index, *loc = error["loc"]
+                failed.add(index)
+                errors.append(ImportRowError(
+                    row=batch[index][0], field=".".join(map(str, loc)) or None, message=error["msg"]
+                ))
+            valid = [row for index, row in enumerate(batch) if index not in failed]
+            # Повторная проверка только валидных строк: они гарантированно проходят
+            items = spec.adapter.validate_python([values for _, values in valid]) if valid else []
+
+        for (line_no, _), item in zip(valid, items):
+            try:
+                record = _to_record(spec, line_no, item)
+            except _FieldError as exc:
+                errors.append(ImportRowError(row=line_no, field=exc.field, message=str(exc)))
+                continue
+            problem = _column_errors(spec, item.model_dump())
+            if problem is not None:
+                errors.append(ImportRowError(row=line_no, field=problem[0], message=problem[1]))
+                continue
+            key = tuple(getattr(item, name) for name in spec.key)
+            if key in keys:
+                # Повтор ключа в файле: действует последняя строка
+                previous = keys[key]
+                errors.append(ImportRowError(
+                    row=records[previous][0], message=f"Запись повторяется в строке {line_no}"
+                ))
+                records[previous] = None
+            keys[key] = len(records)
+            records.append(record)
+
+    batch: list[tuple[int, dict]] = []
+    for line_no, values in rows:
+        total += 1
+        if not isinstance(values, dict):
+            errors.append(ImportRowError(row=line_no, message="Строка должна быть объектом JSON"))
+            continue
+        if fmt == ImportFormat.NDJSON:
+            present.update(values)
+        if clinic_id is not None:
+            values.setdefault("clinic_id", clinic_id)
+        batch.append((line_no, values))
+        if len(batch) >= BATCH_SIZE:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    records = [record for record in records if record is not None]
+    if clinic_id is not None:
+        present.add("clinic_id")
+    return PreparedImport(
+        spec=spec,
+        records=records,
+        clinic_ids=[record[1 + spec.columns.index("clinic_id")] for record in records],
+        present=tuple(name for name in spec.columns if name in present),
+        total=total,
+        errors=errors,
+    )
+
+
+# ----------------------------------------------------------------------
+# Загрузка
+# ----------------------------------------------------------------------
+
+def _staging_ddl(spec: _ImportSpec) -> str:
+    dialect = postgresql.dialect()
+    columns = ", ".join(
+        f"{name} {spec.table.c[name].type.compile(dialect=dialect)}" for name in spec.columns
+    )
+    return (
+        f"CREATE TEMP TABLE {spec.staging} "
+        f"(row_no integer PRIMARY KEY, {columns}, link_ids integer[], target_id integer) ON COMMIT DROP"
+    )
+
+
+def _key_condition(spec: _ImportSpec) -> str:
+    conditions = []
+    for name in spec.key:
+        operator = "IS NOT DISTINCT FROM" if spec.table.c[name].nullable else "="
+        conditions.append(f"t.{name} {operator} st.{name}")
+    return " AND ".join(conditions)
+
+
+def _upsert_sql(spec: _ImportSpec, present: tuple[str, ...]) -> str:
+    """
+    Upsert записей и запись их ID в staging; возвращает (row_no, inserted).
+
+    Колонки ключа не обновляются; если в файле только ключ, обновляется updated_at.
+    """
+    table, staging, key = spec.table.name, spec.staging, _key_condition(spec)
+    assignments = "".join(f"{name} = st.{name}, " for name in present if name not in spec.key)
+    columns = ", ".join(spec.columns)
+    selected = ", ".join(f"st.{name}" for name in spec.columns)
+    return f"""
+        WITH updated AS (
+            UPDATE {table} t
+            SET {assignments}updated_at = timezone('utc', now())
+            FROM {staging} st
+            WHERE {key}
+            RETURNING st.row_no, t.id
+        ), inserted AS (
+            INSERT INTO {table} ({columns}, created_at, updated_at)
+            SELECT {selected}, timezone('utc', now()), timezone('utc', now())
+            FROM {staging} st
+            WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE {key})
+            ORDER BY st.row_no
+            RETURNING {", ".join(spec.key)}, id
+        ), affected AS (
+            SELECT row_no, id, false AS inserted FROM updated
+            UNION ALL
+            SELECT st.row_no, t.id, true FROM inserted t JOIN {staging} st ON {key}
+        )
+        UPDATE {staging} st
+        SET target_id = a.id
+        FROM affected a
+        WHERE st.row_no = a.row_no
+        RETURNING st.row_no, a.inserted
+    """
+
+
+def _links_sql(spec: _ImportSpec) -> str:
+    """Замена связей записей, у которых в файле указан список ID."""
+    own, other, staging = spec.link_column, spec.other_column, spec.staging
+    return f"""
+        WITH removed AS (
+            DELETE FROM service_specialist l
+            USING {staging} st
+            WHERE st.link_ids IS NOT NULL
+              AND l.{own} = st.target_id
+              AND l.{other} <> ALL(st.link_ids)
+        )
+        INSERT INTO service_specialist ({own}, {other})
+        SELECT st.target_id, unnest(st.link_ids)
+        FROM {staging} st
+        WHERE st.link_ids IS NOT NULL AND st.target_id IS NOT NULL
+        ON CONFLICT DO NOTHING
+    """
+
+
+async def _check_references(
+    db: AsyncSession,
+    prepared: PreparedImport,
+    allowed_clinic: Optional[Callable[[int], bool]],
+) -> None:
+    """Исключает строки с недоступной или несуществующей клиникой и чужими связями."""
+    spec = prepared.spec
+    clinic_ids = sorted(set(prepared.clinic_ids))
+    existing = set((await db.execute(
+        text("SELECT id FROM clinics WHERE id = ANY(:ids)"), {"ids": clinic_ids}
+    )).scalars())
+    link_ids = sorted({i for record in prepared.records if record[-1] for i in record[-1]})
+    link_clinics = dict((await db.execute(
+        text(f"SELECT id, clinic_id FROM {spec.other_table} WHERE id = ANY(:ids)"), {"ids": link_ids}
+    )).all()) if link_ids else {}
+
+    records, kept_clinics = [], []
+    for record, clinic_id in zip(prepared.records, prepared.clinic_ids):
+        line_no, links = record[0], record[-1] or ()
+        if clinic_id not in existing:
+            prepared.errors.append(ImportRowError(row=line_no, field="clinic_id", message="Клиника не найдена"))
+        elif allowed_clinic is not None and not allowed_clinic(clinic_id):
+            prepared.errors.append(ImportRowError(row=line_no, field="clinic_id", message="Нет доступа к клинике"))
+        elif foreign := [i for i in links if link_clinics.get(i) != clinic_id]:
+            prepared.errors.append(ImportRowError(
+                row=line_no, field=spec.link_field,
+                message=f"Не найдены в клинике: {', '.join(map(str, foreign))}",
+            ))
+        else:
+            records.append(record)
+            kept_clinics.append(clinic_id)
+    prepared.records, prepared.clinic_ids = records, kept_clinics
+
+
+async def load_import(
+    db: AsyncSession,
+    prepared: PreparedImport,
+    *,
+    allowed_clinic: Optional[Callable[[int], bool]] = None,
+) -> ImportReport:
+    """
+    Загружает проверенные строки одной транзакцией.
+
+    Args:
+        allowed_clinic: Проверка доступа к клинике; строки чужих клиник попадают в ошибки
+    """
+    spec = prepared.spec
+    inserted = updated = 0
+    if prepared.records:
+        await _check_references(db, prepared, allowed_clinic)
+    if prepared.records:
+        for clinic_id in sorted(set(prepared.clinic_ids)):
+            await db.execute(
+                text("SELECT pg_advisory_xact_lock(:namespace, :clinic_id)"),
+                {"namespace": _LOCK_NAMESPACE, "clinic_id": clinic_id},
+            )
+        await db.execute(text(_staging_ddl(spec)))
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            spec.staging, records=prepared.records, columns=("row_no", *spec.columns, "link_ids"),
+        )
+        for _, was_inserted in await db.execute(text(_upsert_sql(spec, prepared.present))):
+            if was_inserted:
+                inserted += 1
+            else:
+                updated += 1
+        await db.execute(text(_links_sql(spec)))
+        await db.commit()
+
+        # Сырые операторы не проходят через события ORM: кэш каталога сбрасывается явно
+        kind = "service" if spec.kind == ImportKind.SERVICES else "specialist"
+        tags = {f"{kind}:all", f"{kind}:list"} | {f"clinic:{cid}" for cid in prepared.clinic_ids}
+        if spec.kind == ImportKind.SERVICES:
+            tags |= {"specialist:all"}
+        else:
+            tags |= {"service:all"}
+        catalog_cache.invalidate_tags(tags)
+
+    errors = sorted(prepared.errors, key=lambda error: error.row)
+    return ImportReport(
+        kind=spec.kind,
+        total=prepared.total,
+        inserted=inserted,
+        updated=updated,
+        failed=len({error.row for error in errors}),
+        errors=errors,
+    )
+
+
+async def import_catalog(
+    db: AsyncSession,
+    kind: ImportKind,
+    data: bytes,
+    fmt: ImportFormat,
+    *,
+    clinic_id: Optional[int] = None,
+    allowed_clinic: Optional[Callable[[int], bool]] = None,
+) -> ImportReport:
+    """
+    Импортирует файл: разбор и валидация в потоке, загрузка через COPY.
+
+    Raises:
+        ImportFileError: Файл не удалось разобрать
+    """
+    prepared = await asyncio.to_thread(prepare_import, kind, data, fmt, clinic_id=clinic_id)
+    return await load_import(db, prepared, allowed_clinic=allowed_clinic)
+
+
+async def _main(argv: Optional[list[str]] = None) -> None:
+    import argparse
+    import os
+
+    from src.core.config import init_config
+
+    parser = argparse.ArgumentParser(description="Импорт услуг и специалистов из CSV/NDJSON")
+    parser.add_argument("kind", choices=[kind.value for kind in ImportKind])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=[fmt.value for fmt in ImportFormat], default=None,
+                        help="По умолчанию определяется по расширению файла")
+    parser.add_argument("--clinic-id", type=int, default=None, help="Клиника для строк без clinic_id")
+    args = parser.parse_args(argv)
+
+    settings = init_config(os.getenv("ENV", "development"))
+    from src.core.database import AsyncSessionLocal, db_router, init_database
+
+    init_database(settings)
+
+    fmt = ImportFormat(args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv"))
+    with open(args.path, "rb") as file:
+        data = file.read()
+    async with AsyncSessionLocal() as db:
+        report = await import_catalog(db, ImportKind(args.kind), data, fmt, clinic_id=args.clinic_id)
+    await db_router.dispose()
+    print(report.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,261 @@
+"""
+Новости клиники.
+
+Статья с автором и блоками загружается по плану ``selectinload``
+(``crud.news``): запрос на новость и по одному на связь, без ленивых
+запросов при обходе блоков. При создании и изменении опубликованная статья
+сразу рендерится в HTML и JSON, результат хранится в колонках
+``rendered_html``/``rendered_json``. Перед рендером строятся уменьшенные
+копии изображений статьи, чтобы сохраненный рендер получил ``srcset``. Страница статьи читает одну готовую
+колонку по первичному ключу — раскладка блоков на запрос не строится.
+
+Все изменения новостей должны идти через этот модуль, иначе сохраненный
+рендер устареет.
+
+``publication_date`` хранится без часового пояса в UTC и сравнивается с
+``datetime.utcnow()``; схемы приводят к UTC даты с часовым поясом.
+"""
+import asyncio
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Optional, Sequence
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup, escape
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.crud import news as crud_news
+from src.crud.base import DEFAULT_PAGE_SIZE, Page
+from src.models.news import ImagePosition, News, NewsBlock
+from src.schemas.news import NewsBlockCreate, NewsCreate, NewsUpdate, NewsWithAuthor
+from src.services.auth_service import Principal
+from src.storage.images import image_storage
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+ARTICLE_TEMPLATE = "news/article.html"
+
+
+class RenderFormat(str, Enum):
+    HTML = "html"
+    JSON = "json"
+
+
+def _paragraphs(text: Optional[str]) -> Markup:
+    """Текст блока в абзацы: пустая строка разделяет абзацы, перевод строки — <br>."""
+    if not text:
+        return Markup("")
+    parts = (part.strip() for part in text.replace("\r\n", "\n").split("\n\n"))
+    return Markup("").join(
+        Markup("<p>{}</p>").format(Markup("<br>").join(escape(line) for line in part.split("\n")))
+        for part in parts if part
+    )
+
+
+_env = Environment(
+    loader=FileSystemLoader(str(TEMPLATES_DIR)),
+    autoescape=select_autoescape(("html",)),
+    auto_reload=False,  # шаблон меняется только с деплоем
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+_env.filters["paragraphs"] = _paragraphs
+_env.globals["image_srcset"] = image_storage.srcset
+
+
+# ----------------------------------------------------------------------
+# Рендеринг
+# ----------------------------------------------------------------------
+
+def render_news(news: News) -> tuple[str, str]:
+    """
+    Рендерит статью в HTML и JSON.
+
+    Новость должна быть загружена с ``author`` и ``blocks``.
+    Email автора в публичный JSON не попадает.
+    """
+    author = f"{news.author.first_name} {news.author.last_name}" if news.author is not None else ""
+    html = _env.get_template(ARTICLE_TEMPLATE).render(news=news, author=author)
+    article = NewsWithAuthor.model_validate(
+        {
+            "id": news.id,
+            "title": news.title,
+            "excerpt": news.excerpt,
+            "cover_image": news.cover_image,
+            "is_published": news.is_published,
+            "author_id": news.author_id,
+            "author_name": author,
+            "publication_date": news.publication_date,
+            "created_at": news.created_at,
+            "updated_at": news.updated_at,
+            "blocks": news.blocks,
+        },
+        from_attributes=True,
+    )
+    return html, article.model_dump_json(exclude={"author_email"})
+
+
+async def _prepare_images(news: News) -> None:
+    """Строит копии изображений статьи (в пуле процессов), если их еще нет."""
+    urls = {news.cover_image, *(block.image_url for block in news.blocks)}
+    await asyncio.gather(*(image_storage.get_derivatives(url) for url in urls if url))
+
+
+async def _store_render(news: News) -> None:
+    """Сохраняет рендер опубликованной статьи; у черновика рендер сбрасывается."""
+    if news.is_published:
+        await _prepare_images(news)
+        news.rendered_html, news.rendered_json = render_news(news)
+        news.rendered_at = datetime.utcnow()
+    else:
+        news.rendered_html = news.rendered_json = news.rendered_at = None
+
+
+def _block(data: NewsBlockCreate) -> NewsBlock:
+    values = data.model_dump()
+    if values["image_position"] is not None:
+        values["image_position"] = ImagePosition(values["image_position"])
+    return NewsBlock(**values)
+
+
+# ----------------------------------------------------------------------
+# Чтение
+# ----------------------------------------------------------------------
+
+async def get_news(db: AsyncSession, news_id: int) -> Optional[News]:
+    """Новость с автором и блоками (для редактирования)."""
+    return await crud_news.get(db, news_id)
+
+
+def can_edit(news: News, principal: Principal) -> bool:
+    """Изменять новость могут ее автор, администратор и менеджер клиники автора."""
+    if news.author_id == principal.id and principal.is_staff:
+        return True
+    clinic_id = news.author.clinic_id if news.author is not None else None
+    return principal.is_admin or (clinic_id is not None and principal.can_access_clinic(clinic_id))
+
+
+async def get_rendered(db: AsyncSession, news_id: int, fmt: RenderFormat) -> Optional[str]:
+    """
+    Готовый рендер опубликованной статьи.
+
+    Читается одна колонка по первичному ключу. Статья, опубликованная
+    до появления рендера, рендерится при первом обращении.
+    """
+    column = News.rendered_html if fmt == RenderFormat.HTML else News.rendered_json
+    result = await db.execute(
+        select(column, News.rendered_at).where(
+            News.id == news_id,
+            News.is_published.is_(True),
+            News.publication_date <= datetime.utcnow(),
+        )
+    )
+    row = result.first()
+    if row is None:
+        return None
+    if row.rendered_at is not None:
+        return row[0]
+
+    news = await crud_news.get(db, news_id)
+    await _store_render(news)
+    await db.commit()
+    return news.rendered_html if fmt == RenderFormat.HTML else news.rendered_json
+
+
+async def list_published(
+    db: AsyncSession, *, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+) -> Page:
+    """
+    Лента опубликованных новостей, от свежих.
+
+    Элементы — строки ``Row`` с полями ``NewsPreview``: блоки, автор
+    и рендер в ленту не нужны.
+    """
+    return await crud_news.get_page(
+        db,
+        cursor=cursor,
+        limit=limit,
+        filters=(News.is_published.is_(True), News.publication_date <= datetime.utcnow()),
+        base=select(News.id, News.title, News.excerpt, News.cover_image, News.publication_date),
+    )
+
+
+# ----------------------------------------------------------------------
+# Запись
+# ----------------------------------------------------------------------
+
+async def create_news(db: AsyncSession, data: NewsCreate, *, author_id: int) -> News:
+    """Создает новость с блоками и, если она опубликована, сразу рендерит ее."""
+    news = News(
+        **data.model_dump(exclude={"blocks"}),
+        author_id=author_id,
+        blocks=[_block(block) for block in data.blocks],
+    )
+    db.add(news)
+    await db.flush()
+    # Автор нужен для рендера; блоки уже в сессии
+    news = await _reload(db, news.id)
+    await _store_render(news)
+    await db.commit()
+    return news
+
+
+async def update_news(db: AsyncSession, news: News, data: NewsUpdate) -> News:
+    """
+    Частично обновляет новость и перерисовывает сохраненный рендер.
+
+    ``blocks`` в запросе заменяет весь набор блоков.
+    Новость должна быть загружена через ``get_news``.
+    """
+    values = data.model_dump(exclude_unset=True, exclude={"blocks"})
+    for key, value in values.items():
+        setattr(news, key, value)
+    if data.blocks is not None:
+        news.blocks = [_block(block) for block in data.blocks]
+    await db.flush()
+    news = await _reload(db, news.id)
+    await _store_render(news)
+    await db.commit()
+    return news
+
+
+async def delete_news(db: AsyncSession, news_id: int) -> bool:
+    """Удаляет новость вместе с блоками."""
+    if await crud_news.remove(db, id=news_id) is None:
+        return False
+    await db.commit()
+    return True
+
+
+async def _reload(db: AsyncSession, news_id: int) -> News:
+    """Перечитывает связи после flush: новые блоки получают порядок и id из БД."""
+    result = await db.execute(
+        select(News)
+        .where(News.id == news_id)
+        .options(*crud_news.load_options())
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().one()
+
+
+async def rerender_all(db: AsyncSession, *, batch_size: int = 100) -> int:
+    """Перерисовывает все опубликованные статьи (после изменения шаблона)."""
+    count = 0
+    last_id = 0
+    while True:
+        result = await db.execute(
+            select(News)
+            .where(News.is_published.is_(True), News.id > last_id)
+            .options(*crud_news.load_options())
+            .order_by(News.id)
+            .limit(batch_size)
+        )
+        batch: Sequence[News] = result.scalars().all()
+        if not batch:
+            return count
+        for news in batch:
+            await _store_render(news)
+        await db.commit()
+        count += len(batch)
+        last_id = batch[-1].id
@@ -0,0 +1,404 @@
+"""
+Действующие акции и цены со скидкой.
+
+Горячий путь — ``PromotionIndex``: активные акции в памяти процесса,
+разложенные по корзинам (клиника, услуга). ``None`` в ключе означает
+"все клиники" (``clinic_id IS NULL``) или "все услуги" (пустой
+``service_ids``). В каждой корзине хранится временная шкала: отсортированные
+границы ``start_date``/``end_date`` и набор акций, действующих на каждом
+отрезке, так что поиск действующих акций — один ``bisect``.
+
+Индекс обновляется инкрементально: по событиям инвалидации каталога
+(``promotion:<id>``) и по метке ``updated_at`` перечитываются только
+изменившиеся акции, а перестраиваются только их корзины. Полная
+перезагрузка выполняется при массовых изменениях и раз в
+``PROMOTION_FULL_RELOAD_INTERVAL`` — так подхватываются удаления из других
+процессов.
+
+Холодные запросы к БД (``applicable_promotions``) опираются на GIN-индекс
+по ``service_ids`` и частичный индекс активных акций по ``end_date``.
+"""
+import asyncio
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Optional, Sequence
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import catalog_cache
+from src.core.database import use_primary
+from src.crud import promotion as crud_promotion
+from src.crud.base import DEFAULT_PAGE_SIZE, Page
+from src.models.clinic import Clinic
+from src.models.promotion import Promotion
+from src.schemas.promotion import DiscountType, Promotion as PromotionSchema, PromotionWithClinic
+from src.schemas.service import Service as ServiceSchema
+from src.schemas.validators import list_adapter
+
+BucketKey = tuple[Optional[int], Optional[int]]
+
+# Запас метки updated_at: транзакция могла записать updated_at до проверки,
+# а зафиксироваться после нее. Такие акции перечитываются повторно, это дешево.
+WATERMARK_LAG = timedelta(minutes=5)
+
+
+@dataclass(frozen=True, slots=True)
+class _Entry:
+    """Акция в индексе: только поля, нужные для расчета цены."""
+    id: int
+    clinic_id: Optional[int]
+    service_ids: tuple[int, ...]
+    discount_type: str
+    discount_value: Optional[float]
+    final_price: Optional[float]
+    start: datetime
+    end: datetime
+    is_featured: bool
+
+    @property
+    def keys(self) -> list[BucketKey]:
+        return [(self.clinic_id, sid) for sid in self.service_ids] or [(self.clinic_id, None)]
+
+    def price(self, base: float) -> float:
+        """Цена услуги с этой акцией."""
+        if self.discount_type == DiscountType.PERCENTAGE and self.discount_value is not None:
+            price = base * (100 - self.discount_value) / 100
+        elif self.discount_type == DiscountType.FIXED and self.discount_value is not None:
+            price = base - self.discount_value
+        elif self.discount_type == DiscountType.SPECIAL and self.final_price is not None:
+            price = min(base, self.final_price)
+        else:  # подарок или скидка без значения: цена не меняется
+            price = base
+        return max(0.0, round(price, 2))
+
+
+@dataclass(frozen=True)
+class PriceQuote:
+    """
+    Цена услуги с учетом акций.
+
+    Attributes:
+        price: Базовая цена
+        final_price: Лучшая цена среди действующих акций (равна price, если акций нет)
+        promotion_id: Акция, давшая final_price
+        promotion_ids: Все действующие акции услуги
+    """
+    price: float
+    final_price: float
+    promotion_id: Optional[int] = None
+    promotion_ids: tuple[int, ...] = ()
+
+
+class _Timeline:
+    """Акции одной корзины как последовательность отрезков времени."""
+    __slots__ = ("boundaries", "segments")
+
+    def __init__(self, entries: Iterable[_Entry]):
+        starts: dict[datetime, list[_Entry]] = {}
+        ends: dict[datetime, list[_Entry]] = {}
+        for entry in entries:
+            starts.setdefault(entry.start, []).append(entry)
+            ends.setdefault(entry.end, []).append(entry)
+        self.boundaries = sorted(starts.keys() | ends.keys())
+        # Отрезок i — [boundaries[i], boundaries[i + 1]); проход по границам слева направо
+        self.segments: list[tuple[_Entry, ...]] = []
+        active: dict[int, _Entry] = {}
+        for boundary in self.boundaries[:-1]:
+            for entry in ends.get(boundary, ()):
+                active.pop(entry.id, None)
+            for entry in starts.get(boundary, ()):
+                if entry.start < entry.end:
+                    active[entry.id] = entry
+            self.segments.append(tuple(active.values()))
+
+    def at(self, moment: datetime) -> tuple[_Entry, ...]:
+        index = bisect_right(self.boundaries, moment) - 1
+        if 0 <= index < len(self.segments):
+            return self.segments[index]
+        return ()
+
+
+def _entry(row: Any) -> _Entry:
+    return _Entry(
+        id=row.id,
+        clinic_id=row.clinic_id,
+        service_ids=tuple(sorted(set(row.service_ids or ()))),
+        discount_type=row.discount_type,
+        discount_value=float(row.discount_value) if row.discount_value is not None else None,
+        final_price=float(row.final_price) if row.final_price is not None else None,
+        start=row.start_date,
+        end=row.end_date,
+        is_featured=row.is_featured,
+    )
+
+
+_COLUMNS = (
+    Promotion.id, Promotion.clinic_id, Promotion.service_ids, Promotion.discount_type, Promotion.discount_value,
+    Promotion.final_price, Promotion.start_date, Promotion.end_date, Promotion.is_featured, Promotion.is_active,
+    Promotion.updated_at,
+)
+
+
+class PromotionIndex:
+    """
+    Индекс действующих акций процесса.
+
+    Attributes:
+        refresh_interval: Как часто проверять изменения в БД, секунды
+        full_reload_interval: Как часто перечитывать все акции, секунды
+    """
+
+    def __init__(self, refresh_interval: float = 30, full_reload_interval: float = 600):
+        self.configure(refresh_interval, full_reload_interval)
+
+    def configure(self, refresh_interval: float, full_reload_interval: float) -> None:
+        self.refresh_interval = refresh_interval
+        self.full_reload_interval = full_reload_interval
+        self._entries: dict[int, _Entry] = {}
+        self._timelines: dict[BucketKey, _Timeline] = {}
+        self._watermark: Optional[datetime] = None
+        self._checked_at = 0.0
+        self._loaded_at = 0.0
+        self._stale_ids: set[int] = set()
+        self._reload = True
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Обновление
+    # ------------------------------------------------------------------
+
+    def on_invalidate(self, tags: frozenset[str]) -> None:
+        """Слушатель инвалидации каталога: помечает изменившиеся акции."""
+        for tag in tags:
+            if tag == "promotion:all":
+                self._reload = True
+            elif tag.startswith("promotion:") and tag[10:].isdigit():
+                self._stale_ids.add(int(tag[10:]))
+
+    def _needs_refresh(self) -> bool:
+        now = time.monotonic()
+        return (
+            self._reload
+            or bool(self._stale_ids)
+            or now - self._checked_at >= self.refresh_interval
+            or now - self._loaded_at >= self.full_reload_interval
+        )
+
+    async def ensure_fresh(self, db: AsyncSession) -> None:
+        """
+        Обновляет индекс, если он устарел.
+
+        Пока один запрос обновляет индекс, остальные читают текущий снимок
+        и не ждут; ждут только запросы до первой загрузки.
+        """
+        if not self._needs_refresh():
+            return
+        if self._lock.locked() and self._loaded_at:
+            return
+        async with self._lock:
+            if not self._needs_refresh():
+                return
+            use_primary(db)  # изменения после инвалидации могли еще не дойти до реплики
+            if self._reload or time.monotonic() - self._loaded_at >= self.full_reload_interval:
+                await self._load_all(db)
+            else:
+                await self._load_changes(db)
+
+    async def _load_all(self, db: AsyncSession) -> None:
+        self._reload = False
+        self._stale_ids.clear()
+        now = datetime.utcnow()
+        rows = (await db.execute(
+            select(*_COLUMNS).where(Promotion.is_active.is_(True), Promotion.end_date > now)
+        )).all()
+        self._entries = {row.id: _entry(row) for row in rows}
+        buckets: dict[BucketKey, list[_Entry]] = {}
+        for entry in self._entries.values():
+            for key in entry.keys:
+                buckets.setdefault(key, []).append(entry)
+        self._timelines = {key: _Timeline(entries) for key, entries in buckets.items()}
+        self._watermark = now - WATERMARK_LAG
+        self._loaded_at = self._checked_at = time.monotonic()
+
+    async def _load_changes(self, db: AsyncSession) -> None:
+        stale, self._stale_ids = self._stale_ids, set()
+        conditions = [Promotion.updated_at >= self._watermark]
+        if stale:
+            conditions.append(Promotion.id.in_(stale))
+        now = datetime.utcnow()
+        rows = (await db.execute(select(*_COLUMNS).where(or_(*conditions)))).all()
+        self._watermark = now - WATERMARK_LAG
+        self._checked_at = time.monotonic()
+
+        changed: dict[int, Optional[_Entry]] = {promotion_id: None for promotion_id in stale}
+        for row in rows:
+            changed[row.id] = _entry(row) if row.is_active and row.end_date > now else None
+
+        affected: set[BucketKey] = set()
+        for promotion_id, entry in changed.items():
+            previous = self._entries.pop(promotion_id, None)
+            if previous is not None:
+                affected.update(previous.keys)
+            if entry is not None:
+                self._entries[promotion_id] = entry
+                affected.update(entry.keys)
+        if not affected:
+            return
+
+        buckets: dict[BucketKey, list[_Entry]] = {key: [] for key in affected}
+        for entry in self._entries.values():
+            for key in entry.keys:
+                if key in buckets:
+                    buckets[key].append(entry)
+        for key, entries in buckets.items():
+            if entries:
+                self._timelines[key] = _Timeline(entries)
+            else:
+                self._timelines.pop(key, None)
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+
+    def active(self, clinic_id: int, service_id: int, now: Optional[datetime] = None) -> list[_Entry]:
+        """Акции, действующие для услуги клиники в момент now."""
+        now = now or datetime.utcnow()
+        found: dict[int, _Entry] = {}
+        for key in ((clinic_id, service_id), (clinic_id, None), (None, service_id), (None, None)):
+            timeline = self._timelines.get(key)
+            if timeline is not None:
+                found.update((e.id, e) for e in timeline.at(now))
+        return list(found.values())
+
+    def quote_many(
+        self,
+        items: Sequence[tuple[int, int, float]],
+        now: Optional[datetime] = None,
+    ) -> list[PriceQuote]:
+        """
+        Цены для страницы услуг за один проход.
+
+        Отрезки шкалы ищутся один раз на корзину, а не на услугу: услуги
+        одной клиники разделяют корзины "все услуги клиники" и "вся сеть".
+
+        Args:
+            items: (service_id, clinic_id, базовая цена)
+        """
+        now = now or datetime.utcnow()
+        segments: dict[BucketKey, tuple[_Entry, ...]] = {}
+
+        def at(key: BucketKey) -> tuple[_Entry, ...]:
+            found = segments.get(key)
+            if found is None:
+                timeline = self._timelines.get(key)
+                found = segments[key] = timeline.at(now) if timeline is not None else ()
+            return found
+
+        quotes = []
+        for service_id, clinic_id, price in items:
+            price = float(price)
+            candidates = {
+                e.id: e
+                for key in ((clinic_id, service_id), (clinic_id, None), (None, service_id), (None, None))
+                for e in at(key)
+            }
+            if not candidates:
+                quotes.append(PriceQuote(price, price))
+                continue
+            # Лучшая цена; при равенстве — выделенная акция, затем более ранняя
+            best = min(candidates.values(), key=lambda e: (e.price(price), not e.is_featured, e.id))
+            quotes.append(PriceQuote(price, best.price(price), best.id, tuple(sorted(candidates))))
+        return quotes
+
+
+# Глобальный индекс акций; интервалы задаются через init_promotion_index
+promotion_index = PromotionIndex()
+catalog_cache.add_invalidation_listener(promotion_index.on_invalidate)
+
+
+def init_promotion_index(settings) -> PromotionIndex:
+    """Настраивает интервалы обновления индекса акций по конфигурации."""
+    promotion_index.configure(settings.PROMOTION_REFRESH_INTERVAL, settings.PROMOTION_FULL_RELOAD_INTERVAL)
+    return promotion_index
+
+
+async def with_prices(db: AsyncSession, services: Sequence[Any]) -> list[ServiceSchema]:
+    """
+    Услуги страницы с ценой по акциям.
+
+    Принимает ORM-объекты или схемы (в том числе из кэша каталога);
+    возвращает новые схемы, исходные объекты не меняются.
+    """
+    await promotion_index.ensure_fresh(db)
+    schemas = list_adapter(ServiceSchema).validate_python(services, from_attributes=True)
+    quotes = promotion_index.quote_many([(s.id, s.clinic_id, s.price) for s in schemas])
+    return [
+        schema.model_copy(update={"final_price": quote.final_price, "promotion_id": quote.promotion_id})
+        for schema, quote in zip(schemas, quotes)
+    ]
+
+
+async def applicable_promotions(
+    db: AsyncSession,
+    service_id: int,
+    clinic_id: int,
+    *,
+    now: Optional[datetime] = None,
+) -> list[PromotionSchema]:
+    """
+    Полные данные действующих акций услуги из БД (холодный путь).
+
+    ``service_ids @> ARRAY[id]`` использует GIN-индекс, окно дат — частичный
+    индекс активных акций.
+    """
+    now = now or datetime.utcnow()
+    stmt = (
+        select(Promotion)
+        .where(
+            Promotion.is_active.is_(True),
+            Promotion.start_date <= now,
+            Promotion.end_date > now,
+            or_(Promotion.clinic_id == clinic_id, Promotion.clinic_id.is_(None)),
+            or_(
+                Promotion.service_ids.contains([service_id]),
+                Promotion.service_ids.is_(None),
+                func.cardinality(Promotion.service_ids) == 0,
+            ),
+        )
+        .order_by(Promotion.is_featured.desc(), Promotion.end_date, Promotion.id)
+    )
+    return list_adapter(PromotionSchema).validate_python((await db.execute(stmt)).scalars().all(), from_attributes=True)
+
+
+# Колонки PromotionWithClinic: поля акции и клиника через LEFT JOIN (у общих акций клиники нет)
+_WITH_CLINIC_COLUMNS = [
+    column for name, column in Promotion.__table__.c.items() if name in PromotionWithClinic.model_fields
+] + [Clinic.name.label("clinic_name"), Clinic.address.label("clinic_address")]
+
+
+async def list_active_page(
+    db: AsyncSession,
+    *,
+    clinic_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    now: Optional[datetime] = None,
+) -> Page:
+    """
+    Страница действующих акций с названием и адресом клиники.
+
+    Выбираются колонки, а не объекты ORM: элементы страницы — строки ``Row``
+    с полями ``PromotionWithClinic``, их сериализует ``src.core.responses``.
+    """
+    now = now or datetime.utcnow()
+    filters = [Promotion.is_active.is_(True), Promotion.start_date <= now, Promotion.end_date > now]
+    if clinic_id is not None:
+        filters.append(or_(Promotion.clinic_id == clinic_id, Promotion.clinic_id.is_(None)))
+    base = select(*_WITH_CLINIC_COLUMNS).outerjoin(Clinic, Clinic.id == Promotion.clinic_id)
+    return await crud_promotion.get_page(db, cursor=cursor, limit=limit, filters=filters, base=base)
@@ -0,0 +1,125 @@
+"""
+Поиск по услугам, специалистам и новостям.
+
+Основной путь — полнотекстовый поиск по колонкам ``search_vector`` (GIN):
+запрос разбирается в двух конфигурациях, ``russian`` (стемминг: "кошки" ->
+"кошк") и ``simple`` (фамилии без искажений), и объединяется через OR.
+Если совпадений меньше лимита, результаты дополняются триграммным поиском
+(``pg_trgm``), который находит слова с опечатками.
+
+Каждая ветка UNION ALL сортируется и ограничивается отдельно, поэтому
+планировщик использует индекс своей таблицы и не ранжирует лишние строки
+чужих сущностей. Ранги нормализованы (``ts_rank_cd(..., 32)`` и
+``word_similarity``) в диапазон 0..1 и сравнимы между сущностями.
+"""
+from typing import Iterable, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.service import ServiceStatus
+from src.schemas.search import SearchEntity, SearchResult
+
+MAX_QUERY_LENGTH = 200
+
+_FTS_BRANCHES = {
+    SearchEntity.SERVICE: """
+        SELECT 'service' AS type, s.id, s.name AS title, s.short_description AS snippet,
+               ts_rank_cd(s.search_vector, q.query, 32) AS rank
+        FROM services s, q
+        WHERE s.search_vector @@ q.query AND s.status = :service_status
+        ORDER BY rank DESC
+        LIMIT :limit
+    """,
+    SearchEntity.SPECIALIST: """
+        SELECT 'specialist' AS type, sp.id, concat_ws(' ', sp.last_name, sp.first_name, sp.patronymic) AS title,
+               sp.specialization AS snippet, ts_rank_cd(sp.search_vector, q.query, 32) AS rank
+        FROM specialists sp, q
+        WHERE sp.search_vector @@ q.query
+        ORDER BY rank DESC
+        LIMIT :limit
+    """,
+    SearchEntity.NEWS: """
+        SELECT 'news' AS type, n.id, n.title, n.excerpt AS snippet,
+               ts_rank_cd(n.search_vector, q.query, 32) AS rank
+        FROM news n, q
+        WHERE n.search_vector @@ q.query AND n.is_published
+        ORDER BY rank DESC
+        LIMIT :limit
+    """,
+}
+
+# Оператор <% (word_similarity) ищет запрос как часть строки: "Иванв" найдет "Иванов Петр"
+_TRIGRAM_BRANCHES = {
+    SearchEntity.SERVICE: """
+        SELECT 'service' AS type, s.id, s.name AS title, s.short_description AS snippet,
+               word_similarity(:query, s.name) AS rank
+        FROM services s
+        WHERE :query <% s.name AND s.status = :service_status
+        ORDER BY rank DESC
+        LIMIT :limit
+    """,
+    SearchEntity.SPECIALIST: """
+        SELECT 'specialist' AS type, sp.id, concat_ws(' ', sp.last_name, sp.first_name, sp.patronymic) AS title,
+               sp.specialization AS snippet, word_similarity(:query, sp.last_name) AS rank
+        FROM specialists sp
+        WHERE :query <% sp.last_name
+        ORDER BY rank DESC
+        LIMIT :limit
+    """,
+    SearchEntity.NEWS: """
+        SELECT 'news' AS type, n.id, n.title, n.excerpt AS snippet,
+               word_similarity(:query, n.title) AS rank
+        FROM news n
+        WHERE :query <% n.title AND n.is_published
+        ORDER BY rank DESC
+        LIMIT :limit
+    """,
+}
+
+_FTS_QUERY_CTE = (
+    "WITH q AS (SELECT websearch_to_tsquery('russian', :query) "
+    "|| websearch_to_tsquery('simple', :query) AS query)"
+)
+
+
+def _union(branches: dict, entities: Iterable[SearchEntity], prefix: str = "") -> str:
+    parts = " UNION ALL ".join(f"({branches[entity]})" for entity in entities)
+    return f"{prefix} SELECT type, id, title, snippet, rank FROM ({parts}) AS r ORDER BY rank DESC LIMIT :limit"
+
+
+async def search(
+    db: AsyncSession,
+    query: str,
+    *,
+    entities: Sequence[SearchEntity] = tuple(SearchEntity),
+    limit: int = 20,
+) -> tuple[list[SearchResult], bool]:
+    """
+    Ищет по выбранным сущностям.
+
+    Returns:
+        Результаты в порядке релевантности и флаг, что использовался нечеткий поиск
+    """
+    query = " ".join(query.split())[:MAX_QUERY_LENGTH]
+    if not query or not entities:
+        return [], False
+
+    params = {"query": query, "limit": limit, "service_status": ServiceStatus.ACTIVE.name}
+    result = await db.execute(text(_union(_FTS_BRANCHES, entities, _FTS_QUERY_CTE)), params)
+    items = [SearchResult(**row) for row in result.mappings()]
+    if len(items) >= limit:
+        return items, False
+
+    # Добираем триграммами: опечатки и слова, которых нет в словаре
+    found = {(item.type, item.id) for item in items}
+    result = await db.execute(text(_union(_TRIGRAM_BRANCHES, entities)), params)
+    fuzzy = False
+    for row in result.mappings():
+        item = SearchResult(**row)
+        if (item.type, item.id) not in found:
+            items.append(item)
+            fuzzy = True
+            if len(items) >= limit:
+                break
+    return items, fuzzy
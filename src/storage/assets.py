@@ -0,0 +1,251 @@
+"""
+Сборка статики: имена с хэшем содержимого и предсжатые копии.
+
+Каждый файл из ``src/static`` копируется в каталог сборки дважды: под
+исходным именем (для старых ссылок) и под именем с хэшем
+(``css/style.3f2a1b9c0d4e.css``). Хэшированные файлы никогда не меняются,
+поэтому отдаются с ``Cache-Control: immutable`` на год. Текстовые форматы
+дополнительно сжимаются в ``.gz`` и ``.br`` (если установлен ``brotli``);
+сжатая копия сохраняется, только если она меньше оригинала.
+
+Соответствие исходных и хэшированных имен хранится в ``manifest.json``;
+шаблоны получают URL через ``asset_url("css/style.css")``.
+
+Сборка выполняется один раз при деплое, до запуска воркеров::
+
+    python -m src.storage.assets
+
+При старте приложения читается только манифест; собирать при старте
+(``STATIC_BUILD_ON_STARTUP``) имеет смысл только в разработке.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import stat
+import uuid
+from pathlib import Path
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:  # без brotli отдаются только .gz
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_SOURCE = Path(__file__).resolve().parent.parent / "static"
+MANIFEST_NAME = "manifest.json"
+HASH_LENGTH = 12
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".mjs", ".svg", ".json", ".map", ".txt", ".html", ".xml", ".ico"}
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Порядок предпочтения: br сжимает текст заметно лучше gzip
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _compress(data: bytes) -> dict[str, bytes]:
+    """Сжатые варианты, которые меньше оригинала."""
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return {suffix: body for suffix, body in variants.items() if len(body) < len(data)}
+
+
+def build_assets(source: Path, target: Path) -> dict[str, str]:
+    """
+    Собирает статику из source в target.
+
+    Хэшированные файлы адресуются по содержимому и не перезаписываются,
+    поэтому повторная сборка без изменений только сверяет хэши. Старые
+    хэшированные файлы не удаляются: их могут запрашивать страницы,
+    отрендеренные предыдущей версией.
+
+    Returns:
+        Манифест: исходный путь -> путь с хэшем (относительно target)
+    """
+    manifest: dict[str, str] = {}
+    for path in sorted(source.rglob("*")):
+        if not path.is_file() or any(part.startswith(".") for part in path.relative_to(source).parts):
+            continue
+        rel = path.relative_to(source)
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        hashed = rel.with_name(f"{rel.stem}.{digest}{rel.suffix}")
+        manifest[rel.as_posix()] = hashed.as_posix()
+
+        original = target / rel
+        hashed_path = target / hashed
+        changed = not original.is_file() or original.read_bytes() != data
+        fresh = not hashed_path.is_file()
+        outputs = [p for p, write in ((original, changed), (hashed_path, fresh)) if write]
+        if not outputs:
+            continue
+        variants = _compress(data) if rel.suffix.lower() in COMPRESSIBLE_SUFFIXES else {}
+        for output in outputs:
+            _write_atomic(output, data)
+            for _, suffix in _ENCODINGS:
+                sibling = output.with_name(output.name + suffix)
+                if suffix in variants:
+                    _write_atomic(sibling, variants[suffix])
+                else:
+                    sibling.unlink(missing_ok=True)
+
+    _write_atomic(target / MANIFEST_NAME, json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    """Кодировки из Accept-Encoding с ненулевым q."""
+    accepted = set()
+    for item in header.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name)
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles, который отдает ``.br``/``.gz``-копию по ``Accept-Encoding``.
+
+    Файлы из ``immutable`` (имена с хэшем) кэшируются клиентом на год,
+    остальные — с обязательной проверкой ETag.
+    """
+
+    def __init__(self, *, directory: str | os.PathLike, immutable: frozenset[str] = frozenset(), **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.root = Path(directory).resolve()
+        self.immutable = immutable
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        encoding = None
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+        for name, suffix in _ENCODINGS:
+            if name not in accepted:
+                continue
+            candidate = f"{full_path}{suffix}"
+            try:
+                candidate_stat = os.stat(candidate)
+            except OSError:
+                continue
+            if stat.S_ISREG(candidate_stat.st_mode):
+                full_path, stat_result, encoding = candidate, candidate_stat, name
+                break
+
+        # Тип определяется по имени: для "style.css.br" mimetypes вернет text/css
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        if encoding is not None:
+            response.headers["content-encoding"] = encoding
+        response.headers["vary"] = "Accept-Encoding"
+        try:
+            rel = Path(full_path).resolve().relative_to(self.root).as_posix()
+        except ValueError:
+            rel = ""
+        if encoding is not None:
+            rel = rel.rsplit(".", 1)[0]
+        response.headers["cache-control"] = IMMUTABLE_CACHE if rel in self.immutable else REVALIDATE_CACHE
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+class StaticAssets:
+    """
+    Статика приложения: манифест, URL для шаблонов и обработчик ``/static``.
+
+    Attributes:
+        source: Исходный каталог статики
+        target: Каталог сборки
+        url_prefix: URL-префикс, под которым монтируется обработчик
+        manifest: Исходный путь -> путь с хэшем; пуст, если сборки нет
+    """
+
+    def __init__(self, source: str | Path = STATIC_SOURCE, target: str | Path = "static_build", url_prefix: str = "/static/"):
+        self.configure(source, target, url_prefix)
+
+    def configure(self, source: str | Path, target: str | Path, url_prefix: str) -> None:
+        self.source = Path(source).resolve()
+        self.target = Path(target).resolve()
+        self.url_prefix = "/" + url_prefix.strip("/") + "/"
+        self.manifest: dict[str, str] = {}
+
+    def build(self) -> None:
+        self.manifest = build_assets(self.source, self.target)
+
+    def load(self) -> bool:
+        """Читает манифест готовой сборки; False, если сборки нет."""
+        try:
+            self.manifest = json.loads((self.target / MANIFEST_NAME).read_text())
+        except (OSError, ValueError):
+            self.manifest = {}
+        return bool(self.manifest)
+
+    def url(self, path: str) -> str:
+        """URL файла с хэшем в имени или, без сборки, исходный URL."""
+        path = path.lstrip("/")
+        return self.url_prefix + self.manifest.get(path, path)
+
+    def files(self) -> StaticFiles:
+        """Обработчик для ``app.mount``: сборка, если она есть, иначе исходный каталог."""
+        if self.manifest:
+            return PrecompressedStaticFiles(directory=self.target, immutable=frozenset(self.manifest.values()))
+        return StaticFiles(directory=self.source)
+
+
+# Глобальная статика; каталоги задаются через init_static_assets
+static_assets = StaticAssets()
+
+
+def init_static_assets(settings) -> StaticAssets:
+    """Настраивает статику по конфигурации и собирает ее или загружает готовый манифест."""
+    static_assets.configure(STATIC_SOURCE, settings.STATIC_BUILD_DIR, "/static/")
+    if settings.STATIC_BUILD_ON_STARTUP:
+        try:
+            static_assets.build()
+        except OSError:
+            logger.exception("Не удалось собрать статику, используются исходные файлы")
+            static_assets.load()
+    elif not static_assets.load():
+        logger.warning(
+            "Нет сборки статики в %s (python -m src.storage.assets), используются исходные файлы",
+            static_assets.target,
+        )
+    return static_assets
+
+
+if __name__ == "__main__":
+    assets = StaticAssets(target=os.environ.get("STATIC_BUILD_DIR", "static_build"))
+    assets.build()
+    print(f"Собрано файлов: {len(assets.manifest)} -> {assets.target}")
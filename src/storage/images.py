@@ -0,0 +1,265 @@
+"""
+Адаптивные производные изображений (resize + WebP).
+
+Для каждого загруженного изображения один раз строится набор уменьшенных
+копий по фиксированным ширинам (``IMAGE_BREAKPOINTS``). Копии адресуются
+по содержимому: каталог — sha256 исходного файла вместе с параметрами
+конвейера, поэтому одинаковые файлы обрабатываются один раз, а изменение
+параметров не смешивается со старыми копиями.
+
+Декодирование и ресайз выполняются в пуле процессов: это CPU-нагрузка,
+которая в event loop (и даже в потоке — из-за GIL) блокировала бы запросы.
+Файл, копии которого построить не удалось (битое или неподдерживаемое
+изображение), запоминается по (путь, mtime, размер) и в пул повторно не
+отправляется, пока не изменится.
+
+Структура на диске::
+
+    MEDIA_ROOT/derivatives/ab/abcdef.../manifest.json
+    MEDIA_ROOT/derivatives/ab/abcdef.../640.webp
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+IMAGE_BREAKPOINTS = (320, 640, 960, 1280, 1920)
+WEBP_QUALITY = 80
+PIPELINE_VERSION = 1
+DERIVATIVES_DIR = "derivatives"
+MANIFEST_NAME = "manifest.json"
+
+_PARAMS_KEY = f"v{PIPELINE_VERSION}:{','.join(map(str, IMAGE_BREAKPOINTS))}:q{WEBP_QUALITY}".encode()
+
+
+@dataclass(frozen=True)
+class ImageVariant:
+    """Одна производная копия."""
+    width: int
+    height: int
+    url: str
+
+
+@dataclass(frozen=True)
+class ImageSet:
+    """Набор производных одного изображения, отсортированный по ширине."""
+    original_url: str
+    variants: tuple[ImageVariant, ...]
+
+    @property
+    def srcset(self) -> str:
+        """Значение атрибута ``srcset``."""
+        return ", ".join(f"{v.url} {v.width}w" for v in self.variants)
+
+    @property
+    def src(self) -> str:
+        """Запасной ``src``: самая крупная копия не шире 960px."""
+        fallback = [v for v in self.variants if v.width <= 960] or list(self.variants)
+        return fallback[-1].url if fallback else self.original_url
+
+
+# ----------------------------------------------------------------------
+# Работа в процессе-воркере
+# ----------------------------------------------------------------------
+
+def _file_digest(path: str) -> str:
+    """sha256 файла и параметров конвейера (читается блоками, без загрузки целиком)."""
+    digest = hashlib.sha256(_PARAMS_KEY)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _render_derivatives(source: str, target_dir: str) -> list[tuple[int, int, str]]:
+    """
+    Строит WebP-копии изображения. Выполняется в отдельном процессе.
+
+    Копии шире исходного изображения не создаются; если исходник уже
+    меньше минимальной ширины, создается одна копия в исходном размере.
+    Файлы пишутся во временные имена и переименовываются атомарно.
+    """
+    from PIL import Image, ImageOps
+
+    os.makedirs(target_dir, exist_ok=True)
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+        widths = [w for w in IMAGE_BREAKPOINTS if w < img.width] or [img.width]
+
+        variants = []
+        for width in widths:
+            height = max(1, round(img.height * width / img.width))
+            resized = img if width == img.width else img.resize((width, height), Image.Resampling.LANCZOS)
+            name = f"{width}.webp"
+            tmp_path = os.path.join(target_dir, f".{name}.{os.getpid()}.tmp")
+            resized.save(tmp_path, "WEBP", quality=WEBP_QUALITY, method=4)
+            os.replace(tmp_path, os.path.join(target_dir, name))
+            variants.append((width, height, name))
+
+    manifest = {"version": PIPELINE_VERSION, "variants": variants}
+    tmp_manifest = os.path.join(target_dir, f".{MANIFEST_NAME}.{os.getpid()}.tmp")
+    with open(tmp_manifest, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_manifest, os.path.join(target_dir, MANIFEST_NAME))
+    return variants
+
+
+def _process_image(source: str, derivatives_root: str) -> tuple[str, list[tuple[int, int, str]]]:
+    """Хэширует исходник и строит копии, если их еще нет на диске."""
+    digest = _file_digest(source)
+    target_dir = os.path.join(derivatives_root, digest[:2], digest)
+    manifest_path = os.path.join(target_dir, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            return digest, [tuple(v) for v in json.load(f)["variants"]]
+    return digest, _render_derivatives(source, target_dir)
+
+
+# ----------------------------------------------------------------------
+# Асинхронный интерфейс
+# ----------------------------------------------------------------------
+
+class ImageStorage:
+    """
+    Хранилище производных изображений.
+
+    Attributes:
+        media_root: Корневой каталог загруженных файлов
+        media_url: URL-префикс, под которым раздается media_root
+        max_workers: Размер пула процессов
+    """
+
+    def __init__(self, media_root: str | Path = "media", media_url: str = "/media/", max_workers: Optional[int] = None):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.configure(media_root, media_url, max_workers)
+
+    def configure(self, media_root: str | Path, media_url: str, max_workers: Optional[int] = None) -> None:
+        """Задает каталоги и размер пула; сбрасывает накопленное состояние."""
+        self.shutdown()
+        self.media_root = Path(media_root).resolve()
+        self.media_url = "/" + media_url.strip("/") + "/"
+        self.derivatives_root = self.media_root / DERIVATIVES_DIR
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        self._inflight: dict[Path, asyncio.Future] = {}
+        # (путь, mtime, размер) -> готовый набор; исходник не хэшируется повторно
+        self._sets: dict[tuple[Path, float, int], ImageSet] = {}
+        # Ключи файлов, копии которых построить не удалось
+        self._failed: set[tuple[Path, float, int]] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def shutdown(self) -> None:
+        """Останавливает пул процессов (при остановке приложения)."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def resolve(self, url: str) -> Optional[Path]:
+        """Переводит URL вида ``/media/...`` в путь на диске; внешние URL не обрабатываются."""
+        if not url or not url.startswith(self.media_url):
+            return None
+        path = (self.media_root / url[len(self.media_url):]).resolve()
+        if not path.is_relative_to(self.media_root) or path.is_relative_to(self.derivatives_root):
+            return None
+        return path
+
+    def _set_key(self, path: Path) -> Optional[tuple[Path, float, int]]:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return path, stat.st_mtime, stat.st_size
+
+    def _build_set(self, url: str, digest: str, variants: list[tuple[int, int, str]]) -> ImageSet:
+        base = f"{self.media_url}{DERIVATIVES_DIR}/{digest[:2]}/{digest}/"
+        return ImageSet(
+            original_url=url,
+            variants=tuple(ImageVariant(w, h, base + name) for w, h, name in sorted(variants)),
+        )
+
+    async def get_derivatives(self, url: str) -> Optional[ImageSet]:
+        """
+        Возвращает набор копий изображения, строя его при первом обращении.
+
+        Одновременные запросы одного файла ждут одну и ту же задачу в пуле.
+        Возвращает None для внешних URL, отсутствующих и битых файлов.
+        """
+        path = self.resolve(url)
+        key = self._set_key(path) if path else None
+        if key is None or key in self._failed:
+            return None
+        cached = self._sets.get(key)
+        if cached is not None:
+            return cached
+
+        future = self._inflight.get(path)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor(), _process_image, str(path), str(self.derivatives_root))
+            self._inflight[path] = future
+            future.add_done_callback(lambda _: self._inflight.pop(path, None))
+        try:
+            digest, variants = await asyncio.shield(future)
+        except BrokenExecutor:
+            logger.exception("Пул обработки изображений остановлен, копии %s не построены", url)
+            return None
+        except Exception:
+            logger.exception("Не удалось построить копии изображения %s", url)
+            self._failed.add(key)
+            return None
+
+        image_set = self._build_set(url, digest, variants)
+        self._sets[key] = image_set
+        return image_set
+
+    def schedule(self, url: str) -> None:
+        """Запускает построение копий в фоне (например, сразу после загрузки файла)."""
+        if self.resolve(url) is not None:
+            task = asyncio.get_running_loop().create_task(self.get_derivatives(url))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def srcset(self, url: Optional[str]) -> str:
+        """
+        Синхронный помощник для шаблонов Jinja.
+
+        Возвращает ``srcset`` уже построенных копий. Если копий еще нет,
+        запускает их построение в фоне и возвращает пустую строку —
+        шаблон в этом случае использует исходный ``src``.
+        """
+        if not url:
+            return ""
+        path = self.resolve(url)
+        key = self._set_key(path) if path else None
+        if key is None or key in self._failed:
+            return ""
+        cached = self._sets.get(key)
+        if cached is not None:
+            return cached.srcset
+        try:
+            self.schedule(url)
+        except RuntimeError:
+            pass  # нет event loop (например, рендер вне приложения)
+        return ""
+
+
+# Глобальное хранилище; каталоги задаются через init_image_storage
+image_storage = ImageStorage()
+
+
+def init_image_storage(settings) -> ImageStorage:
+    """Настраивает глобальное хранилище изображений по конфигурации приложения."""
+    image_storage.configure(settings.MEDIA_ROOT, settings.MEDIA_URL)
+    return image_storage
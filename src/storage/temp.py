@@ -0,0 +1,457 @@
+"""
+Поблочная загрузка больших файлов с возобновлением.
+
+Протокол: ``init`` -> ``PUT`` блока N (в любом порядке, повторно) ->
+``finalize``. Тело блока пишется на диск по мере поступления, поэтому
+память на запрос ограничена буфером чтения, а не размером файла.
+
+Состояние сессии хранится на диске и не требует общей памяти между
+воркерами::
+
+    UPLOAD_TMP_DIR/<upload_id>/meta.json     параметры сессии (неизменяемые)
+    UPLOAD_TMP_DIR/<upload_id>/data          файл, блоки пишутся по смещению
+    UPLOAD_TMP_DIR/<upload_id>/chunks/<N>    sha256 и длина принятого блока
+
+Маркер блока снимается перед записью и создается атомарно только после
+записи и проверки данных: если соединение оборвалось (в том числе при
+повторной отправке принятого блока), маркера нет, и клиент повторяет блок.
+Готовый файл переносится в ``MEDIA_ROOT/<kind>/`` через ``os.replace``.
+Документы (``PRIVATE_KINDS``: результаты анализов и т. п.) переносятся в
+``PRIVATE_MEDIA_ROOT/<kind>/<клиника>/`` вне публичного ``/media`` и
+отдаются только через endpoint с проверкой прав. Видео переносятся в
+``VIDEO_ROOT`` и отдаются только потоково (``/api/v1/videos/``). Каталог
+временных файлов не должен раздаваться как статика.
+
+Сессия принадлежит создавшему ее пользователю (``owner``); число
+незавершенных сессий одного пользователя ограничено ``max_sessions``.
+"""
+import asyncio
+import errno
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+import aiofiles
+import aiofiles.os
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_KINDS = {
+    "images": {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff"},
+    "videos": {".mp4", ".webm", ".mov", ".m4v"},
+    "documents": {".pdf"},
+}
+# Типы файлов, которые не раздаются публично
+PRIVATE_KINDS = frozenset({"documents"})
+# Видео: отдельный каталог, раздается только потоковым endpoint'ом
+VIDEO_KIND = "videos"
+# Каталог закрытых файлов без клиники (загружены администратором сети)
+NETWORK_DIR = "network"
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+META_NAME = "meta.json"
+DATA_NAME = "data"
+CHUNKS_DIR = "chunks"
+
+
+class UploadError(Exception):
+    """Некорректный запрос к сессии загрузки."""
+
+
+class UploadNotFound(UploadError):
+    """Сессия не найдена или уже завершена."""
+
+
+class UploadIncomplete(UploadError):
+    """Получены не все блоки."""
+
+
+class UploadQuotaExceeded(UploadError):
+    """У пользователя слишком много незавершенных загрузок."""
+
+
+@dataclass(frozen=True)
+class UploadSession:
+    """Параметры сессии загрузки."""
+    id: str
+    kind: str
+    filename: str
+    size: int
+    chunk_size: int
+    created_at: float
+    owner: str = ""
+    clinic_id: Optional[int] = None
+
+    @property
+    def total_chunks(self) -> int:
+        return max(1, -(-self.size // self.chunk_size))
+
+    def chunk_length(self, index: int) -> int:
+        """Ожидаемая длина блока: все, кроме последнего, имеют размер chunk_size."""
+        if index == self.total_chunks - 1:
+            return self.size - index * self.chunk_size
+        return self.chunk_size
+
+
+def _atomic_write(path: Path, payload: str) -> None:
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    with open(tmp, "w") as f:
+        f.write(payload)
+    os.replace(tmp, path)
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _move(source: Path, target: Path) -> None:
+    try:
+        os.replace(source, target)
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+        # Временный каталог на другом разделе: копируем рядом с целью и переименовываем
+        tmp = target.with_name(f".{target.name}.tmp")
+        shutil.copyfile(source, tmp)
+        os.replace(tmp, target)
+        os.unlink(source)
+
+
+class TempStorage:
+    """
+    Хранилище незавершенных загрузок.
+
+    Attributes:
+        root: Каталог сессий
+        media_root: Корень готовых файлов
+        media_url: URL-префикс media_root
+        max_size: Максимальный размер файла
+        ttl: Время жизни сессии без активности, секунды
+        max_sessions: Незавершенных сессий на пользователя
+        private_root: Корень закрытых файлов (``PRIVATE_KINDS``)
+        private_url: URL-префикс endpoint'а закрытых файлов
+    """
+
+    def __init__(
+        self,
+        root: str | Path = "uploads_tmp",
+        media_root: str | Path = "media",
+        media_url: str = "/media/",
+        max_size: int = 2 * 1024 ** 3,
+        ttl: int = 24 * 60 * 60,
+        max_sessions: int = 5,
+        private_root: str | Path = "private_media",
+        private_url: str = "/api/v1/documents/",
+        video_root: str | Path = "videos",
+        video_url: str = "/api/v1/videos/",
+    ):
+        self.configure(
+            root, media_root, media_url, max_size, ttl, max_sessions, private_root, private_url, video_root, video_url
+        )
+
+    def configure(
+        self,
+        root: str | Path,
+        media_root: str | Path,
+        media_url: str,
+        max_size: int,
+        ttl: int,
+        max_sessions: int = 5,
+        private_root: str | Path = "private_media",
+        private_url: str = "/api/v1/documents/",
+        video_root: str | Path = "videos",
+        video_url: str = "/api/v1/videos/",
+    ) -> None:
+        self.root = Path(root).resolve()
+        self.media_root = Path(media_root).resolve()
+        self.media_url = "/" + media_url.strip("/") + "/"
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.private_root = Path(private_root).resolve()
+        self.private_url = "/" + private_url.strip("/") + "/"
+        self.video_root = Path(video_root).resolve()
+        self.video_url = "/" + video_url.strip("/") + "/"
+        # Подсчет сессий и создание новой не должны чередоваться между запросами процесса
+        self._init_lock = asyncio.Lock()
+
+    def _session_dir(self, upload_id: str) -> Path:
+        try:
+            uuid.UUID(hex=upload_id)
+        except ValueError:
+            raise UploadNotFound(upload_id)
+        return self.root / upload_id
+
+    # ------------------------------------------------------------------
+    # Протокол
+    # ------------------------------------------------------------------
+
+    async def init(
+        self,
+        filename: str,
+        size: int,
+        kind: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        owner: str = "",
+        clinic_id: Optional[int] = None,
+    ) -> UploadSession:
+        """
+        Создает сессию и резервирует файл нужного размера.
+
+        Args:
+            owner: Пользователь-владелец сессии
+            clinic_id: Клиника пользователя; закрытые файлы хранятся по клиникам
+
+        Raises:
+            UploadQuotaExceeded: У владельца уже ``max_sessions`` незавершенных сессий
+        """
+        if kind not in UPLOAD_KINDS:
+            raise UploadError(f"Неизвестный тип файла: {kind}")
+        filename = Path(filename).name
+        if Path(filename).suffix.lower() not in UPLOAD_KINDS[kind]:
+            raise UploadError(f"Недопустимое расширение для {kind}: {filename}")
+        if not 0 < size <= self.max_size:
+            raise UploadError(f"Размер файла должен быть от 1 до {self.max_size} байт")
+        if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise UploadError(f"Размер блока должен быть от {MIN_CHUNK_SIZE} до {MAX_CHUNK_SIZE} байт")
+
+        session = UploadSession(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            filename=filename,
+            size=size,
+            chunk_size=chunk_size,
+            created_at=time.time(),
+            owner=owner,
+            clinic_id=clinic_id,
+        )
+        session_dir = self.root / session.id
+        async with self._init_lock:
+            if owner and await asyncio.to_thread(self._count_sessions, owner) >= self.max_sessions:
+                raise UploadQuotaExceeded(
+                    f"Незавершенных загрузок не больше {self.max_sessions}: завершите или отмените прежние")
+            await aiofiles.os.makedirs(session_dir / CHUNKS_DIR)
+            # Разреженный файл: место не занимается до записи блоков
+            async with aiofiles.open(session_dir / DATA_NAME, "wb") as f:
+                await f.truncate(size)
+            meta = json.dumps(session.__dict__)
+            await asyncio.to_thread(_atomic_write, session_dir / META_NAME, meta)
+        return session
+
+    def _count_sessions(self, owner: str) -> int:
+        count = 0
+        try:
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            try:
+                with open(os.path.join(entry.path, META_NAME)) as f:
+                    count += json.load(f).get("owner") == owner
+            except (OSError, ValueError):
+                # Сессия создается или удаляется прямо сейчас
+                continue
+        return count
+
+    async def get_session(self, upload_id: str, owner: Optional[str] = None) -> UploadSession:
+        """
+        Параметры сессии.
+
+        Args:
+            owner: Если указан, чужая сессия считается несуществующей
+        """
+        meta_path = self._session_dir(upload_id) / META_NAME
+        try:
+            async with aiofiles.open(meta_path) as f:
+                session = UploadSession(**json.loads(await f.read()))
+        except FileNotFoundError:
+            raise UploadNotFound(upload_id)
+        if owner is not None and session.owner != owner:
+            raise UploadNotFound(upload_id)
+        return session
+
+    async def received_chunks(self, upload_id: str) -> list[int]:
+        """Номера блоков, принятых полностью; по ним клиент возобновляет загрузку."""
+        chunks_dir = self._session_dir(upload_id) / CHUNKS_DIR
+        try:
+            names = await aiofiles.os.listdir(chunks_dir)
+        except FileNotFoundError:
+            raise UploadNotFound(upload_id)
+        return sorted(int(name) for name in names if name.isdigit())
+
+    async def write_chunk(
+        self,
+        upload_id: str,
+        index: int,
+        body: AsyncIterator[bytes],
+        expected_sha256: Optional[str] = None,
+    ) -> str:
+        """
+        Записывает блок из потока тела запроса.
+
+        Returns:
+            sha256 блока
+
+        Raises:
+            UploadError: Неверный номер, длина или контрольная сумма блока
+        """
+        session = await self.get_session(upload_id)
+        if not 0 <= index < session.total_chunks:
+            raise UploadError(f"Номер блока вне диапазона 0..{session.total_chunks - 1}")
+        expected_length = session.chunk_length(index)
+        session_dir = self.root / upload_id
+        marker_path = session_dir / CHUNKS_DIR / str(index)
+
+        # Повторная отправка перезаписывает данные блока: маркер снимается до записи,
+        # иначе оборванный повтор оставил бы "принятый" блок с испорченными байтами
+        try:
+            await aiofiles.os.remove(marker_path)
+        except FileNotFoundError:
+            pass
+
+        digest = hashlib.sha256()
+        written = 0
+        async with aiofiles.open(session_dir / DATA_NAME, "r+b") as f:
+            await f.seek(index * session.chunk_size)
+            async for data in body:
+                written += len(data)
+                if written > expected_length:
+                    raise UploadError(f"Блок {index} длиннее {expected_length} байт")
+                digest.update(data)
+                await f.write(data)
+        if written != expected_length:
+            raise UploadError(f"Блок {index}: получено {written} байт из {expected_length}")
+
+        checksum = digest.hexdigest()
+        if expected_sha256 and expected_sha256.lower() != checksum:
+            raise UploadError(f"Блок {index}: контрольная сумма не совпадает")
+        marker = json.dumps({"sha256": checksum, "length": written})
+        await asyncio.to_thread(_atomic_write, marker_path, marker)
+        return checksum
+
+    async def finalize(self, upload_id: str, expected_sha256: Optional[str] = None) -> str:
+        """
+        Проверяет полноту файла и переносит его в хранилище.
+
+        Returns:
+            URL готового файла; для ``PRIVATE_KINDS`` — URL закрытого endpoint'а, для видео — потокового
+        """
+        session = await self.get_session(upload_id)
+        received = await self.received_chunks(upload_id)
+        if len(received) != session.total_chunks:
+            missing = sorted(set(range(session.total_chunks)) - set(received))
+            raise UploadIncomplete(f"Не получены блоки: {missing[:20]}")
+
+        session_dir = self.root / upload_id
+        data_path = session_dir / DATA_NAME
+        if expected_sha256:
+            checksum = await asyncio.to_thread(_file_sha256, data_path)
+            if checksum != expected_sha256.lower():
+                raise UploadError("Контрольная сумма файла не совпадает")
+
+        suffix = Path(session.filename).suffix.lower()
+        if session.kind in PRIVATE_KINDS:
+            folder = str(session.clinic_id) if session.clinic_id is not None else NETWORK_DIR
+            target_dir = self.private_root / session.kind / folder
+            url = f"{self.private_url}{folder}/{session.id}{suffix}"
+        elif session.kind == VIDEO_KIND:
+            target_dir = self.video_root
+            url = f"{self.video_url}{session.id}{suffix}"
+        else:
+            target_dir = self.media_root / session.kind
+            url = f"{self.media_url}{session.kind}/{session.id}{suffix}"
+        await aiofiles.os.makedirs(target_dir, exist_ok=True)
+        target = target_dir / f"{session.id}{suffix}"
+        await asyncio.to_thread(_move, data_path, target)
+        await asyncio.to_thread(shutil.rmtree, session_dir, True)
+        return url
+
+    def private_path(self, kind: str, folder: str, name: str) -> Optional[Path]:
+        """Путь к закрытому файлу по частям URL или None, если такого файла быть не может."""
+        if kind not in PRIVATE_KINDS or not (folder.isdigit() or folder == NETWORK_DIR):
+            return None
+        stem, dot, suffix = name.partition(".")
+        if not dot or f".{suffix}" not in UPLOAD_KINDS[kind]:
+            return None
+        try:
+            uuid.UUID(hex=stem)
+        except ValueError:
+            return None
+        return self.private_root / kind / folder / name
+
+    async def abort(self, upload_id: str) -> None:
+        session_dir = self._session_dir(upload_id)
+        if not await aiofiles.os.path.isdir(session_dir):
+            raise UploadNotFound(upload_id)
+        await asyncio.to_thread(shutil.rmtree, session_dir, True)
+
+    # ------------------------------------------------------------------
+    # Очистка брошенных сессий
+    # ------------------------------------------------------------------
+
+    def _sweep(self, now: float) -> int:
+        removed = 0
+        try:
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            try:
+                # Каталог блоков меняет mtime при каждом принятом блоке
+                last_activity = max(entry.stat().st_mtime, os.stat(os.path.join(entry.path, CHUNKS_DIR)).st_mtime)
+            except FileNotFoundError:
+                last_activity = entry.stat().st_mtime
+            if now - last_activity > self.ttl:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        return removed
+
+    async def sweep(self) -> int:
+        """Удаляет сессии без активности дольше ttl; возвращает их число."""
+        return await asyncio.to_thread(self._sweep, time.time())
+
+    async def run_sweeper(self, interval: float = 600) -> None:
+        """Фоновая задача периодической очистки (запускается в lifespan)."""
+        while True:
+            try:
+                removed = await self.sweep()
+                if removed:
+                    logger.info("Удалено брошенных загрузок: %d", removed)
+            except Exception:
+                logger.exception("Ошибка очистки временных загрузок")
+            await asyncio.sleep(interval)
+
+
+# Глобальное хранилище; каталоги задаются через init_temp_storage
+temp_storage = TempStorage()
+
+
+def init_temp_storage(settings) -> TempStorage:
+    """Настраивает глобальное хранилище загрузок по конфигурации приложения."""
+    temp_storage.configure(
+        settings.UPLOAD_TMP_DIR,
+        settings.MEDIA_ROOT,
+        settings.MEDIA_URL,
+        settings.UPLOAD_MAX_SIZE,
+        settings.UPLOAD_TTL,
+        settings.UPLOAD_MAX_SESSIONS_PER_USER,
+        settings.PRIVATE_MEDIA_ROOT,
+        settings.PRIVATE_MEDIA_URL,
+        settings.VIDEO_ROOT,
+        settings.VIDEO_URL,
+    )
+    return temp_storage
@@ -0,0 +1,278 @@
+"""
+Потоковая раздача видео с поддержкой HTTP Range.
+
+Файл никогда не читается целиком: ответ отдается блоками фиксированного
+размера (``VIDEO_CHUNK_SIZE``), поэтому память на поток ограничена одним
+блоком независимо от размера видео. Если ASGI-сервер поддерживает
+расширение ``http.response.zerocopysend``, байты передаются ядром через
+``sendfile`` без копирования в пространство пользователя.
+
+Поддерживаются одиночные диапазоны (``bytes=a-b``, ``bytes=a-``, ``bytes=-n``),
+условные запросы ``If-None-Match`` и ``If-Range`` (по ETag или дате).
+Запросы нескольких диапазонов обрабатываются как обычный GET — RFC 9110
+разрешает игнорировать Range, а видеоплееры их не используют.
+"""
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from functools import partial
+from pathlib import Path
+from typing import Callable, Optional
+
+import aiofiles
+import anyio
+from fastapi import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+VIDEO_CHUNK_SIZE = 256 * 1024
+VIDEO_CACHE_MAX_AGE = 24 * 60 * 60
+
+
+class RangeNotSatisfiable(Exception):
+    """Диапазон лежит за пределами файла."""
+
+
+def parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    Разбирает заголовок Range в диапазон ``(start, end)`` включительно.
+
+    Returns:
+        Диапазон или None, если заголовок следует игнорировать
+        (не bytes, несколько диапазонов, синтаксическая ошибка)
+
+    Raises:
+        RangeNotSatisfiable: Если диапазон корректен, но не пересекается с файлом
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # Суффикс: последние N байт
+            length = int(last)
+            if length == 0:
+                raise RangeNotSatisfiable
+            start, end = max(0, size - length), size - 1
+    except ValueError:
+        return None
+    if start > end and first and last:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, min(end, size - 1)
+
+
+class StreamLimiter:
+    """
+    Ограничение числа одновременных потоков на клиента.
+
+    Счетчики живут в памяти процесса; обращения идут из одного event loop,
+    поэтому блокировки не нужны.
+    """
+
+    def __init__(self, max_per_client: int = 4):
+        self.max_per_client = max_per_client
+        self._active: dict[str, int] = {}
+
+    def acquire(self, client: str) -> bool:
+        count = self._active.get(client, 0)
+        if count >= self.max_per_client:
+            return False
+        self._active[client] = count + 1
+        return True
+
+    def release(self, client: str) -> None:
+        count = self._active.get(client, 0) - 1
+        if count > 0:
+            self._active[client] = count
+        else:
+            self._active.pop(client, None)
+
+
+class FileRangeResponse(Response):
+    """
+    Ответ с содержимым части файла.
+
+    Заголовки отправляются сразу, тело — блоками; при разрыве соединения
+    чтение прекращается. ``on_close`` вызывается после завершения ответа
+    в любом случае (используется для освобождения слота клиента).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        start: int,
+        end: int,
+        *,
+        status_code: int = 200,
+        headers: Optional[dict[str, str]] = None,
+        media_type: Optional[str] = None,
+        on_close: Optional[Callable[[], None]] = None,
+    ):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.length = end - start + 1
+        self.on_close = on_close
+        self.headers["content-length"] = str(self.length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if scope["method"] == "HEAD" or self.length == 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await self._send_zerocopy(send)
+                return
+
+            async with anyio.create_task_group() as task_group:
+                async def run_and_cancel(func) -> None:
+                    await func()
+                    task_group.cancel_scope.cancel()
+
+                task_group.start_soon(run_and_cancel, partial(self._send_chunks, send))
+                await run_and_cancel(partial(self._wait_disconnect, receive))
+        finally:
+            if self.on_close is not None:
+                self.on_close()
+
+    async def _send_zerocopy(self, send: Send) -> None:
+        with open(self.path, "rb") as f:
+            await send({
+                "type": "http.response.zerocopysend",
+                "file": f,
+                "offset": self.start,
+                "count": self.length,
+                "more_body": False,
+            })
+
+    async def _send_chunks(self, send: Send) -> None:
+        remaining = self.length
+        async with aiofiles.open(self.path, "rb") as f:
+            await f.seek(self.start)
+            while remaining > 0:
+                chunk = await f.read(min(VIDEO_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break  # файл укоротили во время отдачи
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    @staticmethod
+    async def _wait_disconnect(receive: Receive) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+
+
+class VideoStorage:
+    """
+    Хранилище видео в каталоге ``VIDEO_ROOT``.
+
+    Каталог не должен лежать внутри ``MEDIA_ROOT``: статика ``/media``
+    отдала бы файлы целиком, без блочной отдачи и лимита потоков.
+
+    Attributes:
+        root: Каталог с видеофайлами
+        limiter: Ограничение одновременных потоков на клиента
+    """
+
+    def __init__(self, root: str | Path = "videos", max_streams_per_client: int = 4):
+        self.configure(root, max_streams_per_client)
+
+    def configure(self, root: str | Path, max_streams_per_client: int) -> None:
+        self.root = Path(root).resolve()
+        self.limiter = StreamLimiter(max_streams_per_client)
+
+    def resolve(self, name: str) -> Optional[Path]:
+        """Путь к видео внутри каталога хранилища или None."""
+        path = (self.root / name).resolve()
+        if not path.is_relative_to(self.root) or not path.is_file():
+            return None
+        return path
+
+    @staticmethod
+    def etag(stat: os.stat_result) -> str:
+        return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+    def stream(self, request: Request, name: str) -> Response:
+        """Строит ответ 200/206/304/404/416/429 на запрос видео."""
+        path = self.resolve(name)
+        if path is None:
+            return Response(status_code=404)
+
+        stat = path.stat()
+        size = stat.st_size
+        etag = self.etag(stat)
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "last-modified": formatdate(stat.st_mtime, usegmt=True),
+            "cache-control": f"public, max-age={VIDEO_CACHE_MAX_AGE}",
+        }
+        media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+        range_header = request.headers.get("range")
+        if range_header and not self._if_range_matches(request.headers.get("if-range"), etag, stat.st_mtime):
+            range_header = None  # файл изменился: отдаем целиком
+
+        if range_header is None:
+            if_none_match = request.headers.get("if-none-match")
+            if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+                return Response(status_code=304, headers=headers)
+
+        byte_range = None
+        if range_header:
+            try:
+                byte_range = parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+
+        client = request.client.host if request.client else "unknown"
+        if not self.limiter.acquire(client):
+            return Response(status_code=429, headers={"retry-after": "1"})
+
+        release = partial(self.limiter.release, client)
+        if byte_range is None:
+            return FileRangeResponse(
+                path, 0, size - 1, headers=headers, media_type=media_type, on_close=release
+            )
+        start, end = byte_range
+        headers["content-range"] = f"bytes {start}-{end}/{size}"
+        return FileRangeResponse(
+            path, start, end, status_code=206, headers=headers, media_type=media_type, on_close=release
+        )
+
+    @staticmethod
+    def _if_range_matches(if_range: Optional[str], etag: str, mtime: float) -> bool:
+        """Условие If-Range: ETag сравнивается строго, дата — с точностью до секунды."""
+        if not if_range:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(('"', "W/")):
+            return if_range == etag
+        try:
+            return int(parsedate_to_datetime(if_range).timestamp()) == int(mtime)
+        except (TypeError, ValueError):
+            return False
+
+
+# Глобальное хранилище; каталог задается через init_video_storage
+video_storage = VideoStorage()
+
+
+def init_video_storage(settings) -> VideoStorage:
+    """Настраивает глобальное хранилище видео по конфигурации приложения."""
+    video_storage.configure(settings.VIDEO_ROOT, settings.VIDEO_MAX_STREAMS_PER_CLIENT)
+    return video_storage
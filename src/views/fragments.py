@@ -0,0 +1,158 @@
+"""
+Кэширование серверного рендера страниц по фрагментам.
+
+Страница рендерится один раз в "оболочку": статические части (шапка,
+hero, подвал) попадают в нее сразу, а на месте фрагментов с данными
+шаблон выводит метку ``fragment_slot("name")``. Оболочка разбивается по
+меткам на готовые байты и живет до перезапуска процесса (одного деплоя).
+
+Фрагменты с данными (клиники) кэшируются отдельно с тегами
+каталога и сбрасываются той же инвалидацией, что и кэш каталога, плюс
+TTL — он ограничивает рассинхронизацию с другими процессами.
+Ответ собирается конкатенацией байтов; ETag вычисляется из хэшей оболочки
+и фрагментов, поэтому 304 отдается без сборки тела.
+"""
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request
+from fastapi.responses import HTMLResponse
+from fastapi.templating import Jinja2Templates
+from markupsafe import Markup
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import Response
+
+from src.core.cache import CatalogCache, TTLCache, catalog_cache
+from src.core.database import use_primary
+from src.services import catalog_service
+
+logger = logging.getLogger(__name__)
+
+_SLOT_PATTERN = re.compile(r"<!--fragment:([\w.\-]+)-->")
+
+
+def fragment_slot(name: str) -> Markup:
+    """Метка места фрагмента в оболочке страницы."""
+    return Markup(f"<!--fragment:{name}-->")
+
+
+@dataclass(frozen=True)
+class Fragment:
+    """Отрендеренный фрагмент."""
+    body: bytes
+    digest: bytes
+
+    @classmethod
+    def from_html(cls, html: str) -> "Fragment":
+        body = html.encode()
+        return cls(body, hashlib.sha256(body).digest())
+
+
+@dataclass(frozen=True)
+class DataFragment:
+    """
+    Фрагмент, зависящий от данных.
+
+    Attributes:
+        template: Имя шаблона
+        load: Загрузка контекста шаблона из БД
+        tags: Теги каталога, при инвалидации которых фрагмент перерисовывается
+        empty: Контекст на случай недоступности БД (шаблон показывает статичную разметку)
+    """
+    template: str
+    load: Callable[[AsyncSession], Awaitable[dict[str, Any]]]
+    tags: tuple[str, ...]
+    empty: dict[str, Any] = field(default_factory=dict)
+
+
+async def _clinics_context(db: AsyncSession) -> dict[str, Any]:
+    return {"clinics": await catalog_service.list_clinics(db)}
+
+
+DATA_FRAGMENTS: dict[str, DataFragment] = {
+    "indexClinic.html": DataFragment(
+        "indexClinic.html", _clinics_context, ("clinic:list", "clinic:all"), {"clinics": []}
+    ),
+}
+# Специалисты не выводятся списком: раздел загружает их по выбранной клинике
+# (на сети клиник это тысячи карточек), поэтому он остается в оболочке
+
+# Фрагменты сбрасываются вместе с тегами каталога
+fragment_cache = CatalogCache(TTLCache(maxsize=256, ttl=30))
+catalog_cache.add_invalidation_listener(fragment_cache.invalidate_tags)
+
+
+def init_fragment_cache(settings) -> CatalogCache:
+    """Настраивает TTL фрагментов по конфигурации приложения."""
+    fragment_cache.local = TTLCache(maxsize=256, ttl=settings.CACHE_LOCAL_TTL)
+    return fragment_cache
+
+
+class CachedPage:
+    """
+    Страница, собираемая из закэшированной оболочки и фрагментов с данными.
+
+    Attributes:
+        templates: Окружение шаблонов
+        template: Шаблон страницы
+        context: Постоянный контекст оболочки
+    """
+
+    def __init__(self, templates: Jinja2Templates, template: str, context: Optional[dict[str, Any]] = None):
+        self.templates = templates
+        self.template = template
+        self.context = context or {}
+        self._segments: Optional[tuple[bytes, ...]] = None
+        self._slots: tuple[str, ...] = ()
+        self._digest = b""
+
+    def _shell(self) -> tuple[tuple[bytes, ...], tuple[str, ...]]:
+        if self._segments is None:
+            html = self.templates.get_template(self.template).render(
+                {**self.context, "fragment_slot": fragment_slot}
+            )
+            parts = _SLOT_PATTERN.split(html)
+            # split чередует статичный текст и имена фрагментов
+            self._segments = tuple(part.encode() for part in parts[0::2])
+            self._slots = tuple(parts[1::2])
+            self._digest = hashlib.sha256(html.encode()).digest()
+        return self._segments, self._slots
+
+    async def _fragment(self, db: AsyncSession, name: str) -> Fragment:
+        spec = DATA_FRAGMENTS[name]
+        template = self.templates.get_template(spec.template)
+
+        async def render() -> Fragment:
+            use_primary(db)  # кэш не заполняется с отстающей реплики
+            return Fragment.from_html(template.render(await spec.load(db)))
+
+        try:
+            return await fragment_cache.get_or_load(f"fragment:{name}", render, tags=spec.tags)
+        except Exception:
+            # Страница не должна падать из-за БД; пустой фрагмент не кэшируется
+            logger.exception("Не удалось загрузить данные фрагмента %s", name)
+            return Fragment.from_html(template.render(spec.empty))
+
+    async def response(self, request: Request, db: AsyncSession) -> Response:
+        """Ответ 200 с собранной страницей или 304, если ETag не изменился."""
+        segments, slots = self._shell()
+        fragments = [await self._fragment(db, name) for name in slots]
+
+        digest = hashlib.sha256(self._digest)
+        for fragment in fragments:
+            digest.update(fragment.digest)
+        etag = f'"{digest.hexdigest()[:32]}"'
+        headers = {"etag": etag, "cache-control": "no-cache"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+
+        body = bytearray(segments[0])
+        for fragment, segment in zip(fragments, segments[1:]):
+            body += fragment.body
+            body += segment
+        return HTMLResponse(bytes(body), headers=headers)
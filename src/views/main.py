@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.database import get_db
+from src.storage.assets import static_assets
+from src.views.fragments import CachedPage
 
 # Создаем router
 router = APIRouter(tags=["Main"])
@@ -9,15 +14,18 @@ router = APIRouter(tags=["Main"])
 # Настраиваем templates
 BASE_DIR = Path(__file__).resolve().parent.parent
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+# URL статики с хэшем содержимого: {{ asset_url("css/style.css") }}
+templates.env.globals["asset_url"] = static_assets.url
+
+# Оболочка главной рендерится один раз (специалистов в нее подставляет скрипт
+# страницы по выбранной клинике), клиники — при изменении данных
+index_page = CachedPage(templates, "index.html", {"title": "Ветеринарная клиника"})
 
 
 @router.get("/", response_class=HTMLResponse)
-async def read_root(request: Request):
+async def read_root(request: Request, db: AsyncSession = Depends(get_db)):
     """Главная страница."""
-    return templates.TemplateResponse(
-        "index.html",
-        {"request": request, "title": "Ветеринарная клиника"}
-    )
+    return await index_page.response(request, db)
 
 # @router.get("/clinics", response_class=HTMLResponse)
 # async def clinics_page(request: Request):
@@ -0,0 +1,113 @@
+"""
+Очередь писем против локального SMTP-сервера (aiosmtpd).
+
+Сервер работает в своем потоке; получатели ``temporary@`` и ``rejected@``
+получают на DATA ответы 451 (первый раз) и 550.
+"""
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from src.services.email_service import (
+    TEMPLATE_PASSWORD_RESET, EmailQueueFull, EmailRenderer, EmailService, OutgoingEmail, SMTPPool,
+)
+
+controller_module = pytest.importorskip("aiosmtpd.controller")
+
+
+class Handler:
+    def __init__(self):
+        self.received: list[str] = []
+        self.sessions: set[int] = set()
+        self.refused: dict[str, int] = {}
+        self.release = threading.Event()
+        self.release.set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.release.wait()
+        recipient = envelope.rcpt_tos[0]
+        if recipient.startswith("rejected@"):
+            return "550 Mailbox unavailable"
+        if recipient.startswith("temporary@") and not self.refused.get(recipient):
+            self.refused[recipient] = 1
+            return "451 Try again later"
+        self.sessions.add(id(session))
+        self.received.append(recipient)
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    handler = Handler()
+    controller = controller_module.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield handler, port
+    handler.release.set()
+    controller.stop()
+
+
+def make_service(port: int, **options) -> EmailService:
+    pool = SMTPPool(hostname="127.0.0.1", port=port, size=options.get("workers", 1), max_messages=1000)
+    return EmailService(pool=pool, renderer=EmailRenderer(sender="noreply@example.com"),
+                        retry_base_delay=0.01, **options)
+
+
+def reset_email(to: str) -> OutgoingEmail:
+    return OutgoingEmail(to, TEMPLATE_PASSWORD_RESET, {"reset_url": "http://example.com/r", "expires_minutes": 30})
+
+
+@pytest.mark.anyio
+async def test_batches_share_one_connection(smtp):
+    handler, port = smtp
+    service = make_service(port, workers=1, batch_size=50)
+    service.start()
+    assert await service.enqueue(reset_email(f"user{i}@example.com") for i in range(120)) == 120
+    await service.stop()
+
+    assert len(handler.received) == 120
+    assert len(handler.sessions) == 1
+    assert service.metrics.connections_opened == 1
+    assert service.metrics.batches == 3
+
+
+@pytest.mark.anyio
+async def test_temporary_errors_are_retried_permanent_are_not(smtp):
+    handler, port = smtp
+    service = make_service(port)
+    service.start()
+    for to in ("temporary@example.com", "rejected@example.com", "ok@example.com"):
+        service.submit(to, TEMPLATE_PASSWORD_RESET, {"reset_url": "http://example.com/r"})
+    await service.stop()  # дожидается и отложенного повтора
+
+    assert sorted(handler.received) == ["ok@example.com", "temporary@example.com"]
+    assert service.metrics.retried == 1
+    assert service.metrics.failed == 1
+
+
+@pytest.mark.anyio
+async def test_bulk_leaves_room_for_submit(smtp):
+    handler, port = smtp
+    handler.release.clear()  # сервер держит первое письмо, очередь не разбирается
+    service = make_service(port, queue_size=10, submit_reserve=3, batch_size=1)
+    service.start()
+    bulk = asyncio.create_task(service.enqueue(reset_email(f"user{i}@example.com") for i in range(20)))
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        if service.snapshot()["queue_size"] == 7:
+            break
+    assert service.snapshot()["queue_size"] == 7
+
+    for i in range(3):
+        service.submit(f"reset{i}@example.com", TEMPLATE_PASSWORD_RESET)
+    with pytest.raises(EmailQueueFull):
+        service.submit("late@example.com", TEMPLATE_PASSWORD_RESET)
+
+    handler.release.set()
+    assert await bulk == 20
+    await service.stop()
+    assert len(handler.received) == 23
@@ -0,0 +1,33 @@
+"""Выгрузка: экранирование ячеек CSV."""
+import csv
+import io
+
+from src.schemas.export import ExportFormat, ExportKind
+from src.services.export_service import EXPORTS, _Serializer
+
+
+def export_csv(**values) -> dict[str, str]:
+    columns = EXPORTS[ExportKind.CLIENTS].columns
+    serializer = _Serializer(columns, ExportFormat.CSV)
+    row = [values.get(column.name) for column in columns]
+    data = (serializer.header() + serializer.partition([row])).decode("utf-8-sig")
+    return next(csv.DictReader(io.StringIO(data)))
+
+
+def test_phone_numbers_are_not_escaped():
+    row = export_csv(phone_number="+79001234567", emergency_contact="+7 (900) 123-45-67")
+    assert row["phone_number"] == "+79001234567"
+    assert row["emergency_contact"] == "+7 (900) 123-45-67"
+
+
+def test_formulas_are_escaped():
+    row = export_csv(
+        first_name='=HYPERLINK("http://example.com","x")',
+        last_name="+1+cmd|' /C calc'!A0",
+        address="@SUM(A1:A2)",
+        allergies=["-2+3"],
+    )
+    assert row["first_name"] == '\'=HYPERLINK("http://example.com","x")'
+    assert row["last_name"] == "'+1+cmd|' /C calc'!A0"
+    assert row["address"] == "'@SUM(A1:A2)"
+    assert row["allergies"] == "'-2+3"
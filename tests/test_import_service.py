@@ -0,0 +1,84 @@
+"""
+Импорт каталога.
+
+Загрузка (COPY во временную таблицу и upsert) выполняется только на
+PostgreSQL: адрес тестовой базы задается в ``TEST_DATABASE_URL``
+(``postgresql+asyncpg://...``, нужно расширение pg_trgm), без него эти
+тесты пропускаются. Тест создает таблицы моделей и удаляет их после себя.
+"""
+import os
+
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.models import Clinic, Service, Specialist
+from src.models.base import Base
+from src.models.service import ServiceCategory
+from src.schemas.catalog_import import ImportFormat, ImportKind
+from src.services.import_service import import_catalog, prepare_import
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+postgres = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL не задан")
+
+
+def test_unknown_enum_reports_its_field():
+    data = "clinic_id,name,price,category,status\n1,Осмотр,500,treatment,active\n1,Прием,700,other,active\n"
+    prepared = prepare_import(ImportKind.SERVICES, data.encode(), ImportFormat.CSV)
+    assert [(e.row, e.field) for e in prepared.errors] == [(2, "category")]
+    assert len(prepared.records) == 1
+
+
+@pytest.fixture
+async def db():
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Clinic), [
+            {"id": clinic_id, "name": f"Клиника {clinic_id}", "address": "ул. Ленина, 1",
+             "phone_number": "+70000000000", "email": "clinic@example.com"}
+            for clinic_id in (1, 2)
+        ])
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+@postgres
+@pytest.mark.anyio
+async def test_upsert_and_links(db):
+    specialists = (
+        "clinic_id,last_name,first_name,patronymic,specialization\n"
+        "1,Иванов,Иван,,Хирург\n"
+        "1,Петрова,Анна,Сергеевна,Терапевт\n"
+        "2,Сидоров,Петр,,Дерматолог\n"
+    )
+    report = await import_catalog(db, ImportKind.SPECIALISTS, specialists.encode(), ImportFormat.CSV)
+    assert (report.inserted, report.updated, report.failed) == (3, 0, 0)
+    ids = dict((await db.execute(select(Specialist.last_name, Specialist.id))).all())
+
+    services = (
+        "clinic_id;name;price;category;specialist_ids\n"
+        f"1;Осмотр;500;consultation;{ids['Иванов']}|{ids['Петрова']}\n"
+        f"1;Вакцинация;900;vaccination;{ids['Сидоров']}\n"
+        "3;Стрижка;800;grooming;\n"
+    )
+    report = await import_catalog(db, ImportKind.SERVICES, services.encode(), ImportFormat.CSV)
+    assert (report.inserted, report.updated) == (1, 0)
+    assert {(e.row, e.field) for e in report.errors} == {(3, "specialist_ids"), (4, "clinic_id")}
+
+    # Повторный импорт: существующая услуга обновляется, связи заменяются списком из файла
+    services = f"clinic_id,name,price,specialist_ids\n1,Осмотр,650,{ids['Петрова']}\n1,Прием,700,\n"
+    report = await import_catalog(db, ImportKind.SERVICES, services.encode(), ImportFormat.CSV)
+    assert (report.inserted, report.updated, report.failed) == (1, 1, 0)
+
+    checkup = (await db.execute(select(Service).where(Service.name == "Осмотр"))).scalar_one()
+    assert float(checkup.price) == 650
+    assert checkup.category == ServiceCategory.CONSULTATION  # колонки нет в файле — не меняется
+    links = (await db.execute(select(func.count()).select_from(Service.specialists.property.secondary)
+                              .where(Service.specialists.property.secondary.c.service_id == checkup.id))).scalar()
+    assert links == 1
@@ -0,0 +1,69 @@
+"""Учет запросов к базе: ``count_queries`` и строгий бюджет endpoint'а."""
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.core import metrics
+from src.core.query_budget import (
+    QueryBudgetExceeded, QueryBudgetMiddleware, count_queries, query_budget, track_engine,
+)
+
+items = table("items", column("id"))
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    track_engine(engine)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+        await conn.execute(text("INSERT INTO items (id) VALUES (1), (2), (3)"))
+    yield engine
+    await engine.dispose()
+
+
+async def select_each(engine, ids) -> None:
+    async with AsyncSession(engine) as db:
+        for item_id in ids:
+            await db.execute(select(items.c.id).where(items.c.id == item_id))
+
+
+@pytest.mark.anyio
+async def test_count_queries_groups_shapes(engine):
+    with count_queries(max_queries=3) as stats:
+        await select_each(engine, (1, 2, 3))
+    assert stats.count == 3
+    assert stats.repeated(3) == [(3, stats.repeated(1)[0][1])]
+
+    with pytest.raises(QueryBudgetExceeded):
+        with count_queries(max_queries=2):
+            await select_each(engine, (1, 2, 3))
+
+
+@pytest.mark.anyio
+async def test_shapes_counted_past_fingerprint_limit(engine, monkeypatch):
+    # Реестр отпечатков метрик заполнен: формы запросов все равно различаются
+    monkeypatch.setattr(metrics, "MAX_FINGERPRINTS", 0)
+    with count_queries() as stats:
+        await select_each(engine, (1, 2))
+        async with AsyncSession(engine) as db:
+            await db.execute(select(items.c.id).order_by(items.c.id))
+    assert sorted(count for count, _ in stats.repeated(1)) == [1, 2]
+
+
+@pytest.mark.anyio
+async def test_strict_budget_fails_before_response(engine):
+    app = FastAPI()
+    app.add_middleware(QueryBudgetMiddleware, strict=True)
+
+    @app.get("/items", dependencies=[query_budget(max_queries=2)])
+    async def list_items():
+        await select_each(engine, (1, 2, 3))
+        return {"ok": True}
+
+    transport = ASGITransport(app, raise_app_exceptions=False)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/items")
+    assert response.status_code == 500